@@ -0,0 +1,78 @@
+"""Measures how long browse mode waits when moving to the next capture, with and without reading ahead.
+Every read is slowed down by a fixed latency to stand in for a network mounted share, and each capture is
+viewed for a while before moving on. Moving back to a recently viewed capture is timed as well.
+
+Usage: python benchmarks/bench_browse.py --files 12 --latency 1.5 --view 1 --prefetch 0 3
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--latency", type=float, default=1.5, help="seconds added to every read")
+    parser.add_argument("--view", type=float, default=1.0, help="seconds each capture is viewed")
+    parser.add_argument("--prefetch", type=int, nargs="+", default=[0, 3])
+    args = parser.parse_args()
+
+    import logging
+    import matplotlib
+    matplotlib.use("Agg")
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+    import csv_grapher
+    from bench_load import scaleCSV
+
+    os.environ["CSV_GRAPHER_NO_CACHE"] = "1"
+    csv_grapher.cache.enabled = False   #every read goes to the slow share
+
+    def slowRead(filelocation):
+        time.sleep(args.latency)
+        return csv_grapher.readCSV(filelocation, True)
+
+    with tempfile.TemporaryDirectory() as folder:
+        files = []
+        for i in range(args.files):
+            files.append(os.path.join(folder, f"capture{i}.csv"))
+            scaleCSV(os.path.join(ROOT, "test2.csv"), args.rows, files[-1])
+
+        for prefetch in args.prefetch:
+            waits = browseFiles(files, slowRead, prefetch, args)
+            forward, back = waits[:args.files - 1], waits[args.files - 1:]
+            print(f"prefetch {prefetch}: next {sum(forward) / len(forward):.3f} s mean, {max(forward):.3f} s max; "
+                  f"previous {sum(back) / len(back):.3f} s mean  ({args.latency:g} s per read, {args.view:g} s per view)")
+
+
+def browseFiles(files, read, prefetch, args):
+    """Pages through the files with the arrow keys, then back three, and returns the time every key press took"""
+    import matplotlib.pyplot as plt
+    from matplotlib.backend_bases import KeyEvent
+    import csv_grapher
+    from browse import CaptureBrowser
+
+    browser = CaptureBrowser(files, read, prefetch=prefetch)
+    fig = csv_grapher.browse(browser, browser.get(0), figureNum=f"prefetch {prefetch}")
+    fig.canvas.draw()
+    waits = []
+    for key in ["right"] * (args.files - 1) + ["left"] * 3:
+        time.sleep(args.view)
+        start = time.perf_counter()
+        fig.canvas.callbacks.process("key_press_event", KeyEvent("key_press_event", fig.canvas, key))
+        fig.canvas.draw()
+        waits.append(time.perf_counter() - start)
+    browser.close()
+    plt.close(fig)
+    return waits
+
+
+if __name__ == "__main__":
+    main()
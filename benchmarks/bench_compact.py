@@ -0,0 +1,97 @@
+"""Compares loading a scope capture in memory (float64 columns) with the compact load mode (float32 y columns and the
+evenly spaced x column stored as a start and step): memory of the columns, peak RSS, and the time to load, plot, draw,
+zoom into a tenth of the capture and hover. Every mode runs in a fresh interpreter with the CSV cache off.
+tests/test_uniform_axis.py checks that both modes measure the same.
+
+Usage: python benchmarks/bench_compact.py --rows 1e7
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from suite import capturePath, hoverEvents, peakRSS
+
+
+def runMode(filename, loadMode, hovers):
+    """Loads, plots, zooms and hovers a capture in this process and returns the measurements"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import logging
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+    import matplotlib.pyplot as plt
+    import pandas   #imported before the timing starts, as in the benchmark suite
+    from csv_grapher import Graph, load_capture
+    
+    result = {"mode": loadMode}
+    start = time.perf_counter()
+    capture = load_capture(filename, True, loadMode)
+    result["load"] = time.perf_counter() - start
+    result["column_mb"] = sum(getattr(column, "nbytes", 0) for column in capture.columns.values()) / 2**20
+    result["x"] = type(capture.x).__name__
+    result["rss_loaded_mb"] = peakRSS()
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        graph = Graph(1, capture, [capture.title])
+        graph.fig.canvas.draw()
+        result["plot_draw"] = time.perf_counter() - start
+        
+        ax = graph.lines[0].axes
+        left, right = ax.get_xlim()
+        xlim = (left + (right - left) * 0.45, left + (right - left) * 0.55)
+        start = time.perf_counter()
+        ax.set_xlim(*xlim)
+        graph.fig.canvas.draw()
+        result["zoom"] = time.perf_counter() - start
+        
+        events = hoverEvents(graph, hovers)
+        start = time.perf_counter()
+        for event in events:
+            graph.fig.canvas.callbacks.process("motion_notify_event", event)
+        result["hover_ms"] = (time.perf_counter() - start) / hovers * 1e3
+    
+    result["peak_rss_mb"] = peakRSS()
+    plt.close(graph.fig)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=lambda value: int(float(value)), default=10**6)
+    parser.add_argument("--hovers", type=int, default=200)
+    parser.add_argument("--data", default=os.path.join(tempfile.gettempdir(), "csv_grapher_benchmarks"), help="folder of the generated captures")
+    parser.add_argument("--child", help=argparse.SUPPRESS)  #load mode run in a fresh interpreter
+    args = parser.parse_args()
+    
+    filename = capturePath(args.data, args.rows)
+    if args.child:
+        print(json.dumps(runMode(filename, args.child, args.hovers)))
+        return
+    
+    environ = dict(os.environ, CSV_GRAPHER_NO_CACHE="1")
+    results = []
+    for loadMode in ("memory", "compact"):
+        output = subprocess.run([sys.executable, __file__, "--rows", str(args.rows), "--hovers", str(args.hovers), "--data", args.data, "--child", loadMode],
+                                env=environ, capture_output=True, text=True, check=True)
+        result = json.loads(output.stdout.splitlines()[-1])
+        results.append(result)
+        print(f"{loadMode:<8} x as {result['x']:<11} columns {result['column_mb']:7.1f} MB, RSS after load {result['rss_loaded_mb']:6.0f} MB, "
+              f"peak {result['peak_rss_mb']:6.0f} MB | load {result['load']:6.2f} s, plot+draw {result['plot_draw']:5.2f} s, "
+              f"zoom {result['zoom']:5.3f} s, hover {result['hover_ms']:5.2f} ms/event")
+    
+    print(f"columns {results[1]['column_mb'] / results[0]['column_mb']:.0%} of the memory mode")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Times loading a damaged scope capture in every load mode against loading the clean one, i.e. the cost of
+the cleaning stage (csv_loader.cleanRows). tests/test_csv_loader.py checks what it removes. The damaged copy of a
+generated capture (see suite.py) has
+    an empty y value on the first data row, as in test.csv       removed
+    a message line every --every rows, e.g. "Trigger re-armed"   removed
+    one empty channel every --every rows, offset by half         kept, NaN in that channel
+    a last line cut short in the x value                         removed
+
+Usage: python benchmarks/bench_damaged.py --rows 1e7
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from suite import capturePath
+
+modes = ["memory", "compact", "memmap", "stream", "c engine"]   #load_capture modes, and loadCSV with the C parser
+
+
+def damage(source, filename, every):
+    """Writes a damaged copy of a generated capture
+
+    Returns:
+        tuple: number of rows that should be removed, and number of rows with an empty channel
+    """
+    removed = 0
+    emptied = 0
+    row = 0
+    with open(source, "rb") as read, open(filename, "wb") as write:
+        write.write(read.readline() + read.readline())  #field and units rows
+        while block := read.read(2**24):
+            block += read.readline()
+            lines = block.split(b"\n")
+            if not lines[-1]:
+                lines.pop()
+            for i in range(-row % every, len(lines), every):    #message lines
+                lines[i] = b"Trigger re-armed\n" + lines[i]
+                removed += 1
+            for i in range((every // 2 - row) % every, len(lines), every):  #one empty channel
+                x, one, two = lines[i].split(b",")
+                lines[i] = b",".join([x, b"", two])
+                emptied += 1
+            if row == 0:
+                lines[0] = lines[0].split(b",")[0] + b",,"
+                removed += 1
+            row += len(lines)
+            write.write(b"\n".join(lines) + b"\n")
+        write.write(b"+1.2345")  #the last line of an interrupted capture
+        removed += 1
+    return removed, emptied
+
+
+def load(mode, filename):
+    """Loads a capture and returns the number of rows removed"""
+    from capture import load_capture
+    from csv_loader import loadCSV
+    
+    if mode == "c engine":
+        return loadCSV(filename, True, engine="c")[2].attrs["removedRows"]
+    return load_capture(filename, True, mode).removedRows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=lambda value: int(float(value)), default=10**7)
+    parser.add_argument("--every", type=int, default=100_000, help="rows between two damaged rows")
+    parser.add_argument("--data", default=os.path.join(tempfile.gettempdir(), "csv_grapher_benchmarks"), help="folder of the generated captures")
+    args = parser.parse_args()
+    
+    clean = capturePath(args.data, args.rows)
+    cache = tempfile.mkdtemp(prefix="csv_grapher_damaged_")
+    os.environ["CSV_GRAPHER_CACHE"] = cache     #memory-mapped captures are converted into the cache, which is removed afterwards
+    os.environ["CSV_GRAPHER_NO_CACHE"] = "1"
+    try:
+        damaged = os.path.join(cache, "damaged.csv")
+        incomplete, emptied = damage(clean, damaged, args.every)
+        print(f"{args.rows} rows, {incomplete} incomplete rows and {emptied} rows with an empty channel")
+        for mode in modes:
+            seconds = []
+            for filename in (clean, damaged):
+                start = time.perf_counter()
+                removed = load(mode, filename)
+                seconds.append(time.perf_counter() - start)
+            print(f"{mode:<9} clean {seconds[0]:6.2f} s  damaged {seconds[1]:6.2f} s  ({removed} rows removed)")
+    finally:
+        shutil.rmtree(cache, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
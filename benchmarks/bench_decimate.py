@@ -0,0 +1,63 @@
+"""Benchmark of drawing a long trace in full against drawing its min/max envelope from downsample.py.
+tests/test_downsample.py checks that the envelope keeps every extreme of the trace.
+
+Usage: python benchmarks/bench_decimate.py --points 20000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downsample import DecimatedLine, connectDecimation
+
+
+def syntheticSignal(points):
+    """Noisy sine wave with a few single sample glitches, the kind of thing decimation must not hide"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, points)
+    y = np.sin(2 * np.pi * 50 * x) + rng.normal(0, 0.05, points)
+    glitches = rng.integers(0, points, 20)
+    y[glitches] += rng.choice([-5, 5], 20)
+    return x, y
+
+
+def timeDraw(x, y, decimated):
+    """Plots and draws the trace once, then zooms in and draws again"""
+    fig = plt.figure(figsize=(12, 7))
+    ax = fig.gca()
+    start = time.perf_counter()
+    if decimated:
+        decimatedLines = [DecimatedLine(ax, x, y, marker="o", markersize=2)]
+        connectDecimation(ax, decimatedLines)
+    else:
+        ax.plot(x, y, marker="o", markersize=2)
+    fig.canvas.draw()
+    drawn = time.perf_counter()
+    ax.set_xlim(0.25, 0.26)
+    fig.canvas.draw()
+    zoomed = time.perf_counter()
+    plt.close(fig)
+    return drawn - start, zoomed - drawn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=5_000_000)
+    parser.add_argument("--skip-full", action="store_true", help="only time the decimated draw")
+    args = parser.parse_args()
+
+    x, y = syntheticSignal(args.points)
+    for decimated in ((True,) if args.skip_full else (True, False)):
+        draw, zoom = timeDraw(x, y, decimated)
+        print(f"{'decimated' if decimated else 'full':<9} first draw {draw:.3f} s, zoomed redraw {zoom:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Measures whether a followed Graph keeps up with a CSV being appended to at a given rate.
+A writer process appends rows in small blocks while the graph is stepped at a fixed refresh rate under Agg,
+so every step parses the new rows, updates the lines and redraws either the axes (blit) or the whole figure.
+
+Usage: python benchmarks/bench_follow.py --rate 100000 --fps 10 --seconds 20 --frequency 10
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def formatRows(count, frequency):
+    """Lines of a two channel capture sampled at 1 MHz (a sine and a square wave at a quarter of its frequency),
+    formatted up front so the writer does not compete with the graph for CPU"""
+    import numpy as np
+
+    x = np.arange(1, count + 1) * 1e-6
+    text = io.StringIO()
+    np.savetxt(text, np.column_stack([x, np.sin(2 * np.pi * frequency * x), np.sign(np.sin(0.5 * np.pi * frequency * x))]), fmt="%.9E,%.6E,%.1f")
+    return text.getvalue().encode().splitlines(keepends=True)
+
+
+def writeRows(filename, lines, rate, written):
+    """Appends lines to filename at `rate` lines per second, in blocks every 10 ms"""
+    start = time.perf_counter()
+    with open(filename, "ab") as file:
+        while written.value < len(lines):
+            due = min(int((time.perf_counter() - start) * rate), len(lines))
+            if due > written.value:
+                file.write(b"".join(lines[written.value:due]))
+                file.flush()
+                written.value = due
+            time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rate", type=int, default=100_000, help="rows appended per second")
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--frequency", type=float, default=10, help="Hz. Higher frequencies fill the axes with a dense envelope, which is slower to draw")
+    args = parser.parse_args()
+
+    import logging
+    import matplotlib
+    matplotlib.use("Agg")
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+    import csv_grapher
+
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "live.csv")
+        with open(filename, "w") as file:
+            file.write("x-axis,1,2\nsecond,Volt,Volt\n0.0,0.0,0.0\n")
+        capture = csv_grapher.load_capture(filename, True)
+        graph = csv_grapher.Graph(1, capture, [capture.title])
+        graph.follow(filename, True)
+        graph.fig.canvas.draw()
+        print(f"watching with {'inotify' if graph.tail.watcher.fd is not None else 'polling'}")
+
+        written = multiprocessing.Value("q", 0)
+        lines = formatRows(int(args.rate * args.seconds), args.frequency)
+        writer = multiprocessing.Process(target=writeRows, args=(filename, lines, args.rate, written))
+        writer.start()
+        steps, slow = [], 0
+        period = 1 / args.fps
+        nextStep = time.perf_counter()
+        while writer.is_alive():
+            start = time.perf_counter()
+            graph.followStep()
+            steps.append(time.perf_counter() - start)
+            slow += steps[-1] > period
+            nextStep += period
+            time.sleep(max(nextStep - time.perf_counter(), 0))
+        writer.join()
+        graph.followStep()  #picks up the rows of the last blocks
+        graph.stopFollowing()
+
+        rows = graph.buffer.length - 1
+        steps.sort()
+        print(f"{rows} of {written.value} rows followed ({args.rate} rows/s for {args.seconds:g} s)")
+        print(f"  {len(steps)} steps  median {steps[len(steps) // 2] * 1e3:.1f} ms  "
+              f"p95 {steps[int(len(steps) * 0.95)] * 1e3:.1f} ms  max {steps[-1] * 1e3:.1f} ms  "
+              f"over {period * 1e3:.0f} ms: {slow}")
+        if rows != written.value:
+            raise SystemExit("rows were lost or duplicated")
+
+
+if __name__ == "__main__":
+    main()
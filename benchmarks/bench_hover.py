@@ -0,0 +1,105 @@
+"""Microbenchmark of the hover callback. Replays mouse motion events over a figure with several long
+traces and reports the time per event of the sorted-x lookup in sample_lookup.py, and of the old
+Line2D.contains() hit-testing for comparison.
+
+Motion events are read from a JSON list of [x, y] pixel positions (--events) or, by default,
+generated by sweeping the mouse along the first trace.
+
+Usage: python benchmarks/bench_hover.py --traces 8 --points 5000000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backend_bases import MouseEvent
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from downsample import DecimatedLine
+from sample_lookup import AnnotationBlitter, SampleIndex, hoverLines
+
+
+def buildFigure(traces, points, interval):
+    """Plots decimated traces and their sample indexes the way Graph does"""
+    fig = plt.figure(figsize=(12, 7))
+    ax = fig.gca()
+    x = np.linspace(0, 1e-3, points)
+    lines, indexes, annots = [], [], []
+    for i in range(traces):
+        y = np.sin(2 * np.pi * (i + 1) * 1e3 * x) + i
+        line = DecimatedLine(ax, x, y, pickradius=2, marker="o", markersize=2).line
+        lines.append(line)
+        indexes.append(SampleIndex(line, x, y))
+        annot = ax.annotate("", xy=(0, 0), xytext=(-20, 20), textcoords="offset points",
+                            bbox=dict(boxstyle="round", fc="w"), arrowprops=dict(arrowstyle="->"))
+        annot.set_visible(False)
+        annots.append(annot)
+    blitter = AnnotationBlitter(fig, annots, interval=interval)
+    fig.canvas.draw()
+    return fig, lines, indexes, annots, blitter
+
+
+def sweepEvents(fig, index, count):
+    """Pixel positions along the first trace, like a user tracing the waveform with the mouse"""
+    ax = fig.axes[0]
+    xs = np.linspace(index.x[0], index.x[-1], count)
+    ys = np.interp(xs, index.x, index.y)
+    return ax.transData.transform(np.column_stack([xs, ys])).tolist()
+
+
+def updateAnnot(annot, x, y):
+    annot.xy = (x, y)
+    annot.set_text(f"{x:.4f},{y:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--traces", type=int, default=8)
+    parser.add_argument("--points", type=int, default=5_000_000)
+    parser.add_argument("--count", type=int, default=500, help="number of generated motion events")
+    parser.add_argument("--events", help="JSON file of recorded [x, y] pixel positions to replay")
+    parser.add_argument("--interval", type=float, default=1/60, help="blit throttle in seconds (0 blits on every event)")
+    parser.add_argument("--legacy-count", type=int, default=5, help="events replayed through Line2D.contains()")
+    args = parser.parse_args()
+
+    fig, lines, indexes, annots, blitter = buildFigure(args.traces, args.points, args.interval)
+    if args.events:
+        with open(args.events) as file:
+            positions = json.load(file)
+    else:
+        positions = sweepEvents(fig, indexes[0], args.count)
+    events = [MouseEvent("motion_notify_event", fig.canvas, x, y) for x, y in positions]
+
+    lookups, callbacks = [], []
+    for event in events:
+        start = time.perf_counter()
+        for index in indexes:
+            index.lookup(event)
+        lookups.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        hoverLines(event, indexes, annots, blitter, updateAnnot)
+        callbacks.append(time.perf_counter() - start)
+    for name, times in (("sorted-x lookup", lookups), ("hover callback", callbacks)):
+        times = np.array(times) * 1e3
+        print(f"{name}: {len(events)} events, mean {times.mean():.3f} ms, p99 {np.percentile(times, 99):.3f} ms, max {times.max():.3f} ms")
+
+    # the old hover hit-tested the full resolution line, which is what Line2D.contains() scans
+    fullLines = [plt.Line2D(index.x, index.y, pickradius=2) for index in indexes]
+    for line in fullLines:
+        fig.axes[0].add_line(line)
+    start = time.perf_counter()
+    for event in events[:args.legacy_count]:
+        for line in fullLines:
+            line.contains(event)
+    legacy = (time.perf_counter() - start) / args.legacy_count * 1e3
+    print(f"Line2D.contains: {args.legacy_count} events, mean {legacy:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
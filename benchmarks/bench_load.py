@@ -0,0 +1,104 @@
+"""Benchmark of CSV loading: the old two pass openCSV (open() for the header, then pd.read_csv on the path)
+against the single pass typed loader in csv_loader.py, and a repeat open served by the cache in csv_cache.py.
+Every measurement runs in a fresh interpreter so peak RSS is not shared between runs.
+
+Usage: python benchmarks/bench_load.py --rows 2000000
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def scaleCSV(source, rows, destination):
+    """Writes a copy of a sample CSV with its data rows repeated until it has the given number of rows.
+    The x column keeps counting up across the repeats, like one long capture.
+
+    Args:
+        source (str): sample CSV with a field row and a units row
+        rows (int): number of data rows in the copy
+        destination (str): file path of the copy
+    """
+    with open(source, "r") as file:
+        header = [file.readline(), file.readline()]
+        body = [line.rstrip("\n").split(",", 1) for line in file]
+    xs = [float(x) for x, rest in body]
+    step = (xs[-1] - xs[0]) / (len(xs) - 1)
+    period = xs[-1] - xs[0] + step
+    with open(destination, "w") as file:
+        file.writelines(header)
+        for repeat in range(-(-rows // len(body))):
+            count = min(len(body), rows - repeat * len(body))
+            offset = repeat * period
+            file.write("".join(f"{x + offset:.9E},{rest}\n" for x, (_, rest) in zip(xs[:count], body[:count])))
+
+
+def legacyLoad(filename):
+    """The loading done by openCSV before the single pass loader, kept here for comparison"""
+    import pandas as pd
+
+    with open(filename, "r") as file:
+        fields = file.readline().split(",")
+        units = [i.strip() for i in file.readline().split(",")]
+    return fields, units, pd.read_csv(filename, skiprows=[1])
+
+
+def measure(mode, filename):
+    """Loads a file once in this process and prints the wall time and peak RSS"""
+    import numpy as np
+    from csv_loader import loadCSV
+
+    if mode == "cached":    #the cache is filled first, only the repeat open is timed
+        from csv_cache import CSVCache
+        cache = CSVCache(os.path.join(os.path.dirname(filename), "cache"))
+        cache.load(filename, True, "benchmark")
+    
+    start = time.perf_counter()
+    match mode:
+        case "legacy":
+            legacyLoad(filename)
+        case "float64":
+            loadCSV(filename, True)
+        case "float32":
+            loadCSV(filename, True, dtype=np.float32)
+        case "c-engine":
+            loadCSV(filename, True, engine="c")
+        case "cached":
+            cache.load(filename, True, "benchmark")
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024    #kB on linux
+    print(f"{elapsed:.3f} {peak:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000, help="data rows in each scaled copy")
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        for sample in ("test.csv", "test2.csv"):
+            filename = os.path.join(folder, sample)
+            scaleCSV(os.path.join(ROOT, sample), args.rows, filename)
+            size = os.path.getsize(filename) / 2**20
+            print(f"{sample} x {args.rows} rows ({size:.0f} MB)")
+            for mode in ("legacy", "c-engine", "float64", "float32", "cached"):
+                result = subprocess.run([sys.executable, __file__, "--measure", mode, filename],
+                                        capture_output=True, text=True, check=True)
+                elapsed, peak = result.stdout.split()
+                print(f"  {mode:<9} {elapsed:>8} s {peak:>9} MB peak RSS")
+
+
+if __name__ == "__main__":
+    main()
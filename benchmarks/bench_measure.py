@@ -0,0 +1,48 @@
+"""Times measuring a whole capture and a zoomed-in part of it with measure.py.
+tests/test_measure.py checks the measurements against synthetic waveforms whose true values are known.
+
+Usage: python benchmarks/bench_measure.py --points 10000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from measure import measureTrace
+
+
+def square(x, frequency, duty, rise, noise=0.0):
+    """Square wave between -1 and 1 with straight edges lasting `rise` (so 10% to 90% takes 0.8 * rise) and optional noise"""
+    period = 1 / frequency
+    y = np.interp((x * frequency) % 1 * period, [0, rise, duty * period, duty * period + rise, period], [-1, 1, 1, -1, -1])
+    return y + np.random.default_rng(0).normal(0, noise, len(x)) if noise else y
+
+
+def timeMeasure(x, y, xlim=None, repeat=5):
+    """Best time of measuring the trace, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        measureTrace(x, y, xlim)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=10_000_000)
+    args = parser.parse_args()
+    
+    x = np.arange(args.points) * 1e-7
+    y = square(x, 1000.0, 0.3, 20e-6, noise=0.05)
+    for label, xlim in (("whole capture", None), ("visible 10%", (x[len(x) // 2], x[len(x) // 2 + len(x) // 10]))):
+        elapsed = timeMeasure(x, y, xlim)
+        print(f"noisy square, {args.points} samples, {label:<13} {elapsed * 1e3:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
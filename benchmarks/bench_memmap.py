@@ -0,0 +1,60 @@
+"""Measures peak RSS while a Graph is built and drawn from a large capture, loaded normally and memory-mapped.
+The capture is converted into the cache once first, in its own process, so only the later open is measured.
+
+Usage: python benchmarks/bench_memmap.py --rows 40000000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from suite import peakRSS
+
+
+def measure(mode, filename):
+    """Opens the capture and builds and draws its Graph in this process, then prints the time and peak RSS"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import csv_grapher
+
+    start = time.perf_counter()
+    baseline = peakRSS()
+    capture = csv_grapher.load_capture(filename, True, "memmap" if mode == "memmap" else "memory")
+    graph = csv_grapher.Graph(1, capture, [capture.title])
+    graph.fig.canvas.draw()
+    print(f"{time.perf_counter() - start:.3f} {baseline:.1f} {peakRSS():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=40_000_000)
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    from bench_load import scaleCSV
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "capture.csv")
+        scaleCSV(os.path.join(ROOT, "test2.csv"), args.rows, filename)
+        print(f"test2.csv x {args.rows} rows ({os.path.getsize(filename) / 2**30:.2f} GB)")
+        env = dict(os.environ, CSV_GRAPHER_CACHE=os.path.join(folder, "cache"))
+
+        for mode in ("memmap", "memmap", "loaded"):     #the first memmap run converts the capture into the cache
+            result = subprocess.run([sys.executable, __file__, "--measure", mode, filename],
+                                    capture_output=True, text=True, check=True, env=env)
+            elapsed, baseline, peak = result.stdout.split()
+            print(f"  {mode:<7} {elapsed:>8} s  peak RSS {peak:>8} MB (imports {baseline} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Times overlaying many captures on one graph (Same Graph mode): building the OverlayGraph, the first draw,
+a zoom and hovering, with and without resampling onto a common x grid. For comparison a few of the captures are
+also plotted the old way, as one Graph per capture on the shared figure, and the time is scaled to all of them.
+
+Usage: python benchmarks/bench_overlay.py --captures 500 --points 100000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backend_bases import MouseEvent
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from capture import Capture
+from csv_grapher import Graph, plot
+from suite import peakRSS
+
+
+def makeCaptures(count, points, jitter):
+    """Noisy 1 kHz sines with a random phase. With jitter every capture is triggered at a slightly different time,
+    so each has its own x values, otherwise they all share the same x array like captures of the same scope settings.
+    """
+    rng = np.random.default_rng(0)
+    x = np.arange(points) * 1e-7
+    captures = []
+    for i in range(count):
+        xi = x + rng.uniform(0, 1e-7) if jitter else x
+        y = np.sin(2 * np.pi * 1e3 * xi + rng.uniform(0, 2 * np.pi)) + rng.normal(0, 0.02, points)
+        captures.append(Capture(f"capture {i}", ["x-axis", "1"], ["second", "Volt"], {"x-axis": xi, "1": y}))
+    return captures
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def timeOverlay(graph, hovers=200):
+    """Seconds to draw and zoom an OverlayGraph, and per motion event to hover it"""
+    _, draw = timed(graph.fig.canvas.draw)
+
+    ax = graph.ax
+    left, right = ax.get_xlim()
+    _, zoom = timed(lambda: (ax.set_xlim(left + (right - left) * 0.4, left + (right - left) * 0.5), graph.fig.canvas.draw()))
+
+    # motion events along the first trace, through the figure's own callbacks
+    index = graph.indexes[0]
+    xs = np.linspace(*ax.get_xlim(), hovers)
+    pixels = ax.transData.transform(np.column_stack([xs, np.interp(xs, index.x, index.y)]))
+    events = [MouseEvent("motion_notify_event", graph.fig.canvas, px, py) for px, py in pixels]
+    start = time.perf_counter()
+    for event in events:
+        graph.fig.canvas.callbacks.process("motion_notify_event", event)
+    hover = (time.perf_counter() - start) / hovers
+    plt.close(graph.fig)
+    return draw, zoom, hover
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--captures", type=int, default=500)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--legacy-captures", type=int, default=20, help="captures plotted as one Graph each, scaled to --captures")
+    args = parser.parse_args()
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+
+    for jitter, grid in ((False, False), (True, False), (True, True)):
+        captures = makeCaptures(args.captures, args.points, jitter)
+        graphs, build = timed(lambda: plot(captures, "same", grid=grid))
+        draw, zoom, hover = timeOverlay(graphs[0])
+        label = ("own x values" if jitter else "shared x values") + (", common grid" if grid else "")
+        print(f"{args.captures} x {args.points} points, {label:<27} build {build:6.2f} s, draw {draw:5.2f} s, "
+              f"zoom {zoom:5.2f} s, hover {hover * 1e3:5.2f} ms/event, peak RSS {peakRSS():.0f} MB")
+        del captures, graphs
+
+    captures = makeCaptures(args.legacy_captures, args.points, False)
+    titles = []
+    def legacy():
+        for capture in captures:
+            titles.append(capture.title)
+            Graph("legacy", capture, titles, True)
+        plt.figure("legacy").canvas.draw()
+    _, elapsed = timed(legacy)
+    print(f"one Graph per capture: {elapsed:.2f} s for {args.legacy_captures} captures, "
+          f"about {elapsed * args.captures / args.legacy_captures:.1f} s for {args.captures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark of headless rendering throughput against the number of worker processes.
+Renders a folder of scaled-up copies of test2.csv with csv_grapher.render and reports files per second.
+
+Usage: python benchmarks/bench_render.py --files 200 --rows 50000 --workers 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_load import scaleCSV
+import csv_grapher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--mode", choices=("separate", "subplot"), default="separate")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, 8, os.cpu_count()}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, "source.csv")
+        scaleCSV(os.path.join(ROOT, "test2.csv"), args.rows, source)
+        captures = os.path.join(folder, "captures")
+        os.makedirs(captures)
+        for i in range(args.files):
+            shutil.copy(source, os.path.join(captures, f"capture{i:05}.csv"))
+
+        print(f"{args.files} files x {args.rows} rows, {args.mode} mode, {os.cpu_count()} CPUs")
+        baseline = None
+        for workers in args.workers:
+            out = os.path.join(folder, f"out{workers}")
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                saved, errors = csv_grapher.render(captures, args.mode, 4, out, workers=workers)
+            elapsed = time.perf_counter() - start
+            throughput = args.files / elapsed
+            baseline = baseline or throughput
+            print(f"  {workers:>3} workers  {elapsed:7.2f} s  {throughput:7.1f} files/s  x{throughput / baseline:.2f}  ({len(errors)} errors)")
+
+
+if __name__ == "__main__":
+    main()
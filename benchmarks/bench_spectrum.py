@@ -0,0 +1,59 @@
+"""Times the Welch spectrum of spectrum.py on a large memory-mapped capture and reports the peak RSS it took.
+The capture is written straight to raw column files, the same layout the CSV cache memory-maps, so no CSV has to be
+parsed first. tests/test_spectrum.py checks the spectrum against a tone in white noise of known power.
+
+Usage: python benchmarks/bench_spectrum.py --samples 50000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from capture import Capture
+from spectrum import capture_spectrum
+from suite import peakRSS
+
+
+def writeCapture(folder, samples, dtype, rate=100e6, block=2**22):
+    """Writes x and y columns of a noisy 1 MHz square wave as raw files and memory-maps them into a Capture"""
+    rng = np.random.default_rng(1)
+    paths = [os.path.join(folder, f"{i}.bin") for i in ("x", "y")]
+    with open(paths[0], "wb") as xFile, open(paths[1], "wb") as yFile:
+        for start in range(0, samples, block):
+            x = np.arange(start, min(start + block, samples)) / rate
+            x.astype(dtype).tofile(xFile)
+            (np.sign(np.sin(2 * np.pi * 1e6 * x)) + rng.normal(0, 0.05, len(x))).astype(dtype).tofile(yFile)
+    columns = {field: np.memmap(path, dtype=dtype, mode="r") for field, path in zip(("x-axis", "1"), paths)}
+    return Capture("synthetic", ["x-axis", "1"], ["second", "Volt"], columns, filename=folder)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=50_000_000)
+    parser.add_argument("--dtype", choices=("float32", "float64"), default="float64")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as folder:
+        capture = writeCapture(folder, args.samples, args.dtype)
+        baseline = peakRSS()
+        start = time.perf_counter()
+        frequencies, psd = capture_spectrum(capture, "1")
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        capture_spectrum(capture, "1")
+        cached = time.perf_counter() - start
+        size = args.samples * np.dtype(args.dtype).itemsize / 2**20
+        print(f"{args.samples} {args.dtype} samples ({size:.0f} MB per column), memory-mapped: {elapsed:.2f} s, "
+              f"again from the capture {cached * 1e3:.2f} ms, peak RSS {peakRSS():.0f} MB (before {baseline:.0f} MB)")
+        print(f"  strongest component {frequencies[psd[1:].argmax() + 1] / 1e6:.3f} MHz")
+        del capture, frequencies, psd   #the memory maps must be closed before the folder is removed
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Times the startup of csv_grapher in fresh interpreters, for the working tree and for an earlier git revision:
+    import        python started until `import csv_grapher` is done
+    ready         until pandas and matplotlib.pyplot are imported as well, i.e. a first plot no longer waits on imports
+    first window  until the GUI window is open and waiting for events, the same as `python csv_grapher.py`
+                  (needs PySimpleGUI and a display, skipped otherwise)
+Every measurement is the median of --repeat runs, after one run that is not counted (it compiles the .pyc files).
+
+Usage: python benchmarks/bench_startup.py --before <revision before the lazy imports>
+"""
+
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# run by the child interpreter, which prints time.time() once it gets there
+children = {
+    "import": "import csv_grapher",
+    "ready": "import csv_grapher; csv_grapher.pd.DataFrame; csv_grapher.plt.figure",
+    "first window": ("import PySimpleGUI as sg\n"
+                     "def read(self, *args, **kwargs):\n"
+                     "    print(time.time(), flush=True)\n"
+                     "    os._exit(0)\n"
+                     "sg.Window.read = read\n"
+                     "sys.argv = ['csv_grapher.py']\n"
+                     "import runpy; runpy.run_path('csv_grapher.py', run_name='__main__')"),
+}
+
+
+def exportTree(revision, folder):
+    """Writes the files of a git revision to a folder"""
+    archive = subprocess.run(["git", "-C", ROOT, "archive", "--format=tar", revision], capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(folder)
+
+
+def launch(tree, measurement):
+    """Seconds from starting a python process in a tree until it reaches the end of a measurement, None if it failed"""
+    code = f"import os, sys, time\nsys.path.insert(0, os.getcwd())\n{children[measurement]}\nprint(time.time(), flush=True)"
+    environ = dict(os.environ, MPLBACKEND="Agg") if measurement != "first window" else dict(os.environ)
+    start = time.time()
+    output = subprocess.run([sys.executable, "-c", code], cwd=tree, env=environ, capture_output=True, text=True, timeout=120)
+    lines = output.stdout.split()
+    return float(lines[-1]) - start if output.returncode == 0 and lines else None
+
+
+def measure(tree, measurement, repeat):
+    if launch(tree, measurement) is None:
+        return None
+    return statistics.median(launch(tree, measurement) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--before", help="git revision to compare the working tree with")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as folder:
+        trees = [("working tree", ROOT)]
+        if args.before:
+            exportTree(args.before, folder)
+            trees.insert(0, (args.before, folder))
+        for measurement in children:
+            results = [(name, measure(tree, measurement, args.repeat)) for name, tree in trees]
+            print(f"{measurement:<13} " + "   ".join(f"{name}: " + (f"{seconds:.3f} s" if seconds is not None else "n/a")
+                                                   for name, seconds in results))
+
+
+if __name__ == "__main__":
+    main()
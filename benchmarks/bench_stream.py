@@ -0,0 +1,58 @@
+"""Measures the time and peak RSS of streaming a large capture with csv_stream.py against loading it.
+tests/test_csv_stream.py checks that the streamed envelope and statistics match the ones of the whole table.
+
+Usage: python benchmarks/bench_stream.py --rows 20000000 --chunk-rows 1000000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from suite import peakRSS
+
+
+def measure(mode, filename, chunkRows):
+    """Reads the capture once in this process and prints the wall time and peak RSS"""
+    from csv_loader import loadCSV
+    from csv_stream import streamCSV
+
+    start = time.perf_counter()
+    if mode == "stream":
+        streamCSV(filename, True, chunkRows=int(chunkRows))
+    else:
+        loadCSV(filename, True)
+    print(f"{time.perf_counter() - start:.3f} {peakRSS():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--measure", nargs=3, metavar=("MODE", "FILE", "CHUNK"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    from bench_load import scaleCSV
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "capture.csv")
+        scaleCSV(os.path.join(ROOT, "test2.csv"), args.rows, filename)
+        print(f"test2.csv x {args.rows} rows ({os.path.getsize(filename) / 2**30:.2f} GB)")
+        for mode in ("stream", "loaded"):
+            result = subprocess.run([sys.executable, __file__, "--measure", mode, filename, str(args.chunk_rows)],
+                                    capture_output=True, text=True, check=True)
+            elapsed, peak = result.stdout.split()
+            print(f"  {mode:<7} {elapsed:>8} s  peak RSS {peak:>8} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Times loading many captures at once from a thread pool against loading them one after another, in every load mode.
+Each file is loaded by several threads at the same time, first with an empty cache and then with a full one.
+tests/test_capture.py checks that the captures loaded from several threads are the same as a serial load.
+
+Usage: python benchmarks/bench_threads.py --files 24 --rows 200000 --threads 16
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=24)
+    parser.add_argument("--rows", type=int, default=200_000, help="rows of the larger files, every other file is a copy of test.csv")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=4, help="threads loading each file at the same time")
+    args = parser.parse_args()
+
+    from bench_load import scaleCSV
+
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["CSV_GRAPHER_CACHE"] = os.path.join(folder, "cache")
+        os.environ.pop("CSV_GRAPHER_NO_CACHE", None)
+        from capture import cache, load_capture
+
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(folder, f"capture{i}.csv")
+            if i % 2:
+                scaleCSV(os.path.join(ROOT, "test2.csv"), args.rows + i, path)
+            else:
+                with open(os.path.join(ROOT, "test.csv"), "rb") as source, open(path, "wb") as file:
+                    file.write(source.read())
+            paths.append(path)
+
+        for mode in ("memory", "memmap", "stream"):
+            cache.clear()
+            cache.enabled = mode != "memory"    #the serial loads are read from the CSV files themselves
+            start = time.perf_counter()
+            for path in paths:
+                load_capture(path, True, mode)
+            serial = time.perf_counter() - start
+            cache.enabled = True
+            cache.clear()
+            
+            for state in ("cold", "warm"):
+                jobs = paths * args.repeats
+                random.shuffle(jobs)
+                start = time.perf_counter()
+                with ThreadPoolExecutor(args.threads) as executor:
+                    list(executor.map(lambda path: load_capture(path, True, mode), jobs))
+                elapsed = time.perf_counter() - start
+                print(f"{mode:<6} {state}: {len(jobs)} loads on {args.threads} threads in {elapsed:.2f} s "
+                      f"(serial {len(paths)} loads {serial:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Times a Graph of a power capture whose traces are in several units (two voltages, a current and a power),
+each unit on its own y axis: plotting, the first draw, a zoom and hovering a trace on a twin axis underneath the top one.
+tests/test_csv_grapher.py checks that every unit gets its own axis, fitted to its traces.
+
+Usage: python benchmarks/bench_units.py --points 10000000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backend_bases import MouseEvent
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from capture import Capture
+from csv_grapher import Graph
+
+
+def powerCapture(points):
+    x = np.arange(points) * 1e-7
+    rng = np.random.default_rng(0)
+    voltage = 230 * np.sin(2 * np.pi * 50 * x) + rng.normal(0, 1, points)
+    current = 2 * np.sin(2 * np.pi * 50 * x + 0.3) + rng.normal(0, 0.01, points)
+    columns = {"x-axis": x, "1": voltage, "2": current, "3": voltage * current, "4": 5 + 0.01 * voltage}
+    return Capture("power", list(columns), ["second", "Volt", "Ampere", "Watt", "Volt"], columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=10_000_000)
+    parser.add_argument("--hovers", type=int, default=200)
+    args = parser.parse_args()
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+
+    capture = powerCapture(args.points)
+    start = time.perf_counter()
+    graph = Graph(1, capture, [capture.title])
+    plotted = time.perf_counter() - start
+    start = time.perf_counter()
+    graph.fig.canvas.draw()
+    drawn = time.perf_counter() - start
+
+    ax = graph.axes[0][0]
+    left, right = ax.get_xlim()
+    start = time.perf_counter()
+    ax.set_xlim(left + (right - left) * 0.4, left + (right - left) * 0.41)
+    graph.fig.canvas.draw()
+    zoomed = time.perf_counter() - start
+
+    # the current trace is on a twin axes under the top one, which receives the events
+    index = graph.indexes[1]
+    twin = index.line.axes
+    pixels = np.linspace(ax.bbox.x0 + 1, ax.bbox.x1 - 1, args.hovers).astype(int)
+    xs = twin.transData.inverted().transform(np.column_stack([pixels, np.zeros(len(pixels))]))[:, 0]
+    points = twin.transData.transform(np.column_stack([xs, np.interp(xs, index.x, index.y)]))
+    events = [MouseEvent("motion_notify_event", graph.fig.canvas, px, py) for px, py in points]
+    start = time.perf_counter()
+    found = 0
+    for event in events:
+        graph.fig.canvas.callbacks.process("motion_notify_event", event)
+        found += graph.annots[1].get_visible()
+    hovered = (time.perf_counter() - start) / args.hovers
+    plt.close(graph.fig)
+
+    print(f"4 traces x {args.points} points on 3 unit axes: plot {plotted:.2f} s, draw {drawn:.2f} s, zoom {zoomed:.2f} s, "
+          f"hover {hovered * 1e3:.2f} ms/event, current trace found on {found} of {args.hovers} events")
+
+
+if __name__ == "__main__":
+    main()
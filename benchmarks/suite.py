@@ -0,0 +1,252 @@
+"""Benchmark suite of the whole pipeline on reproducible synthetic scope captures.
+Generates CSVs with the field and units rows of the sample captures (x-axis, 1, 2 / second, Volt, Volt) at any number
+of rows, then times parsing with load_capture, building a Graph and a SubplotGraph, rendering a graph to PNG with Agg and
+replaying hover events over it. Every case runs in a fresh interpreter with the CSV cache off, so each records the wall
+time and peak RSS of that case alone. Results are written as JSON, and two result files can be compared to flag regressions.
+
+Usage:
+    python benchmarks/suite.py run --rows 1e4 1e5 1e6 --out before.json
+    python benchmarks/suite.py run --rows 1e4 1e5 1e6 --out after.json
+    python benchmarks/suite.py compare before.json after.json --threshold 0.2
+
+Generated captures are kept in --data (a folder in the temp directory by default) and reused by later runs,
+since writing 1e8 rows takes a few minutes.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+cases = ["load", "Graph", "SubplotGraph", "render", "hover"]
+generateChunk = 10**6   #rows generated and written at a time
+sampleInterval = 1e-8   #100 MS/s
+adcLevels = 256     #scopes digitize to 8 bits, so every y value is one of 256 levels
+
+
+def peakRSS():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024    #kB on linux
+
+
+def captureName(rows, seed):
+    return f"scope_{rows}_rows_seed{seed}.csv"
+
+
+def generateCapture(filename, rows, seed=0):
+    """Writes a scope style CSV: a 20 period square wave with a slow edge on channel 1 and a sine on channel 2,
+    both with noise and digitized to adcLevels levels. The same rows and seed always give the same file.
+
+    Args:
+        filename (str): file path of the CSV
+        rows (int): number of data rows
+        seed (int, optional): seed of the noise
+    """
+    levels = (np.arange(adcLevels) - adcLevels // 2) * (10 / adcLevels)     #±5 V full scale
+    table = np.array([f"{level:+.11E}" for level in levels], dtype=object)   #formatted once, every row picks from them
+    digits = max(5, math.ceil(math.log10(max(rows, 2))) + 1)     #enough digits for every x value to be distinct
+    frequency = 20 / (rows * sampleInterval)
+
+    with open(filename + ".part", "w") as file:
+        file.write("x-axis,1,2\nsecond,Volt,Volt\n")
+        for start in range(0, rows, generateChunk):
+            rng = np.random.default_rng([seed, start])  #every chunk has its own stream, so the file does not depend on the chunk size
+            i = np.arange(start, min(start + generateChunk, rows))
+            x = (i - rows // 10) * sampleInterval   #the trigger is a tenth of the way in, like a scope capture
+            phase = (x * frequency) % 1
+            square = np.interp(phase, [0, 0.02, 0.5, 0.52, 1], [-2, 2, 2, -2, -2]) + rng.normal(0, 0.05, len(i))
+            sine = 3 * np.sin(2 * np.pi * frequency * x) + rng.normal(0, 0.05, len(i))
+            codes = [np.clip(np.round(y / 10 * adcLevels) + adcLevels // 2, 0, adcLevels - 1).astype(int) for y in (square, sine)]
+            file.write("".join([f"{value:+.{digits}E},{one},{two}\n" for value, one, two in zip(x.tolist(), table[codes[0]].tolist(), table[codes[1]].tolist())]))
+    os.replace(filename + ".part", filename)   #an interrupted run leaves no half written capture behind
+
+
+def capturePath(folder, rows, seed=0):
+    """File path of a generated capture, generating it if it is not there yet"""
+    filename = os.path.join(folder, captureName(rows, seed))
+    if not os.path.exists(filename):
+        os.makedirs(folder, exist_ok=True)
+        start = time.perf_counter()
+        generateCapture(filename, rows, seed)
+        print(f"generated {rows} rows in {time.perf_counter() - start:.1f} s ({os.path.getsize(filename) / 2**20:.0f} MB)", file=sys.stderr)
+    return filename
+
+
+def hoverEvents(graph, count):
+    """Motion events along the first trace of a graph, like a user tracing the waveform with the mouse"""
+    from matplotlib.backend_bases import MouseEvent
+
+    index = graph.indexes[0]
+    ax = index.line.axes
+    pixels = np.linspace(ax.bbox.x0 + 1, ax.bbox.x1 - 1, count).astype(int)
+    xs = ax.transData.inverted().transform(np.column_stack([pixels, np.zeros(count)]))[:, 0]
+    points = ax.transData.transform(np.column_stack([xs, np.interp(xs, index.x, index.y)]))
+    return [MouseEvent("motion_notify_event", graph.fig.canvas, x, y) for x, y in points]
+
+
+def runCase(case, filename, hovers=200):
+    """Runs one case in this process and returns its measurements. Only the step named by the case is timed,
+    the loading and plotting it needs first are not.
+
+    Returns:
+        dict: seconds of the timed step, and the peak RSS of the process in MB
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import logging
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+    import matplotlib.pyplot
+    import pandas   #csv_grapher imports these on first use, imported here so no case times the imports
+    from csv_grapher import Graph, SubplotGraph, load_capture
+
+    result = {}
+    if case != "load":
+        capture = load_capture(filename, True)
+    start = time.perf_counter()
+    match case:
+        case "load":
+            load_capture(filename, True)
+        case "Graph":
+            Graph(1, capture, [capture.title])
+        case "SubplotGraph":
+            SubplotGraph([capture, capture], 1, 2)
+        case "render":
+            graph = Graph(1, capture, [capture.title])
+            start = time.perf_counter()
+            graph.fig.savefig(os.path.join(tempfile.gettempdir(), f"suite_render_{os.getpid()}.png"))
+            os.remove(os.path.join(tempfile.gettempdir(), f"suite_render_{os.getpid()}.png"))
+        case "hover":
+            graph = Graph(1, capture, [capture.title])
+            graph.fig.canvas.draw()
+            events = hoverEvents(graph, hovers)
+            start = time.perf_counter()
+            for event in events:
+                graph.fig.canvas.callbacks.process("motion_notify_event", event)
+            result["events"] = hovers
+        case _:
+            raise ValueError(f"unknown case {case!r}")
+    result["seconds"] = time.perf_counter() - start
+    result["peak_rss_mb"] = peakRSS()
+    return result
+
+
+def environment():
+    """Versions and machine the results were measured on, so runs from different setups are not mistaken for regressions"""
+    import matplotlib
+    import pandas as pd
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"date": datetime.datetime.now().isoformat(timespec="seconds"), "commit": commit, "python": platform.python_version(),
+            "numpy": np.__version__, "pandas": pd.__version__, "matplotlib": matplotlib.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def run(args):
+    environ = dict(os.environ, CSV_GRAPHER_NO_CACHE="1")     #every case parses the CSV, nothing is served from the cache
+    results = []
+    for rows in args.rows:
+        filename = capturePath(args.data, rows, args.seed)
+        for case in args.cases:
+            runs = []
+            for _ in range(args.repeat):
+                output = subprocess.run([sys.executable, __file__, "case", case, filename, "--hovers", str(args.hovers)],
+                                        env=environ, capture_output=True, text=True)
+                if output.returncode != 0:  #e.g. out of memory at the largest sizes, recorded instead of stopping the suite
+                    runs = [{"error": output.stderr.strip().splitlines()[-1] if output.stderr.strip() else f"exit code {output.returncode}"}]
+                    break
+                runs.append(json.loads(output.stdout.splitlines()[-1]))
+            best = min(runs, key=lambda measured: measured.get("seconds", math.inf))  #the least disturbed run
+            results.append({"case": case, "rows": rows, **best})
+            print(f"{case:<13} {rows:>11} rows  " + (f"{best['seconds']:9.3f} s  {best['peak_rss_mb']:8.0f} MB peak RSS"
+                                                    if "error" not in best else f"failed: {best['error']}"))
+
+    report = {"environment": environment(), "results": results}
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"results written to {args.out}")
+
+
+def compare(args):
+    """Prints the change of every case between two result files and returns 1 if any case regressed"""
+    with open(args.before) as file:
+        before = json.load(file)
+    with open(args.after) as file:
+        after = json.load(file)
+    previous = {(result["case"], result["rows"]): result for result in before["results"]}
+
+    regressions = 0
+    for result in after["results"]:
+        old = previous.get((result["case"], result["rows"]))
+        if old is None or "error" in old or "error" in result:
+            continue
+        flags = []
+        for key, unit, floor in (("seconds", "s", args.min_seconds), ("peak_rss_mb", "MB", args.min_mb)):
+            change = result[key] / old[key] - 1 if old[key] else 0
+            # small absolute differences are noise, however large they are relatively
+            if change > args.threshold and result[key] - old[key] > floor:
+                flags.append(f"{key} +{change:.0%}")
+        regressions += bool(flags)
+        print(f"{result['case']:<13} {result['rows']:>11} rows  {old['seconds']:9.3f} -> {result['seconds']:9.3f} s  "
+              f"{old['peak_rss_mb']:7.0f} -> {result['peak_rss_mb']:7.0f} MB  " + ("REGRESSION " + ", ".join(flags) if flags else "ok"))
+
+    for name, report in (("before", before), ("after", after)):
+        environment = report["environment"]
+        print(f"{name}: {environment['date']} commit {environment['commit'] or '?'}, numpy {environment['numpy']}, "
+              f"matplotlib {environment['matplotlib']}, {environment['cpus']} CPUs")
+    print(f"{regressions} regressions (over {args.threshold:.0%} slower or larger)")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runParser = commands.add_parser("run", help="generate the captures if needed and time every case")
+    runParser.add_argument("--rows", type=lambda value: int(float(value)), nargs="+", default=[10**4, 10**5, 10**6],
+                           help="data rows of each capture, e.g. 1e4 1e6 1e8")
+    runParser.add_argument("--cases", nargs="+", choices=cases, default=cases)
+    runParser.add_argument("--repeat", type=int, default=3, help="runs of every case, the fastest is kept")
+    runParser.add_argument("--hovers", type=int, default=200, help="motion events replayed by the hover case")
+    runParser.add_argument("--seed", type=int, default=0)
+    runParser.add_argument("--data", default=os.path.join(tempfile.gettempdir(), "csv_grapher_benchmarks"), help="folder of the generated captures")
+    runParser.add_argument("--out", help="JSON file of the results")
+
+    compareParser = commands.add_parser("compare", help="compare two result files and exit with 1 if a case regressed")
+    compareParser.add_argument("before")
+    compareParser.add_argument("after")
+    compareParser.add_argument("--threshold", type=float, default=0.2, help="relative increase that counts as a regression")
+    compareParser.add_argument("--min-seconds", type=float, default=0.05, help="smaller increases in time are ignored")
+    compareParser.add_argument("--min-mb", type=float, default=20, help="smaller increases in peak RSS are ignored")
+
+    caseParser = commands.add_parser("case", help=argparse.SUPPRESS)    #one case in a fresh interpreter, run by "run"
+    caseParser.add_argument("case", choices=cases)
+    caseParser.add_argument("filename")
+    caseParser.add_argument("--hovers", type=int, default=200)
+
+    args = parser.parse_args()
+    match args.command:
+        case "run":
+            run(args)
+        case "compare":
+            sys.exit(compare(args))
+        case "case":
+            print(json.dumps(runCase(args.case, args.filename, args.hovers)))
+
+
+if __name__ == "__main__":
+    main()
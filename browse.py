@@ -0,0 +1,70 @@
+"""Sequential browsing of many captures, one figure at a time.
+While one capture is being viewed the next few are read in the background by a small thread pool,
+and the most recently viewed ones are kept, so moving to the next or previous capture does not wait for
+a slow (e.g. network mounted) disk. The number of captures held in memory is bounded by both.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CaptureBrowser:
+    def __init__(self, filelocations, read, prefetch=3, keep=5):
+        """Browser instance. Only used from one thread, the reading happens on its own threads.
+
+        Args:
+            filelocations (list): file paths of the CSVs in browsing order
+            read (function): reads a file path into a (Capture or None, error or None) tuple, e.g. csv_grapher.readCSV
+            prefetch (int, optional): number of files after the current one that are read ahead
+            keep (int, optional): number of recently viewed captures kept in memory
+        """
+        self.filelocations = filelocations
+        self.read = read
+        self.prefetch = prefetch
+        self.keep = keep
+        self.index = 0  #position of the capture being viewed
+        self.ahead = {}     #futures of the files being read ahead, by position
+        self.recent = OrderedDict()     #futures of the recently viewed files by position, most recent last
+        self.executor = ThreadPoolExecutor(max(prefetch, 1), thread_name_prefix="prefetch")
+    
+    def __len__(self):
+        return len(self.filelocations)
+    
+    def request(self, index):
+        """Moves to a file and starts reading the ones after it
+
+        Args:
+            index (int): position of the file in filelocations
+
+        Returns:
+            Future: resolves to the (Capture or None, error or None) tuple of the file
+        """
+        self.index = index
+        future = self.recent.pop(index, None) or self.ahead.pop(index, None)
+        if future is None:     #neither viewed recently nor read ahead
+            future = self.executor.submit(self.read, self.filelocations[index])
+        self.recent[index] = future
+        while len(self.recent) > self.keep:
+            self.recent.popitem(last=False)
+        
+        wanted = range(index + 1, min(index + 1 + self.prefetch, len(self)))
+        for i in [i for i in self.ahead if i not in wanted]:    #files left behind by a jump are no longer needed
+            self.ahead.pop(i).cancel()
+        for i in wanted:
+            if i not in self.ahead and i not in self.recent:
+                self.ahead[i] = self.executor.submit(self.read, self.filelocations[i])
+        return future
+    
+    def get(self, index):
+        """request that waits for the file to be read
+
+        Returns:
+            tuple: Capture of the file (None on failure) and the reason it could not be read (None on success)
+        """
+        return self.request(index).result()
+    
+    def close(self):
+        """Stops reading ahead. Files already being read are finished in the background."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.ahead.clear()
+        self.recent.clear()
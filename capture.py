@@ -0,0 +1,137 @@
+"""Captures: the columns, units and title of a CSV file, independent of the GUI.
+load_capture has no side effects other than the disk cache, so captures can be loaded from several threads
+or processes at once, and used from scripts and notebooks without opening a window.
+"""
+
+import os
+
+import numpy as np
+
+from csv_cache import CSVCache
+from csv_stream import streamCSV
+from downsample import isSorted
+from timing import span
+from uniform_axis import compactAxis
+
+# parsed CSVs are cached on disk so reopening a capture skips parsing. CSV_GRAPHER_NO_CACHE=1 turns it off (inherited by worker processes)
+cache = CSVCache(os.environ.get("CSV_GRAPHER_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "csv_grapher")),
+                 enabled=os.environ.get("CSV_GRAPHER_NO_CACHE") != "1")
+
+
+class Capture:
+    __slots__ = ("title", "fields", "units", "columns", "hasUnits", "stats", "filename", "spectra", "removedRows")
+    
+    def __init__(self, title, fields, units, columns, hasUnits=True, stats=None, filename=None, removedRows=0):
+        """A loaded CSV file
+
+        Args:
+            title (str): title of the graph, the file name without its extension
+            fields (list): x field followed by the y fields
+            units (list): unit of every field, empty if the CSV has no units row
+            columns (dict): numpy array of the values of every field
+            hasUnits (bool, optional): whether the 2nd row of the CSV contains units
+            stats (dict, optional): min, max, mean and rms of every y field, for streamed captures
+            filename (str, optional): file path the capture was read from
+            removedRows (int, optional): incomplete rows of the CSV that were left out, see csv_loader.cleanRows
+        """
+        self.title = title
+        self.fields = fields
+        self.units = units
+        self.columns = columns
+        self.hasUnits = hasUnits
+        self.stats = stats
+        self.filename = filename
+        self.removedRows = removedRows
+        self.spectra = {}   #power spectral densities already computed, see spectrum.capture_spectrum
+    
+    @property
+    def xField(self):
+        return self.fields[0]
+    
+    @property
+    def yFields(self):
+        return self.fields[1:]
+    
+    @property
+    def yUnits(self):
+        return self.units[1:]
+    
+    @property
+    def x(self):
+        """Returns: np.ndarray, the x values"""
+        return self.columns[self.xField]
+    
+    def __len__(self):
+        return len(self.x)
+    
+    def __repr__(self):
+        return f"Capture({self.title!r}, {self.fields}, {len(self)} rows)"
+
+
+def load_capture(path, has_units=True, load_mode="memory"):
+    """Reads a CSV file into a Capture
+
+    Args:
+        path (str): file path of CSV to be read
+        has_units (bool, optional): whether the 2nd row contains units instead of data
+        load_mode (str, optional): "memory" loads the data into memory. "memmap" converts the CSV once into raw column files
+            and memory-maps them, for captures that are too large to hold several copies of. "stream" reads the CSV a chunk
+            at a time and only keeps a min/max envelope and statistics, for captures larger than memory or disk cache.
+            "compact" loads the data into memory with float32 y columns (scopes print about 8 significant digits),
+            and the x column as a UniformAxis of its start and step when it is evenly spaced, so about half the memory
+
+    Raises:
+        pd.errors.EmptyDataError: if the file is empty
+        ValueError: if no row of the file holds a number. Incomplete or damaged rows are left out (see Capture.removedRows).
+
+    Returns:
+        Capture: the loaded CSV
+    """
+    title = path.replace("\\", "/").split("/")[-1].split(".")[0]
+    
+    stats = None
+    if load_mode == "stream":
+        #the data is the envelope of the capture, the full table is never held in memory
+        with span("stream"):
+            fields, units, data, stats = streamCSV(path, has_units)
+    else:
+        #the header, units row and data are all read from a single pass over the file, or from the cache if it was read before
+        fields, units, data = cache.load(path, has_units, title, np.float32 if load_mode == "compact" else np.float64, load_mode == "memmap")
+    
+    if not len(data) and data.attrs["removedRows"]:     #nothing but text, e.g. a units row read as data
+        raise ValueError(f"no row of {path} holds a number")
+    
+    columns = {field: data[field].to_numpy() for field in data.columns}     #views of memory-mapped columns stay memory-mapped
+    if load_mode == "compact":
+        columns[fields[0]] = compactAxis(columns[fields[0]])    #kept as an array if the samples are not evenly spaced
+    return Capture(title, list(fields), units, columns, has_units, stats, path, data.attrs["removedRows"])
+
+
+def resampleCaptures(captures, points=None):
+    """Resamples the traces of several captures onto one evenly spaced x grid by linear interpolation, e.g. to compare
+    captures taken with different sample rates or trigger positions. Captures that already share the same x values are not
+    interpolated at all, their columns are used as they are.
+
+    Args:
+        captures (list): Capture of every CSV
+        points (int, optional): number of points of the grid. Defaults to the length of the longest capture.
+
+    Returns:
+        tuple: the x grid and the resampled y values of every y field of every capture, in order.
+            Points of the grid outside the x range of a capture are NaN for its traces.
+    """
+    first = captures[0].x
+    if points is None and all(len(capture) == len(first) and np.array_equal(capture.x, first) for capture in captures):
+        return first, [capture.columns[yField] for capture in captures for yField in capture.yFields]
+    
+    starts = [np.nanmin(capture.x) for capture in captures]
+    stops = [np.nanmax(capture.x) for capture in captures]
+    grid = np.linspace(min(starts), max(stops), points or max(len(capture) for capture in captures))
+    traces = []
+    for capture in captures:
+        x = capture.x
+        order = None if isSorted(x) else np.argsort(x, kind="stable")     #np.interp needs increasing x
+        for yField in capture.yFields:
+            y = capture.columns[yField]
+            traces.append(np.interp(grid, x if order is None else x[order], y if order is None else y[order], left=np.nan, right=np.nan))
+    return grid, traces
@@ -0,0 +1,194 @@
+"""On-disk cache of parsed CSV files so captures that are opened again are not re-parsed.
+Every cached CSV is a folder holding one raw binary file per column and a meta.json with its fields, units, title and dtype.
+Raw columns can be memory-mapped, so very large captures can be plotted without ever being loaded into memory.
+Entries are keyed by the file path, modification time, size, units flag and dtype, so an edited file is read again.
+The least recently used entries are removed once the cache grows past its size limit.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from itertools import chain
+
+import numpy as np
+
+from csv_loader import columnTypes, loadCSV, readCSVChunks
+from lazy_import import lazyModule
+from timing import span, timed
+
+pd = lazyModule("pandas")   #imported on first use, see lazy_import
+
+entryFormat = 2     #part of every key, raised whenever what is stored changes so older entries are read again (2: incomplete rows removed)
+
+
+class CSVCache:
+    def __init__(self, folder, maxBytes=2 * 2**30, enabled=True):
+        """Cache instance. Tracks hits and misses for the lifetime of the process. Safe to load from several threads at once:
+        entries are only ever renamed into place whole, and the counters are updated under a lock.
+
+        Args:
+            folder (str): folder the cache is stored in
+            maxBytes (int, optional): size the cache is trimmed to after every new entry
+            enabled (bool, optional): when False every load goes straight to the CSV file, unless it is memory-mapped
+        """
+        self.folder = folder
+        self.maxBytes = maxBytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()    #guards the counters
+    
+    def key(self, filename, hasUnits, dtype):
+        """Cache key of a CSV: changes whenever the file is modified or read differently"""
+        stat = os.stat(filename)
+        identity = f"{os.path.abspath(filename)}|{stat.st_mtime_ns}|{stat.st_size}|{hasUnits}|{np.dtype(dtype).name}|{entryFormat}"
+        return hashlib.sha1(identity.encode()).hexdigest()
+    
+    def load(self, filename, hasUnits, title, dtype=np.float64, memoryMap=False):
+        """Loads a CSV from the cache, or reads it and stores it on a miss
+
+        Args:
+            filename (str): file path of CSV to be read
+            hasUnits (bool): whether the 2nd row contains units instead of data
+            title (str): title of the graph, stored with the cached columns
+            dtype (optional): numpy float type of the loaded columns
+            memoryMap (bool, optional): memory-map the cached columns instead of reading them into memory.
+                On a miss the CSV is converted a chunk at a time, so it never has to fit in memory.
+
+        Returns:
+            tuple: list of fields, list of units and a dataframe of the columns, the same as loadCSV
+        """
+        if not self.enabled and not memoryMap:
+            return loadCSV(filename, hasUnits, dtype=dtype)
+        
+        entry = os.path.join(self.folder, self.key(filename, hasUnits, dtype))
+        cached = self.open(entry, memoryMap)
+        if cached is not None:
+            with self.lock:
+                self.hits += 1
+            return cached
+        
+        with self.lock:
+            self.misses += 1
+        if memoryMap:
+            self.convert(entry, filename, hasUnits, title, dtype)
+            self.evict(keep=entry)
+            return self.open(entry, memoryMap) or loadCSV(filename, hasUnits, dtype=dtype)     #the entry could not be written
+        
+        fields, units, data = loadCSV(filename, hasUnits, dtype=dtype)
+        try:
+            with span("cache"):
+                self.store(entry, fields, units, title, dtype, [data])
+                self.evict(keep=entry)
+        except OSError:     #a full or read-only disk should not stop the file from being plotted
+            pass
+        return fields, units, data
+    
+    @timed("read")
+    def open(self, entry, memoryMap):
+        """Reads a cache entry
+
+        Returns:
+            tuple: fields, units and dataframe of the entry, or None if it is not in the cache
+        """
+        try:
+            with open(os.path.join(entry, "meta.json"), "r") as file:
+                meta = json.load(file)
+            columns = {}
+            for i, column in enumerate(meta["columns"]):
+                path = os.path.join(entry, f"{i}.bin")
+                dtype = meta.get("xDtype", meta["dtype"]) if i == 0 else meta["dtype"]    #entries from before xDtype have a single dtype
+                if memoryMap and meta["rows"]:
+                    columns[column] = np.memmap(path, dtype=dtype, mode="r", shape=(meta["rows"],))
+                else:
+                    columns[column] = np.fromfile(path, dtype=dtype)
+            os.utime(os.path.join(entry, "meta.json"))  #marks the entry as recently used
+        except (OSError, ValueError, KeyError):
+            return None
+        data = pd.DataFrame(columns, copy=False)    #copy=False keeps memory-mapped columns as views
+        data.attrs["removedRows"] = meta["removedRows"]
+        return meta["fields"], meta["units"], data
+    
+    @timed("convert")
+    def convert(self, entry, filename, hasUnits, title, dtype):
+        """Stores a CSV in the cache by streaming it a chunk at a time"""
+        chunks = readCSVChunks(filename, hasUnits, dtype=dtype)
+        fields, units, first = next(chunks)
+        self.store(entry, fields, units, title, dtype, chain([first], (chunk for _, _, chunk in chunks)))
+    
+    def store(self, entry, fields, units, title, dtype, chunks):
+        """Appends the chunks to the column files of a new entry. The entry is written to a temporary folder
+        first so other processes never see a half written entry.
+
+        Args:
+            entry (str): folder of the entry
+            fields (list): fields of the CSV
+            units (list): units of the CSV
+            title (str): title of the graph
+            dtype: numpy float type of the y columns, see columnTypes
+            chunks (iterable): dataframes of consecutive rows of the CSV, with the rows removed from them in attrs["removedRows"]
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        temporary = tempfile.mkdtemp(dir=self.folder, prefix=".tmp")
+        rows = 0
+        removed = 0
+        columns = None
+        try:
+            for chunk in chunks:
+                columns = list(chunk.columns)
+                for i, (column, columnType) in enumerate(columnTypes(columns, dtype).items()):
+                    with open(os.path.join(temporary, f"{i}.bin"), "ab") as file:
+                        chunk[column].to_numpy(dtype=columnType).tofile(file)
+                rows += len(chunk)
+                removed += chunk.attrs["removedRows"]
+            meta = {"fields": fields, "units": units, "title": title, "columns": columns,
+                    "dtype": np.dtype(dtype).name, "xDtype": np.dtype(np.float64).name, "rows": rows, "removedRows": removed}
+            with open(os.path.join(temporary, "meta.json"), "w") as file:
+                json.dump(meta, file)
+            os.rename(temporary, entry)
+        except OSError:     #another process stored the same entry first
+            shutil.rmtree(temporary, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+    
+    def entries(self):
+        """Lists the cache entries as (last used time, size in bytes, path), least recently used first"""
+        entries = []
+        if not os.path.isdir(self.folder):
+            return entries
+        for name in os.listdir(self.folder):
+            entry = os.path.join(self.folder, name)
+            try:
+                lastUsed = os.stat(os.path.join(entry, "meta.json")).st_mtime
+                size = sum(i.stat().st_size for i in os.scandir(entry))
+            except OSError:     #temporary folders and entries being written or removed
+                continue
+            entries.append((lastUsed, size, entry))
+        return sorted(entries)
+    
+    def size(self):
+        """Total size of the cache in bytes"""
+        return sum(size for lastUsed, size, entry in self.entries())
+    
+    def evict(self, keep=None):
+        """Removes the least recently used entries until the cache is within maxBytes
+
+        Args:
+            keep (str, optional): entry that is never removed, e.g. the one that was just stored
+        """
+        entries = self.entries()
+        total = sum(size for lastUsed, size, entry in entries)
+        for lastUsed, size, entry in entries:
+            if total <= self.maxBytes:
+                break
+            if entry != keep:
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+    
+    def clear(self):
+        """Removes every entry from the cache"""
+        shutil.rmtree(self.folder, ignore_errors=True)
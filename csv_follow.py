@@ -0,0 +1,183 @@
+"""Incremental reading of a CSV that is still being written, for the live follow mode of Graph.
+The file is watched with inotify on Linux and by polling its size elsewhere. Only the lines appended since
+the last read are parsed, and they are added to preallocated column buffers that grow by doubling.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import sys
+
+import numpy as np
+
+from csv_loader import parseBlock, readHeader
+from lazy_import import lazyModule
+
+pd = lazyModule("pandas")   #imported on first use, see lazy_import
+
+IN_MODIFY = 0x2     #inotify event for a write to the file
+
+
+class FileWatcher:
+    def __init__(self, filename):
+        """Tells whether a file has been written to since it was last asked, using inotify when available
+
+        Args:
+            filename (str): file to watch
+        """
+        self.filename = filename
+        self.fd = None  #inotify descriptor, None when polling
+        self.size = -1  #size at the last poll, -1 so the first poll reports a change
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+                fd = libc.inotify_init1(os.O_NONBLOCK)
+                if fd >= 0 and libc.inotify_add_watch(fd, os.fsencode(filename), IN_MODIFY) >= 0:
+                    self.fd = fd
+                elif fd >= 0:
+                    os.close(fd)
+            except (OSError, AttributeError):
+                pass    #no inotify, fall back to polling
+        self.changedSinceStart = True   #rows may have been written between loading the file and starting to watch it
+    
+    def changed(self):
+        """Returns: bool, whether the file was written to since the last call"""
+        changed, self.changedSinceStart = self.changedSinceStart, False
+        if self.fd is not None:
+            try:
+                while os.read(self.fd, 4096):  #drain every pending event
+                    changed = True
+            except BlockingIOError:
+                pass
+            return changed
+        
+        size = os.stat(self.filename).st_size
+        changed = changed or size != self.size
+        self.size = size
+        return changed
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class CSVTail:
+    def __init__(self, filename, hasUnits, fields, dtype=np.float64):
+        """Reads the rows appended to a CSV since the last read, remembering the byte offset it stopped at
+
+        Args:
+            filename (str): file path of the CSV
+            hasUnits (bool): whether the 2nd row contains units instead of data
+            fields (list): fields of the CSV, as read by load_capture
+            dtype (optional): numpy float type the rows are parsed as
+        """
+        self.filename = filename
+        self.fields = fields
+        self.dtype = dtype
+        self.behind = False     #more rows were waiting than one read takes
+        with open(filename, "rb") as file:
+            readHeader(file, hasUnits)
+            self.offset = file.tell()   #start of the first line not read yet
+        self.watcher = FileWatcher(filename)
+    
+    def skip(self, rows, blockSize=2**24):
+        """Moves past rows that were already loaded, without parsing them
+
+        Args:
+            rows (int): number of data rows to skip
+            blockSize (int, optional): bytes read at a time
+
+        Returns:
+            int: number of complete rows skipped. Fewer than rows when the last loaded row was still being written,
+                in which case it is read again in full by the next read.
+        """
+        skipped = 0
+        with open(self.filename, "rb") as file:
+            file.seek(self.offset)
+            position = self.offset
+            while skipped < rows and (block := file.read(blockSize)):
+                lines = block.count(b"\n")
+                if skipped + lines >= rows:
+                    end = -1
+                    for _ in range(rows - skipped):
+                        end = block.index(b"\n", end + 1)
+                    self.offset = position + end + 1
+                    return rows
+                if lines:
+                    self.offset = position + block.rindex(b"\n") + 1
+                skipped += lines
+                position += len(block)
+        return skipped
+    
+    def read(self, maxBytes=2**26):
+        """Parses the complete lines written since the last read. A line that is still being written is left for the next one.
+
+        Args:
+            maxBytes (int, optional): most bytes parsed at a time, the rest is left for the next read
+
+        Returns:
+            pd.DataFrame: the new complete rows (empty if there are none), see csv_loader.cleanRows
+        """
+        with open(self.filename, "rb") as file:
+            file.seek(self.offset)
+            block = file.read(maxBytes)
+        self.behind = len(block) == maxBytes
+        end = block.rfind(b"\n") + 1
+        if not end:
+            return pd.DataFrame({i: np.empty(0, dtype=self.dtype) for i in self.fields})
+        self.offset += end
+        return parseBlock(block[:end], self.fields, self.fields, self.dtype)
+    
+    def poll(self):
+        """Reads the new rows if the file changed since the last poll
+
+        Returns:
+            pd.DataFrame: the new rows, or None if the file did not change
+        """
+        if not (self.watcher.changed() or self.behind):
+            return None
+        return self.read()
+    
+    def close(self):
+        self.watcher.close()
+
+
+class ColumnBuffer:
+    def __init__(self, columns, capacity=2**16):
+        """Preallocated columns that rows are appended to in place. A column doubles in size when it is full,
+        so appending n rows one block at a time only copies O(n) values in total.
+
+        Args:
+            columns (dict): arrays of the rows the buffer starts with, e.g. the columns of a Capture
+            capacity (int, optional): minimum number of rows allocated up front
+        """
+        self.length = len(next(iter(columns.values())))
+        self.columns = {}
+        for name, values in columns.items():
+            column = np.empty(max(2 * self.length, capacity), dtype=np.result_type(values.dtype, np.float32))
+            column[:self.length] = values
+            self.columns[name] = column
+    
+    def append(self, rows):
+        """Copies rows onto the end of the columns, growing them if needed
+
+        Args:
+            rows (pd.DataFrame): new rows, with the same columns as the buffer
+        """
+        end = self.length + len(rows)
+        for name, column in self.columns.items():
+            if end > len(column):
+                grown = np.empty(max(2 * len(column), end), dtype=column.dtype)
+                grown[:self.length] = column[:self.length]
+                self.columns[name] = column = grown
+            column[self.length:end] = rows[name].to_numpy()
+        self.length = end
+    
+    def truncate(self, length):
+        """Drops the rows after the first length rows"""
+        self.length = min(self.length, length)
+    
+    def __getitem__(self, name):
+        """Returns: np.ndarray, view of the filled part of a column"""
+        return self.columns[name][:self.length]
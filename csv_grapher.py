@@ -1,7 +1,28 @@
-import matplotlib.pyplot as plt
-import PySimpleGUI as sg
-import pandas as pd
+import numpy as np
+import argparse
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from itertools import repeat
+from multiprocessing import freeze_support
+
+from browse import CaptureBrowser
+from capture import Capture, cache, load_capture, resampleCaptures     #Capture and load_capture are part of the scripting API with plot
+from csv_follow import ColumnBuffer, CSVTail
+from downsample import DecimatedLine, connectDecimation, isSorted, pixelWidth
+from downsample import decimate as decimateTrace    #decimate is the name of the downsampling setting
+from lazy_import import lazyModule, warmup
+from measure import MeasurementTable, frequencyUnit, measure_capture   #measure_capture is part of the scripting API
+from sample_lookup import AnnotationBlitter, SampleIndex, hoverLines, nearestSample, onAxes
+from spectrum import capture_spectrum   #part of the scripting API
+from timing import currentRecorder, profiling, recorded, span, timed
+
+# imported on first use, so the GUI window opens without waiting for them (see lazy_import)
+plt = lazyModule("matplotlib.pyplot")
+pd = lazyModule("pandas")
 
 """This program was created to create graphs using pandas and pyplot. 
 This was created primarily to read csv files for an oscilloscope but
@@ -23,19 +44,26 @@ axisLabelFont = {'family': 'serif',
         'size': 12,
         }
 
-filelocations = []  #list of multiple csv files
-annots = [] #list of annotations
-graphs = [] #list of graphs plotted
-titles = [] #list of titles
+decimateThreshold = 200000   #traces with more points than this are drawn as a min/max envelope when downsampling is enabled
+unitAxesLimit = 3   #y axes of a graph whose traces have different units, the units after these share the last axis
+unitAxesSpacing = 60    #distance in points between the spines of the second and later y axes, room for their ticks and label
+overlayLegendEntries = 10    #captures named in the legend of an OverlayGraph, the others are counted
+followHeadroom = 0.5    #fraction of the data range added past new rows when a followed graph outgrows its limits
 
 
 class Graph:
-    def __init__(self, figureNum):
+    @timed("plot")
+    def __init__(self, figureNum, capture, titles, sameplot=False, decimate=True):
         """Graph instance. Contains the figure, axes and all other components of a graph (other than subplot - refer to class SubplotGraph)
 
         Args:
             figureNum (int): Describes the figure identity, used to prevent plotted CSV from overwritting current figure.
+            capture (Capture): CSV to be plotted, returned by load_capture
+            titles (list): titles of every CSV plotted so far, used for the legend and title when plotting on the same graph
+            sameplot (bool, optional): whether several CSVs are being plotted on the same graph
+            decimate (bool, optional): whether large traces are drawn as a min/max envelope
         """
+        columns, xField, yFields = capture.columns, capture.xField, capture.yFields
         
         # Listed components of the graph
         self.fig = plt.figure(figureNum, figsize=(12,7))    #plot figure
@@ -50,13 +78,31 @@ class Graph:
         self.legend = None  #graph legend
         self.grid = plt.grid()  #graph grid
         self.figureNum = figureNum  #figure ID
+        self.decimatedLines = []    #lines plotted as a min/max envelope of their full resolution data
+        self.indexes = []   #sorted-x sample index of every line for hover and click lookups
+        self.capture, self.xField, self.yFields = capture, xField, yFields
+        self.decimate = decimate
+        self.tail = None    #reader of the rows appended to a followed CSV
+        self.unfinished = False     #the last line of the followed CSV was still being written when it was loaded
+        self.followTimer = None     #timer polling the followed CSV
+        self.connections = []   #ids of the canvas event connections, see disconnect
+        self.table = None   #measurement table, see showMeasurements
+        self.fittedLimits = {}  #y limits the graph set on every unit axis, see fitUnitAxes
+        self.axes = unitAxes(capture, plt.gca())    #(axes, unit, y fields) of every y axis, one per unit
+        axisOf = {yField: ax for ax, unit, fields in self.axes for yField in fields}
+        twin = len(self.axes) > 1
         counter = 0
         
         for yField in yFields:
             
-            self.line, = plt.plot(data[xField], data[yField], pickradius = 2, marker='o', markersize=2)   #plot the data attained from openCSV function
+            plt.sca(axisOf[yField])     #traces in other units go on twin axes
+            style = dict(pickradius = 2, marker='o', markersize=2)
+            if twin:
+                style["color"] = f"C{counter}"  #twin axes would each start the color cycle again
+            self.line = plotTrace(columns[xField], columns[yField], self.decimatedLines, decimate, **style)   #plot the data attained from load_capture
             self.line.set_label(f"{yFields[counter]}")  #set label according to yField index
             self.lines.append(self.line)    #add axis to axes list
+            self.indexes.append(SampleIndex(self.line, columns[xField], columns[yField]))
             self.annot = plt.annotate(  #describe annot property for live annotations
                         "", 
                         xy=(0,0), 
@@ -67,14 +113,20 @@ class Graph:
             self.annot.set_visible(False)
             self.annots.append(self.annot)
             
-            if not values["sameplotMultiplot"]:
+            if not sameplot and not twin:   #twin axes get one legend of the lines of every axis, below
                 self.legend = plt.legend(prop={"size": 10}, loc="upper right")
-            else:
+            elif not twin:
                 self.legend = plt.legend(titles, prop={"size": 10}, loc="upper right")
             counter += 1
+        
+        if twin:
+            labels = titles if sameplot else [line.get_label() for line in self.lines]
+            self.legend = self.axes[-1][0].legend(self.lines, labels, prop={"size": 10}, loc="upper right")   #on the top axes so no line covers it
+        plt.sca(self.axes[0][0])
+        self.fitUnitAxes()
             
         #title of graph
-        if not values["sameplotMultiplot"]:
+        if not sameplot:
             title = str(titles[-1]).replace("'","")    
             self.title = plt.title(title, fontdict=titleFont) 
         else:
@@ -83,20 +135,66 @@ class Graph:
             self.title = plt.title(temp_title, fontdict=titleFont)
         
         # Determines whether or not 2nd row is plotted as data based on if units are present
-        if hasUnitsVar:
-            self.xlabel = plt.xlabel(units[0], fontdict=axisLabelFont)
+        if capture.hasUnits:
+            self.xlabel = plt.xlabel(capture.units[0], fontdict=axisLabelFont)
         else:
             self.xlabel = None
         
-        if hasUnitsVar and (len(yFields) < 2 or len(set(yUnits)) <= 1):
-            self.ylabel = plt.ylabel(yUnits[0], fontdict=axisLabelFont)
+        if twin:
+            self.ylabel = None  #no unit is shared by every trace, each axis is labelled with its own
+            for ax, unit, fields in self.axes:
+                ax.set_ylabel(unit, fontdict=axisLabelFont)
+        elif capture.hasUnits and (len(yFields) < 2 or len(set(capture.yUnits)) <= 1):
+            self.ylabel = plt.ylabel(capture.yUnits[0], fontdict=axisLabelFont)
         else:
             self.ylabel = None
         
+        for ax, unit, fields in self.axes:
+            decimatedLines = [decimatedLine for decimatedLine in self.decimatedLines if decimatedLine.line.axes is ax]
+            if decimatedLines:
+                self.connections.append(connectDecimation(ax, decimatedLines))   #recompute the envelope when zooming or panning
+        
+        self.blitter = AnnotationBlitter(self.fig, self.annots)     #redraws only the live annotations on hover
+        
         # Connecting the figures to the event listener callback function
-        self.fig.canvas.mpl_connect("motion_notify_event", hover)   #hovering
-        self.fig.canvas.mpl_connect('button_press_event', mouse_event)  #clicking
+        self.connections.append(self.fig.canvas.mpl_connect("motion_notify_event", lambda event: hover(event, self)))   #hovering
+        self.connections.append(self.fig.canvas.mpl_connect('button_press_event', lambda event: mouse_event(event, self)))  #clicking
         
+    def showMeasurements(self, others=()):
+        """Adds a table of measurements (Vpp, RMS, frequency, rise time...) of the visible part of every line next to the graph.
+        The table is measured again whenever the graph is zoomed or panned.
+
+        Args:
+            others (list, optional): Graphs plotted on the same figure before this one, whose lines are measured too
+        """
+        traces = []
+        for graph in [*others, self]:
+            stats = graph.capture.stats or {}
+            traces += [(graph.capture.title, yField, index, stats.get(yField)) for yField, index in zip(graph.yFields, graph.indexes)]
+        yUnits = {graph.ylabel.get_text() if graph.ylabel is not None else "" for graph in [*others, self]}
+        xUnit = self.xlabel.get_text() if self.xlabel is not None else ""
+        yUnit = yUnits.pop() if len(yUnits) == 1 else ""    #only shown when every trace has the same unit
+        self.table = MeasurementTable(self.lines[0].axes, traces, xUnit, yUnit)
+        if len(self.axes) > 1:  #room for the spines of the twin axes between the graph and the table
+            self.fig.subplots_adjust(right=self.fig.subplotpars.right - unitAxesRoom(self.fig) * (len(self.axes) - 1))
+    
+    def fitUnitAxes(self):
+        """Sets the y limits of every axis from the min and max of its traces, and turns y autoscaling off so they are not
+        worked out again on the first draw. The min and max are the data limits matplotlib keeps up to date as each line is
+        added, so no trace is scanned again: a decimated trace, or a streamed capture, is plotted as its min/max envelope
+        and so already holds its extremes. A followed CSV still widens the limits, see growLimits.
+        """
+        for ax, unit, fields in self.axes:
+            low, high = ax.dataLim.intervaly
+            if np.isfinite(low) and np.isfinite(high) and high > low:    #flat or empty traces are left to matplotlib
+                margin = ax.margins()[1] * (high - low)
+                self.setFittedLimits(ax, low - margin, high + margin)
+    
+    def setFittedLimits(self, ax, low, high):
+        """Sets the y limits of a unit axis without autoscaling, and keeps them to tell them apart from limits the user
+        zoomed or panned to"""
+        self.fittedLimits[ax] = ax.set_ylim(low, high, auto=False)
+    
     def setAnnotVisibility(self, boolValue):
         """sets the visibility of the live annotation
 
@@ -104,16 +202,129 @@ class Graph:
             boolValue (bool): Sets the live annotation visibility
         """
         self.annot.set_visible(boolValue)
+    
+    def follow(self, filename, hasUnits, interval=100):
+        """Follows a CSV that is still being written. Rows appended to it are parsed and added to the lines as they arrive,
+        without reading the rest of the file again.
+
+        Args:
+            filename (str): file path of the CSV the graph was plotted from
+            hasUnits (bool): whether the 2nd row contains units instead of data
+            interval (int, optional): time in milliseconds between two checks of the file
+        """
+        columns = [self.xField] + self.yFields
+        self.tail = CSVTail(filename, hasUnits, columns)
+        self.buffer = ColumnBuffer({i: self.capture.columns[i] for i in columns})   #growable copy the lines are views of
+        lines = len(self.capture) + self.capture.removedRows    #incomplete rows left out when loading are lines of the file too
+        self.unfinished = self.tail.skip(lines) < lines     #the line still being written is read again once it is finished
+        self.followSorted = isSorted(self.buffer[self.xField])
+        
+        ax = self.lines[0].axes
+        connected = bool(self.decimatedLines)
+        decimated = {decimatedLine.line: decimatedLine for decimatedLine in self.decimatedLines}
+        for line, yField in zip(self.lines, self.yFields):
+            if self.decimate and line not in decimated:     #followed lines keep growing, so they are all decimated
+                decimated[line] = DecimatedLine(ax, self.buffer[self.xField], self.buffer[yField], line=line)
+                self.decimatedLines.append(decimated[line])
+        if self.decimatedLines and not connected:
+            self.connections.append(connectDecimation(ax, self.decimatedLines))
+        
+        self.followed = [(yField, line, decimated.get(line), index) for yField, line, index in zip(self.yFields, self.lines, self.indexes)]
+        self.setFollowedData()
+        self.blitter.addArtists(self.lines)     #the lines are blitted over the background like the annotations
+        
+        self.followTimer = self.fig.canvas.new_timer(interval=interval)
+        self.followTimer.add_callback(self.followStep)
+        self.followTimer.start()
+        self.connections.append(self.fig.canvas.mpl_connect("close_event", lambda event: self.stopFollowing()))
+        self.fig.canvas.draw_idle()
+    
+    def followStep(self):
+        """Adds the rows appended to the followed CSV since the last step and redraws what changed"""
+        rows = self.tail.poll()
+        if rows is None or not len(rows):
+            return
+        if self.unfinished:     #the unfinished line was loaded as a row unless it was left out as incomplete, the same x tells
+            self.unfinished = False
+            if self.buffer.length and rows[self.xField].iloc[0] == self.buffer[self.xField][-1]:
+                self.buffer.truncate(self.buffer.length - 1)
+        
+        previous = self.buffer[self.xField][-1:]
+        self.followSorted = self.followSorted and isSorted(np.concatenate([previous, rows[self.xField].to_numpy()]))
+        self.buffer.append(rows)
+        self.setFollowedData()
+        
+        if self.growLimits(rows):
+            self.fig.canvas.draw_idle()     #the ticks change, so the whole figure is redrawn
+        else:
+            self.blitter.update(self.lines[0].axes.bbox, force=True)   #only the axes are redrawn
+    
+    def setFollowedData(self):
+        """Points the lines, decimated lines and sample indexes at the filled part of the buffer"""
+        x = self.buffer[self.xField]
+        for yField, line, decimatedLine, index in self.followed:
+            y = self.buffer[yField]
+            if decimatedLine is not None:
+                decimatedLine.setData(x, y, self.followSorted)
+            else:
+                line.set_data(x, y)
+            index.setData(x, y, self.followSorted or None)
+    
+    def growLimits(self, rows):
+        """Widens autoscaled or fitted axes limits (see fitUnitAxes) that new rows fall outside of. Headroom is added so the limits,
+        and with them the whole figure, only need to be redrawn now and then.
+
+        Args:
+            rows (pd.DataFrame): rows appended since the last step
+
+        Returns:
+            bool: whether the limits changed
+        """
+        ax = self.axes[0][0]
+        grown = False
+        checks = [(rows[self.xField].to_numpy(), ax.get_xlim(), partial(ax.set_xlim, auto=True), ax.get_autoscalex_on())]
+        checks += [(rows[fields].to_numpy(), yAx.get_ylim(), partial(self.setFittedLimits, yAx),
+                    yAx.get_autoscaley_on() or yAx.get_ylim() == self.fittedLimits.get(yAx)) for yAx, unit, fields in self.axes]  #every unit axis has its own y limits
+        for values, limits, setLimits, auto in checks:
+            values = values[np.isfinite(values)]
+            if not auto or not len(values):     #limits the user zoomed or panned to are left alone
+                continue
+            low, high = min(values.min(), limits[0]), max(values.max(), limits[1])
+            if (low, high) == tuple(limits):
+                continue
+            headroom = followHeadroom * (high - low)
+            setLimits(low - headroom * (low < limits[0]), high + headroom * (high > limits[1]))
+            grown = True
+        return grown
+    
+    def stopFollowing(self):
+        """Stops polling the followed CSV"""
+        if self.followTimer is not None:
+            self.followTimer.stop()
+            self.tail.close()
+            self.followTimer = None
+    
+    def disconnect(self):
+        """Disconnects the graph from the events of its figure, so the figure can be cleared and reused for another graph"""
+        for connection in self.connections:
+            self.fig.canvas.mpl_disconnect(connection)
+        self.connections = []
+        self.blitter.disconnect()
+        self.stopFollowing()
+        if self.table is not None:
+            self.table.disconnect()
 
 
 class SubplotGraph:
-    def __init__(self, filepaths, figureNum, num):
+    @timed("plot")
+    def __init__(self, captures, figureNum, num, decimate=True):
         """Subplot instance. Contains the figure, axes and all other components of the subplot.
         
         Args:
-            filepaths (list): list of CSVs paths to be included in the subplot
+            captures (list): Capture of every CSV to be included in the subplot
             figureNum (int): Describes the figure identity, used to prevent plotted subplot from overwritting current figure.
             num (int): number of plots in the sublot (min=2, max=4)
+            decimate (bool, optional): whether large traces are drawn as a min/max envelope
         """
 
         # These are generally the same as the properties of the Graph class
@@ -129,11 +340,15 @@ class SubplotGraph:
         self.annot = None
         self.annots = []
         self.figureNum = figureNum
+        self.decimatedLines = []
+        self.indexes = []
         
         # For every plot in the subplot
         for i in range(num):
-            openCSV(filepaths[i])   #read the CSV. This is added here to maintain the simplicity of openCSV function
+            capture = captures[i]   #CSVs are read beforehand so they can be read in parallel
+            columns, xField, yFields, hasUnits = capture.columns, capture.xField, capture.yFields, capture.hasUnits
             counter = 1
+            decimatedLines = []     #decimated lines of this subplot only, refreshed when its axis is zoomed
             # This is used to determine the layout of the subplots based on how many plots
             match num:
                 case 2:
@@ -155,10 +370,11 @@ class SubplotGraph:
             
             #generally same as Graph class
             for yField in yFields:
-                self.line, = plt.plot(data[xField], data[yField], pickradius = 2)
-                if hasUnitsVar:
+                self.line = plotTrace(columns[xField], columns[yField], decimatedLines, decimate, pickradius = 2)
+                if hasUnits:
                     self.line.set_label(f"{yFields[counter-1]}")
                 self.lines.append(self.line)
+                self.indexes.append(SampleIndex(self.line, columns[xField], columns[yField]))
                 self.annot = plt.annotate(
                             "", 
                             xy=(0,0), 
@@ -174,16 +390,20 @@ class SubplotGraph:
             self.ax = plt.gca() #get the current axis
             self.axes.append(self.ax)   #adds them to a list of axis
             
-            self.ax.set_title(title, loc="left")    #set title
+            if decimatedLines:
+                connectDecimation(self.ax, decimatedLines)
+                self.decimatedLines.extend(decimatedLines)
+            
+            self.ax.set_title(capture.title, loc="left")    #set title
             
             #determines whether or not to plot 2nd row based on presence of units like Graph class
-            if hasUnitsVar:
-                self.xlabel = plt.xlabel(units[0], fontdict=axisLabelFont)
+            if hasUnits:
+                self.xlabel = plt.xlabel(capture.units[0], fontdict=axisLabelFont)
             else:
                 self.xlabel = None
             
-            if hasUnitsVar and (len(yFields) < 2 or len(set(yUnits)) <= 1):
-                self.ylabel = plt.ylabel(yUnits[0], fontdict=axisLabelFont)
+            if hasUnits and (len(yFields) < 2 or len(set(capture.yUnits)) <= 1):
+                self.ylabel = plt.ylabel(capture.yUnits[0], fontdict=axisLabelFont)
             else:
                 self.ylabel = None
                 
@@ -192,335 +412,999 @@ class SubplotGraph:
             plt.legend(prop={"size": 10}, loc="upper right")   #create a legend
             plt.grid()  #create a grid
         
+        self.blitter = AnnotationBlitter(self.fig, self.annots)
+        
         #connect figures to event listener callback functions
-        self.fig.canvas.mpl_connect("motion_notify_event", hover)
-        self.fig.canvas.mpl_connect('button_press_event', mouse_event)
+        self.fig.canvas.mpl_connect("motion_notify_event", lambda event: hover(event, self))
+        self.fig.canvas.mpl_connect('button_press_event', lambda event: mouse_event(event, self))
         
     def setAnnotVisibility(self, boolValue):
         self.annot.set_visible(boolValue)
+
+
+class SpectrumGraph:
+    @timed("spectrum")
+    def __init__(self, figureNum, capture, titles, sameplot=False):
+        """Spectrum instance. Plots the power spectral density of every trace of a capture (Welch's method, see spectrum.py)
+        in dB against a logarithmic frequency axis, with the same hover and click annotations as Graph.
+        The spectra are computed from the full resolution samples and kept with the capture, so plotting it again is instant.
+
+        Args:
+            figureNum (int): Describes the figure identity, used to prevent plotted CSV from overwritting current figure.
+            capture (Capture): CSV to be plotted, loaded in memory or memory-mapped
+            titles (list): titles of every CSV plotted so far, used for the title when plotting on the same graph
+            sameplot (bool, optional): whether several CSVs are being plotted on the same graph
+
+        Raises:
+            ValueError: if the capture was streamed, or its x values do not increase. No figure is opened.
+        """
+        spectra = [capture_spectrum(capture, yField) for yField in capture.yFields]  #before the figure, so a capture with no spectrum leaves none behind
+        self.fig = plt.figure(figureNum, figsize=(12,7))
+        
+        self.line = None
+        self.lines = []
+        
+        self.annotation = None
+        self.annot = None
+        self.annots = []
+        
+        self.figureNum = figureNum
+        self.indexes = []
+        self.capture = capture
+        self.connections = []
+        xUnit = capture.units[0] if capture.hasUnits else ""
+        
+        for yField, (frequencies, psd) in zip(capture.yFields, spectra):
+            decibels = 10 * np.log10(np.maximum(psd, np.finfo(psd.dtype).tiny))     #an empty bin would be -inf
+            # the DC bin is left out, it has no place on a logarithmic axis
+            self.line, = plt.semilogx(frequencies[1:], decibels[1:], pickradius = 2, label=f"{capture.title}: {yField}" if sameplot else yField)
+            self.lines.append(self.line)
+            self.indexes.append(SampleIndex(self.line, frequencies[1:], decibels[1:]))
+            self.annot = plt.annotate(
+                        "", 
+                        xy=(0,0), 
+                        xytext=(-20,20),
+                        textcoords="offset points",
+                        bbox=dict(boxstyle="round", fc="w"),
+                        arrowprops=dict(arrowstyle="->"))
+            self.annot.set_visible(False)
+            self.annots.append(self.annot)
+        
+        self.legend = plt.legend(prop={"size": 10}, loc="upper right")
+        self.grid = plt.grid(which="both", alpha=0.4)   #minor grid lines mark the decades
+        self.title = plt.title(", ".join(map(str, titles)) if sameplot else str(titles[-1]), fontdict=titleFont)
+        self.xlabel = plt.xlabel(f"Frequency ({frequencyUnit(xUnit)})" if xUnit else "Frequency", fontdict=axisLabelFont)
+        yUnits = set(capture.yUnits) if capture.hasUnits else set()
+        self.ylabel = plt.ylabel(f"PSD (dB {yUnits.pop()}²/{frequencyUnit(xUnit)})" if len(yUnits) == 1 and xUnit else "PSD (dB)", fontdict=axisLabelFont)
+        
+        self.blitter = AnnotationBlitter(self.fig, self.annots)
+        self.connections.append(self.fig.canvas.mpl_connect("motion_notify_event", lambda event: hover(event, self)))
+        self.connections.append(self.fig.canvas.mpl_connect('button_press_event', lambda event: mouse_event(event, self)))
+    
+    def disconnect(self):
+        """Disconnects the graph from the events of its figure, like Graph.disconnect"""
+        for connection in self.connections:
+            self.fig.canvas.mpl_disconnect(connection)
+        self.connections = []
+        self.blitter.disconnect()
                                      
         
-def openCSV(filename):
-    """Opens CSV files to attain certain information about the graph being plotted and assigns them to global variables
+class OverlayGraph:
+    @timed("plot")
+    def __init__(self, figureNum, captures, decimate=True, grid=False):
+        """Overlay instance. Plots every trace of several captures on one axes (Same Graph mode) as a single LineCollection,
+        so overlaying hundreds of captures costs one artist, one legend and one set of event callbacks instead of a Graph per capture.
+        Hovering annotates the trace nearest to the mouse with the capture it belongs to.
+
+        Args:
+            figureNum (int): Describes the figure identity, used to prevent plotted CSVs from overwritting current figure.
+            captures (list): Capture of every CSV to be plotted
+            decimate (bool, optional): whether the traces are drawn as min/max envelopes when they have more than decimateThreshold points in total
+            grid (bool, optional): whether the traces are resampled onto a common x grid first, see resampleCaptures
+        """
+        from matplotlib.collections import LineCollection
+        from matplotlib.lines import Line2D
+        
+        self.fig = plt.figure(figureNum, figsize=(12,7))
+        self.ax = plt.gca()
+        
+        self.annotation = None
+        self.annot = plt.annotate(
+                    "", 
+                    xy=(0,0), 
+                    xytext=(-20,20),
+                    textcoords="offset points",
+                    bbox=dict(boxstyle="round", fc="w"),
+                    arrowprops=dict(arrowstyle="->"))
+        self.annot.set_visible(False)
+        self.annots = [self.annot]
+        
+        self.figureNum = figureNum
+        self.captures = captures
+        self.connections = []
+        self.table = None
+        
+        fields = [(capture, yField) for capture in captures for yField in capture.yFields]
+        if grid:
+            x, columns = resampleCaptures(captures)
+            self.traces = [(capture, yField, x, y) for (capture, yField), y in zip(fields, columns)]   #(capture, yField, x, y) of every line
+        else:
+            self.traces = [(capture, yField, capture.x, capture.columns[yField]) for capture, yField in fields]
+        self.ordered = [isSorted(x) for capture, yField, x, y in self.traces]    #the visible window can only be searched on sorted x
+        self.decimate = decimate and sum(len(y) for capture, yField, x, y in self.traces) > decimateThreshold
+        self.labels = [capture.title if len(capture.yFields) < 2 else f"{capture.title}: {yField}" for capture, yField, x, y in self.traces]
+        
+        colors = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+        self.colors = [colors[i % len(colors)] for i in range(len(self.traces))]
+        self.collection = LineCollection(self.segments(), colors=self.colors, linewidths=1.5, pickradius=2)
+        self.ax.add_collection(self.collection)
+        self.ax.autoscale_view()
+        # hovering and measuring use the samples of the captures, not the resampled points
+        self.indexes = [SampleIndex(self.collection, capture.x, capture.columns[yField]) for capture, yField in fields]
+        
+        # a legend of hundreds of entries would cover the graph, the rest are counted in a last entry
+        handles = [Line2D([], [], color=color, label=label) for color, label in zip(self.colors[:overlayLegendEntries], self.labels)]
+        if len(self.traces) > overlayLegendEntries:
+            handles.append(Line2D([], [], linestyle="none", label=f"and {len(self.traces) - overlayLegendEntries} more"))
+        self.legend = plt.legend(handles=handles, prop={"size": 10}, loc="upper right")
+        self.grid = plt.grid()
+        
+        titles = [str(capture.title) for capture in captures]
+        self.title = plt.title(", ".join(titles) if len(titles) <= overlayLegendEntries else f"{len(titles)} captures", fontdict=titleFont)
+        self.xlabel = plt.xlabel(captures[0].units[0], fontdict=axisLabelFont) if captures[0].hasUnits else None
+        yUnits = {unit for capture in captures for unit in (capture.yUnits if capture.hasUnits else [None])}
+        self.ylabel = plt.ylabel(yUnits.pop(), fontdict=axisLabelFont) if len(yUnits) == 1 and None not in yUnits else None
+        
+        if self.decimate:
+            self.connections.append(connectDecimation(self.ax, [self]))     #recompute the envelopes when zooming or panning
+        
+        self.blitter = AnnotationBlitter(self.fig, self.annots)
+        self.connections.append(self.fig.canvas.mpl_connect("motion_notify_event", lambda event: hoverOverlay(event, self)))
+        self.connections.append(self.fig.canvas.mpl_connect('button_press_event', lambda event: clickOverlay(event, self)))
+    
+    def segments(self):
+        """Points of every line of the collection: the min/max envelope of the visible part when decimating, otherwise every sample"""
+        buckets = pixelWidth(self.ax)
+        xlim = None if self.ax.get_autoscalex_on() else self.ax.get_xlim()
+        segments = []
+        for (capture, yField, x, y), ordered in zip(self.traces, self.ordered):
+            if self.decimate:
+                x, y = decimateTrace(x, y, buckets, xlim if ordered else None)
+            segments.append(np.column_stack((x, y)))
+        return segments
+    
+    def refresh(self):
+        """Recomputes the envelopes for the current x limits and width of the axes, called by connectDecimation"""
+        self.collection.set_segments(self.segments())
+    
+    def showMeasurements(self):
+        """Adds a table of measurements of the visible part of every trace next to the graph, see Graph.showMeasurements"""
+        traces = [(capture.title, yField, index, (capture.stats or {}).get(yField)) for (capture, yField, *_), index in zip(self.traces, self.indexes)]
+        xUnit = self.xlabel.get_text() if self.xlabel is not None else ""
+        yUnit = self.ylabel.get_text() if self.ylabel is not None else ""
+        self.table = MeasurementTable(self.ax, traces, xUnit, yUnit)
+    
+    def disconnect(self):
+        """Disconnects the graph from the events of its figure, like Graph.disconnect"""
+        for connection in self.connections:
+            self.fig.canvas.mpl_disconnect(connection)
+        self.connections = []
+        self.blitter.disconnect()
+        if self.table is not None:
+            self.table.disconnect()
+
+
+def readCSV(filename, hasUnits, loadMode="memory"):
+    """load_capture that reports a file that cannot be read instead of raising, so one bad file does not stop the others.
 
     Args:
         filename (str): file path of CSV to be read
-    """    
-   
-    with open(filename, "r") as file:
-        global hasUnitsVar  #tells whether or not there are units in the 2nd row
-        global yFields  #list of yFields
-        global xField   #name of xField
-        global yUnits   #list of yUnits
-        global title    #title of the graph which is the filename
-        global units    #list of all units
-        global data     #pandas dataframe object of the CSV file - allows simpler importing of data into pyplot
-        
-        # Determines whether 2nd row has units
-        if values["forOsci"]:
-            hasUnitsVar = True
-        else:
-            hasUnitsVar = False
-            
-        fields = file.readline().split(",")     #all fields in a file
-        units = [i.strip() for i in file.readline().split(",")]     #all units in a file
-        yUnits = [i for i in units if units.index(i) > 0]       #all y units
+        hasUnits (bool): whether the 2nd row contains units instead of data
+        loadMode (str, optional): "memory", "memmap", "stream" or "compact", see load_capture
+
+    Returns:
+        tuple: Capture (None on failure) and the reason it could not be read (None on success)
+    """
+    try:
+        return load_capture(filename, hasUnits, loadMode), None
+    except pd.errors.EmptyDataError:
+        return None, "empty file"
+    except ValueError:
+        return None, "non-numeric data"
+    except OSError as error:
+        return None, error.strerror or str(error)
+
+
+def loadCSVs(filelocations, hasUnits, workers=1, loadMode="memory", progress=None, cancel=None):
+    """Reads several CSVs, spread across worker processes when more than one worker is used.
+    Memory-mapped CSVs are always read in this process, as sending a memory-mapped column back from a worker would copy it.
+
+    Args:
+        filelocations (list): file paths of the CSVs to be read
+        hasUnits (bool): whether the 2nd row of the CSVs contains units
+        workers (int, optional): number of worker processes
+        loadMode (str, optional): "memory", "memmap", "stream" or "compact", see load_capture
+        progress (function, optional): called with the file path, Capture and error of every CSV as soon as it is read
+        cancel (threading.Event, optional): when set, CSVs that have not started being read are skipped
+
+    Returns:
+        list: (file path, Capture or None, error or None) for every CSV, in the same order as filelocations.
+            The error of a skipped CSV is "cancelled".
+    """
+    results = {}    #(Capture, error) by position in filelocations
+    if workers > 1 and len(filelocations) > 1 and loadMode != "memmap":
+        timings = currentRecorder()
+        read = partial(recorded, readCSV) if timings.enabled else readCSV     #the timings of a worker are sent back with its result
+        with ProcessPoolExecutor(min(workers, len(filelocations))) as executor:
+            futures = {executor.submit(read, filelocation, hasUnits, loadMode): i for i, filelocation in enumerate(filelocations)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                if timings.enabled:
+                    results[i], spans = results[i]
+                    timings.extend(spans)
+                if progress is not None:
+                    progress(filelocations[i], *results[i])
+                if cancel is not None and cancel.is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)  #files already being read are still finished
+                    break
+    else:
+        for i, filelocation in enumerate(filelocations):
+            if cancel is not None and cancel.is_set():
+                break
+            results[i] = readCSV(filelocation, hasUnits, loadMode)
+            if progress is not None:
+                progress(filelocation, *results[i])
+    return [(filelocation, *results.get(i, (None, "cancelled"))) for i, filelocation in enumerate(filelocations)]
+
+
+def plot(captures, mode="separate", n=2, decimate=True, figureNum=1, measure=False, spectrum=False, grid=False):
+    """Plots captures with the same layouts as the GUI, without needing the GUI
+
+    Args:
+        captures (list): Capture of every CSV to be plotted
+        mode (str, optional): "same" (one graph of every capture), "separate" (one graph per capture) or "subplot" (n captures per figure)
+        n (int, optional): number of plots in each subplot figure (min=2, max=4). A single leftover capture gets a normal graph.
+        decimate (bool, optional): whether large traces are drawn as a min/max envelope
+        figureNum (int, optional): number of the first figure
+        measure (bool, optional): whether every Graph gets a table of measurements, see Graph.showMeasurements.
+            Subplots have no room for one.
+        spectrum (bool, optional): plot the spectrum of every capture (a SpectrumGraph) instead of its trace.
+            Not available in "subplot" mode.
+        grid (bool, optional): in "same" mode, resample the captures onto a common x grid, see OverlayGraph
+
+    Raises:
+        ValueError: if the mode is unknown, or a spectrum cannot be computed (see SpectrumGraph)
+
+    Returns:
+        list: the Graph, SubplotGraph or SpectrumGraph of every figure. In "same" mode, the OverlayGraph of every capture,
+            or the SpectrumGraph of every capture on the shared figure.
+    """
+    def graph(figure, capture, titles, sameplot):
+        if spectrum:
+            return SpectrumGraph(figure, capture, titles, sameplot)
+        return Graph(figure, capture, titles, sameplot, decimate)
     
+    graphs = []
+    titles = []     #titles plotted on the same graph so far
+    match mode:
+        case "same" if spectrum:
+            for capture in captures:
+                titles.append(capture.title)
+                graphs.append(graph(figureNum, capture, titles, True))
+            return graphs
+        
+        case "same":
+            if not captures:
+                return graphs
+            graphs.append(OverlayGraph(figureNum, captures, decimate, grid))    #every capture in one batch
+            if measure:
+                graphs[-1].showMeasurements()
+            return graphs
         
-        xField = fields.pop(0).strip()
-        yFields = [i.strip() for i in fields]
-        title = filename.split("/")[-1].split(".")[0]
-        titles.append(title)
+        case "separate":
+            for counter, capture in enumerate(captures, figureNum):
+                graphs.append(graph(counter, capture, [capture.title], False))
         
-        print(yFields)
-        print(units)
+        case "subplot" if spectrum:
+            raise ValueError("the spectrum view has no subplot layout")
+        
+        case "subplot":
+            sublists = [captures[i:i + n] for i in range(0, len(captures), n)]
+            for counter, sublist in enumerate(sublists, figureNum):
+                if len(sublist) == 1:
+                    graphs.append(Graph(counter, sublist[0], [sublist[0].title], False, decimate))
+                else:
+                    graphs.append(SubplotGraph(sublist, counter, len(sublist), decimate))
+        
+        case _:
+            raise ValueError(f"unknown plot mode {mode!r}")
     
-    #skips the second line when reading with pandas since it usually contains unit information and not data 
-    if hasUnitsVar:
-        try:
-            data = pd.read_csv(filename, skiprows=[1])
-        except pd.errors.EmptyDataError:
-            window["statusText"].update("Empty file")
-    else:
-        try:
-            data = pd.read_csv(filename)
-        except pd.errors.EmptyDataError:
-            window["statusText"].update("Empty file")
+    if measure:
+        for graph in graphs:
+            if isinstance(graph, Graph):
+                graph.showMeasurements()
+    return graphs
+
+
+def browse(browser, first, decimate=True, figureNum="Browse", measure=False, spectrum=False):
+    """Shows the captures of a CaptureBrowser one at a time on a single figure.
+    The right and left arrow keys (or page down and page up) move to the next and previous capture.
+
+    Args:
+        browser (CaptureBrowser): files in browsing order
+        first (tuple): Capture and error of the first file, the result of browser.request(0)
+        decimate (bool, optional): whether large traces are drawn as a min/max envelope
+        figureNum (optional): figure identity
+        measure (bool, optional): whether every capture is shown with a table of measurements, see Graph.showMeasurements
+        spectrum (bool, optional): show the spectrum of every capture (a SpectrumGraph) instead of its trace
+
+    Returns:
+        Figure: the figure the captures are shown on
+    """
+    # the arrow keys page through the captures instead of the zoom history
+    for keymap, key in (("keymap.back", "left"), ("keymap.forward", "right")):
+        plt.rcParams[keymap] = [i for i in plt.rcParams[keymap] if i != key]
+    fig = plt.figure(figureNum, figsize=(12,7))
+    graphs = []     #graph of the capture being shown
+    
+    def show(capture, error):
+        if graphs:
+            graphs.pop().disconnect()
+        fig.clf()
+        name = os.path.basename(browser.filelocations[browser.index])
+        if error is None and spectrum:
+            try:
+                graphs.append(SpectrumGraph(figureNum, capture, [capture.title]))
+            except ValueError as spectrumError:
+                fig.clf()
+                fig.text(0.5, 0.5, f"{name} has no spectrum ({spectrumError})", ha="center", fontdict=axisLabelFont)
+        elif error is None:
+            graphs.append(Graph(figureNum, capture, [capture.title], False, decimate))
+            if measure:
+                graphs[-1].showMeasurements()
+        else:
+            fig.text(0.5, 0.5, f"{name} could not be read ({error})", ha="center", fontdict=titleFont)
+        if fig.canvas.manager is not None:
+            fig.canvas.manager.set_window_title(f"{browser.index + 1}/{len(browser)} - {name}")
+        fig.canvas.draw_idle()
+    
+    def onKey(event):
+        step = {"right": 1, "pagedown": 1, "left": -1, "pageup": -1}.get(event.key)
+        if step and 0 <= browser.index + step < len(browser):
+            show(*browser.get(browser.index + step))    #usually read ahead already
+    
+    show(*first)
+    fig.canvas.mpl_connect("key_press_event", onKey)
+    fig.canvas.mpl_connect("close_event", lambda event: browser.close())
+    return fig
+
+
+def unitAxes(capture, ax, limit=unitAxesLimit):
+    """Groups the y fields of a capture by unit, one y axis per unit, so traces in Volt and Ampere each get an axis scaled
+    to them. The first unit is plotted on ax and the others on twins of it (twinx) sharing its x axis.
+
+    Args:
+        capture (Capture): capture whose y fields are plotted
+        ax (Axes): axes of the first unit
+        limit (int, optional): maximum number of y axes. The units after these share the last axis.
+
+    Returns:
+        list: (axes, unit, y fields) of every axis, in the order the units first appear. A single axis when there are no units.
+    """
+    groups = {}     #y fields of every unit
+    for yField, unit in zip(capture.yFields, capture.yUnits if capture.hasUnits else repeat("")):
+        groups.setdefault(unit, []).append(yField)
+    units = list(groups)
+    if len(units) > limit:  #the remaining units share the last axis
+        shared = units[limit - 1:]
+        groups[", ".join(shared)] = [yField for unit in shared for yField in groups[unit]]
+        units = units[:limit - 1] + [", ".join(shared)]
     
+    axes = [(ax, units[0], groups[units[0]])]
+    for unit in units[1:]:
+        twin = ax.twinx()
+        twin.spines["right"].set_position(("outward", unitAxesSpacing * (len(axes) - 1)))    #the first twin uses the right spine
+        axes.append((twin, unit, groups[unit]))
+    if len(axes) > 2:   #the default margin only has room for one spine on the right
+        ax.figure.subplots_adjust(right=ax.figure.subplotpars.right - unitAxesRoom(ax.figure) * (len(axes) - 2))
+    return axes
+
+
+def unitAxesRoom(fig):
+    """Width of the room taken by every extra y axis on the right of a graph, as a fraction of the figure width"""
+    return unitAxesSpacing / 72 / fig.get_figwidth()
 
-def update_annot(event, annot):
+
+def plotTrace(x, y, decimatedLines, decimate, **kwargs):
+    """Plots a trace on the current axis. Traces longer than decimateThreshold are decimated when downsampling is enabled
+
+    Args:
+        x: x values of the trace
+        y: y values of the trace
+        decimatedLines (list): list the DecimatedLine is added to if the trace is decimated
+        decimate (bool): whether downsampling is enabled
+        **kwargs: passed on to plt.plot
+
+    Returns:
+        Line2D: the plotted line
+    """
+    if decimate and len(x) > decimateThreshold:
+        decimatedLine = DecimatedLine(plt.gca(), x, y, **kwargs)
+        decimatedLines.append(decimatedLine)
+        return decimatedLine.line
+    
+    line, = plt.plot(np.asarray(x), y, **kwargs)   #every x value of a UniformAxis is needed
+    return line
+
+
+def update_annot(annot, x, y):
     """update annotations when hover event is activated within the axis
 
     Args:
-        event: hover event
         annot: annotation to be updated
+        x (float): x-coordinate of the sample nearest to the mouse
+        y (float): y-coordinate of the sample nearest to the mouse
     """
-    x,y = event.xdata, event.ydata      #get the x,y data from the event
     annot.xy = (x, y)   #set the annotation x and y coordinates
-    annot.set_text(f"{x:.4f},{y:.4f}")    #set text of annotation to the values of the location being hovered
+    annot.set_text(f"{x:.4f},{y:.4f}")    #set text of annotation to the values of the sample being hovered
     annot.get_bbox_patch().set_alpha(0.2)
-    graph.setAnnotVisibility(True)
 
    
     
-def create_annot(x,y):
+def create_annot(graph, x, y, ax=None):
     """Create annotation box when click event occurs
 
     Args:
+        graph (Graph): graph that was clicked
         x (float): x-xoordinate
         y (float): y-coordinate
+        ax (Axes, optional): axes of the line that was clicked, e.g. a twin axes of another unit. Defaults to the current axes.
     """
-    if not values["subplotMultiplot"]:
-        graph.annotation = plt.annotate(f"{x:.4f},{y:.4f}", xy=(x,y), xytext=(-20,20),textcoords="offset points",
+    if not isinstance(graph, SubplotGraph):     #plt.annotate would always land on the last subplot
+        graph.annotation = (ax or plt.gca()).annotate(f"{x:.4f},{y:.4f}", xy=(x,y), xytext=(-20,20),textcoords="offset points",
                         bbox=dict(boxstyle="round", fc="w"),
                         arrowprops=dict(arrowstyle="->"))
         # graph.annotation.set_text(f"{x:.4f},{y:.4f}")
         graph.annotation.get_bbox_patch().set_alpha(0.4)
         graph.annotation.set_visible(True)
+        graph.fig.canvas.draw_idle()    #click annotations are part of the figure, not blitted
 
 
-def hover(event):
+@timed("hover")
+def hover(event, graph):
     """Hover callback function
 
     Args:
         event: hover event
+        graph (Graph): graph the event happened on
     """
     # print(event)
-    for line in graph.lines:
-        if event.inaxes:    #if the event is within the graph
-            cont, ind = line.contains(event)
-            annot = graph.annots[graph.lines.index(line)]
-            if cont:    #if the event is within the plotted line
-                update_annot(event, annot)
-                annot.set_visible(True)
-                graph.fig.canvas.draw_idle() #redraw the canvas i.e. update the canvas
-            else: 
-                if annot.get_visible():
-                    annot.set_visible(False)
-                    graph.fig.canvas.draw_idle()
+    if event.inaxes:    #if the event is within the graph
+        hoverLines(event, graph.indexes, graph.annots, graph.blitter, update_annot)
 
                 
-def mouse_event(event):
+@timed("click")
+def mouse_event(event, graph):
     """mouse click callback function
 
     Args:
         event: click event
+        graph (Graph): graph the event happened on
     """
-    for line in graph.lines:
-        if event.inaxes:
-            cont, ind = line.contains(event)
-            if cont:
-                create_annot(event.xdata, event.ydata)
+    for index in graph.indexes:
+        if onAxes(event, index.line.axes):
+            sample = index.lookup(event)    #nearest real sample if the click is on the line
+            if sample is not None:
+                create_annot(graph, *sample, index.line.axes)
     
 
+@timed("hover")
+def hoverOverlay(event, graph):
+    """Hover callback function of an OverlayGraph, annotates the trace nearest to the mouse with its capture
+
+    Args:
+        event: hover event
+        graph (OverlayGraph): graph the event happened on
+    """
+    nearest = nearestSample(event, graph.indexes) if event.inaxes else None
+    if nearest is not None:
+        position, x, y = nearest
+        update_annot(graph.annot, x, y)
+        graph.annot.set_text(f"{graph.labels[position]}\n{graph.annot.get_text()}")
+        graph.annot.set_visible(True)
+    elif graph.annot.get_visible():
+        graph.annot.set_visible(False)
+    else:
+        return
+    graph.blitter.update()
+
+
+@timed("click")
+def clickOverlay(event, graph):
+    """Mouse click callback function of an OverlayGraph, annotates the sample of the trace nearest to the click
+
+    Args:
+        event: click event
+        graph (OverlayGraph): graph the event happened on
+    """
+    nearest = nearestSample(event, graph.indexes)
+    if nearest is not None:
+        create_annot(graph, *nearest[1:])
+
+
 
 
 # ---------------------------------------------------------------------
 # This is for the GUI using PySimpleGUI - read the PySimpleGui docs for more details on how this was created
 
-sg.theme("DarkBlue5")
-
-# layout for the gui
-layout = [[sg.Text("Please select .csv file below:")],
-          [sg.Input(key="fileInput", enable_events=True), sg.FileBrowse(key="fileBrowse", file_types=(("CSV Files", "*.csv"),))],
-          [sg.Checkbox("Contains units in 2nd row", default=True, key="forOsci")],
-          [sg.Radio("Use one CSV", "morethanone" ,default=True, key="oneCSV", enable_events=True)],
-          [sg.Radio("Use multiple CSVs", "morethanone" ,default=False, key="multiCSV", enable_events=True)],
-          [sg.Radio("Graph every csv in directory", "morethanone", default=False, key="dirGraph", enable_events=True)], 
-          [sg.Push(), sg.FolderBrowse("Browse for folder", key="folderBrowse", visible=False), sg.Push()],
-          [sg.Radio("Same Graph", "multiplot", key="sameplotMultiplot", default=True, visible=False, enable_events=True), sg.Radio("Separate Graphs", "multiplot", key="diffplotMultiplot", visible=False, enable_events=True), sg.Radio("Subplot", "multiplot", key="subplotMultiplot", visible=False, enable_events=True)],
-          [sg.Text("No. of Subplots:", key="csvnumbertext", visible=False), sg.Radio("2", "csvnumber", key="2csv", default=True, visible=False), sg.Radio("3", "csvnumber", key="3csv", default=False, visible=False), sg.Radio("4", "csvnumber", key="4csv", default=False, visible=False)],
-          [sg.Text("No. of CSVs:", key="multiCSVtext", visible=False)], 
-          [sg.Push(), sg.Text("", key="statusText")],
-          [sg.Push(), sg.Text("", key="filename"), sg.Push()],
-          [sg.Push(), sg.Button("Clear", key="clear", visible=True), sg.Button("Add File", key="addfile", visible=False)],
-          [sg.Push(), sg.Button("OK", key="okay", bind_return_key=True), sg.Push()]]
-
-# creating the window
-window = sg.Window(".CSV Grapher (github.com/Edzemundo)", layout=layout)
-oneCSVCounter = 1
-# allows window to be open persistently and values to be actively available
-while True:
-    # event listener and active value reading method
-    event, values = window.read()
-    
-    # if okay button is clicked
-    if event == "okay":
-        window["statusText"].update("")
-        titles = []
+def runGUI():
+    """Opens the PySimpleGUI window and runs its event loop until the window is closed"""
+    import PySimpleGUI as sg
+
+    sg.theme("DarkBlue5")
+
+    # layout for the gui
+    layout = [[sg.Text("Please select .csv file below:")],
+              [sg.Input(key="fileInput", enable_events=True), sg.FileBrowse(key="fileBrowse", file_types=(("CSV Files", "*.csv"),))],
+              [sg.Checkbox("Contains units in 2nd row", default=True, key="forOsci")],
+              [sg.Checkbox(f"Downsample captures over {decimateThreshold} points", default=True, key="decimate")],
+              [sg.Checkbox("Show measurements table", default=False, key="measure"), sg.Checkbox("Show spectrum (FFT) instead of trace", default=False, key="spectrum")],
+              [sg.Text("Load captures:"), sg.Radio("In memory", "loadmode", default=True, key="memory"), sg.Radio("Memory-mapped", "loadmode", key="memmap"), sg.Radio("Streamed envelope (files larger than memory)", "loadmode", key="stream"), sg.Radio("Compact (float32)", "loadmode", key="compact")],
+              [sg.Radio("Use one CSV", "morethanone" ,default=True, key="oneCSV", enable_events=True), sg.Checkbox("Follow file as it is written", default=False, key="follow")],
+              [sg.Radio("Use multiple CSVs", "morethanone" ,default=False, key="multiCSV", enable_events=True)],
+              [sg.Radio("Graph every csv in directory", "morethanone", default=False, key="dirGraph", enable_events=True)], 
+              [sg.Push(), sg.FolderBrowse("Browse for folder", key="folderBrowse", visible=False), sg.Push()],
+              [sg.Radio("Same Graph", "multiplot", key="sameplotMultiplot", default=True, visible=False, enable_events=True), sg.Radio("Separate Graphs", "multiplot", key="diffplotMultiplot", visible=False, enable_events=True), sg.Radio("Subplot", "multiplot", key="subplotMultiplot", visible=False, enable_events=True), sg.Radio("Browse one at a time", "multiplot", key="browseMultiplot", visible=False, enable_events=True)],
+              [sg.Checkbox("Resample onto a common time base (Same Graph)", default=False, key="commonGrid", visible=False)],
+              [sg.Text("No. of Subplots:", key="csvnumbertext", visible=False), sg.Radio("2", "csvnumber", key="2csv", default=True, visible=False), sg.Radio("3", "csvnumber", key="3csv", default=False, visible=False), sg.Radio("4", "csvnumber", key="4csv", default=False, visible=False)],
+              [sg.Text("No. of CSVs:", key="multiCSVtext", visible=False)], 
+              [sg.Text("Worker processes:", key="workerstext", visible=False), sg.Spin(list(range(1, os.cpu_count() + 1)), initial_value=os.cpu_count(), key="workers", visible=False)],
+              [sg.Push(), sg.Text("", key="statusText")],
+              [sg.Push(), sg.Text("", key="filename"), sg.Push()],
+              [sg.Push(), sg.Button("Clear", key="clear", visible=True, right_click_menu=["", ["Clear cache::clearcache"]]), sg.Button("Add File", key="addfile", visible=False),
+               sg.Input(key="exportMeasurements", visible=False, enable_events=True), sg.FileSaveAs("Export measurements", key="exportBrowse", target="exportMeasurements", file_types=(("CSV Files", "*.csv"),), default_extension=".csv", visible=False)],
+              [sg.Push(), sg.Button("OK", key="okay", bind_return_key=True), sg.Button("Cancel", key="cancel", visible=False), sg.Push()]]
+
+    readErrors = {"empty file": "Empty file", "non-numeric data": "Non-numeric data - check the units checkbox"}    #status of a single CSV that could not be read
+    
+    # creating the window, then importing pandas and matplotlib while it is open
+    window = sg.Window(".CSV Grapher (github.com/Edzemundo)", layout=layout, finalize=True)
+    warmup(pd, plt)
+    oneCSVCounter = 1
+    filelocations = []  #list of multiple csv files
+    titles = [] #list of titles
+    measured = []   #graphs with a measurement table, exported by the Export measurements button
+    
+    def stillOpen(graphs):
+        """Graphs whose figure is still open. Figures are told apart by identity, as a closed figure keeps its number
+        and the next job's figures are numbered from 1 again."""
+        figures = {id(plt.figure(number)) for number in plt.get_fignums()}
+        return [graph for graph in graphs if id(graph.fig) in figures]
+    
+    def graphCapture(capture, figureNum, settings):
+        """Plots a read CSV as a Graph, or a SpectrumGraph, with the GUI settings of its job"""
+        titles.append(capture.title)
+        if settings["spectrum"]:
+            return SpectrumGraph(figureNum, capture, titles, settings["sameplotMultiplot"])
+        return Graph(figureNum, capture, titles, settings["sameplotMultiplot"], settings["decimate"])
+    
+    def loadMode(settings):
+        """Load mode of load_capture selected in the GUI. Followed files are held in memory so they can grow."""
+        if settings["oneCSV"] and settings["follow"]:
+            return "memory"
+        return next((mode for mode in ("memmap", "stream", "compact") if settings[mode]), "memory")
+    
+    def loadJob(files, settings, cancel):
+        """Reads the CSVs of a job on a worker thread, posting a progress event to the window after every file
+
+        Returns:
+            list: the result of loadCSVs, or the exception that stopped it so that it is reported on the main thread
+        """
+        start = time.perf_counter()
+        done = {"files": 0, "bytes": 0, "rows": 0}
+        
+        def progress(filelocation, capture, error):
+            done["files"] += 1
+            done["bytes"] += os.path.getsize(filelocation) if error is None else 0
+            done["rows"] += len(capture) if capture is not None else 0
+            window.write_event_value("progress", (done["files"], len(files), done["bytes"], done["rows"], time.perf_counter() - start))
+        
         try:
-            # graph the csv file selected
-            if values["oneCSV"] == True:
-                values["subplotMultiplot"] = False  #stop subplot from preventing click events after feature was removed from subplots
-                if values["fileInput"] != "":
-                    openCSV(values["fileInput"])
-                    graph = Graph(oneCSVCounter)
-                    plt.show()
-                else:
-                    openCSV(values["fileBrowse"])
-                    graph = Graph(oneCSVCounter)
-                    plt.show()
-                oneCSVCounter +=1
-            
-            elif values["multiCSV"] == True:
-                if values["subplotMultiplot"] == True:
-                    if values["2csv"] == True:
-                        graph = SubplotGraph(filelocations, 1, 2)
-                        plt.show()
-                    elif values["3csv"] == True:
-                        graph = SubplotGraph(filelocations, 1, 3)
-                        plt.show()
-                    elif values["4csv"] == True:
-                        graph = SubplotGraph(filelocations, 1, 4)
-                        plt.show()
+            return loadCSVs(files, settings["forOsci"], int(settings["workers"]), loadMode(settings), progress, cancel)
+        except Exception as error:
+            return error
+    
+    def waitFor(future):
+        """Result of a future on a worker thread, or the exception that stopped it so that it is reported on the main thread"""
+        try:
+            return future.result()
+        except Exception as error:
+            return error
+    
+    cancel = threading.Event()  #set by the Cancel button to stop the job being read
+    jobSettings = None  #GUI values when OK was pressed, used once the job has been read
+    jobStart = 0    #first timing span of the job, the status only sums the spans of the latest job (with --profile)
+    
+    # allows window to be open persistently and values to be actively available
+    while True:
+        # event listener and active value reading method
+        event, values = window.read()
+        
+        # if okay button is clicked the CSVs are read on a worker thread, and plotted here once they are all read
+        if event in ("okay", "loaded", "browsed"):
+            try:
+                if event == "okay":
+                    window["statusText"].update("")
+                    jobStart = currentRecorder().mark()
+                    n = 2 if values["2csv"] else 3 if values["3csv"] else 4     #number of subplots
                     
-                elif values["sameplotMultiplot"] == True:
-                    for file in filelocations:
-                        openCSV(file)
-                        graph = Graph(1)
-                    plt.show()
-            
-                elif values["diffplotMultiplot"] == True:
-                    counter = 1
-                    for file in filelocations:
-                        openCSV(file)
-                        graph = Graph(counter)
-                        counter += 1                    
-                    plt.show()
-                
+                    # the csv file selected
+                    if values["oneCSV"] == True:
+                        files = [values["fileInput"] if values["fileInput"] != "" else values["fileBrowse"]]
+                    
+                    elif values["dirGraph"] == True:
+                        dirCSVFiles = [file for file in os.listdir(values["folderBrowse"]) if file.endswith(".csv")]
+                        print(dirCSVFiles)
+                        filelocations = [values["folderBrowse"] + f"/{i}" for i in dirCSVFiles]
+                        window["statusText"].update(f"{len(dirCSVFiles)} files found")
+                        files = filelocations
+                    
+                    elif values["subplotMultiplot"] == True:
+                        if len(filelocations) < n:
+                            window["statusText"].update(f"Add at least {n} files for {n} subplots")
+                            continue
+                        files = filelocations[:n]
+                    
+                    else:
+                        files = filelocations
                     
-            elif values["dirGraph"] == True:
+                    if values["spectrum"] and values["stream"]:
+                        window["statusText"].update("The spectrum needs every sample - load captures in memory or memory-mapped")
+                        continue
+                    if values["spectrum"] and values["subplotMultiplot"] and not values["oneCSV"]:
+                        window["statusText"].update("The spectrum view has no subplot layout")
+                        continue
+                    
+                    jobSettings = values
+                    if values["browseMultiplot"] == True and values["oneCSV"] == False:
+                        if not files:
+                            window["statusText"].update("No files to browse")
+                            continue
+                        #files are read on the browser's threads, the first one is waited for on a worker thread
+                        browser = CaptureBrowser(files, partial(readCSV, hasUnits=values["forOsci"], loadMode=loadMode(values)))
+                        window["okay"].update(disabled=True)
+                        window.perform_long_operation(lambda future=browser.request(0): waitFor(future), "browsed")
+                        continue
+                    
+                    cancel = threading.Event()
+                    window["okay"].update(disabled=True)
+                    window["cancel"].update(visible=True)
+                    window.perform_long_operation(lambda files=files, settings=values, cancel=cancel: loadJob(files, settings, cancel), "loaded")
                 
-                dirCSVFiles = [file for file in os.listdir(values["folderBrowse"]) if file.endswith(".csv")]
-                print(dirCSVFiles)
-                filelocations = [values["folderBrowse"] + f"/{i}" for i in dirCSVFiles]
-                window["statusText"].update(f"{len(dirCSVFiles)} files found")             
-                if values["sameplotMultiplot"] == True:
-                    for CSVfile in dirCSVFiles:
-                        openCSV(values["folderBrowse"] + f"/{CSVfile}")
-                        graph = Graph(1)
+                elif event == "browsed":
+                    window["okay"].update(disabled=False)
+                    first = values["browsed"]
+                    if isinstance(first, Exception):
+                        raise first
+                    browse(browser, first, jobSettings["decimate"], measure=jobSettings["measure"], spectrum=jobSettings["spectrum"])
                     plt.show()
+                
+                else:
+                    window["okay"].update(disabled=False)
+                    window["cancel"].update(visible=False)
+                    settings = jobSettings
+                    titles = []
+                    loaded = values["loaded"]
+                    if isinstance(loaded, Exception):
+                        raise loaded
                     
-                elif values["diffplotMultiplot"] == True:
-                    i = 1
-                    for CSVfile in dirCSVFiles:
-                        openCSV(values["folderBrowse"] + f"/{CSVfile}")
-                        graph = Graph(i)
-                        i += 1                    
-                    plt.show()
+                    if cancel.is_set():
+                        read = sum(error != "cancelled" for filelocation, capture, error in loaded)
+                        window["statusText"].update(f"Cancelled - {read} of {len(loaded)} files were read")
+                        continue
                     
+                    captures = [capture for filelocation, capture, error in loaded if capture is not None]
+                    errors = [f"{os.path.basename(filelocation)} ({error})" for filelocation, capture, error in loaded if error is not None]
                     
-                elif values["subplotMultiplot"] == True:
-                    if values["2csv"] == True:
-                        n = 2
-                    if values["3csv"] == True:
-                        n = 3
-                    if values["4csv"] == True:
-                        n = 4
-                    counter = 1
-                    sublists = [filelocations[i:i + n] for i in range(0, len(filelocations), n)]  
-                    for sublist in sublists:
-                        if len(sublist) == n:
-                            if values["2csv"] == True:
-                                graph = SubplotGraph(sublist, counter, 2)
-                            elif values["3csv"] == True:
-                                graph = SubplotGraph(sublist, counter, 3)
-                            elif values["4csv"] == True:
-                                graph = SubplotGraph(sublist, counter, 4)
-                                print("confirmed")
-                            counter += 1
-                            print(counter)
-                        
-                        elif len(sublist) == 1:
-                            openCSV(sublist[0])
-                            if counter != 0:
-                                graph = Graph(counter + 1)
-                            else:
-                                graph = Graph(1)
-                                
-                        else:
-                            graph = SubplotGraph(sublist, counter, n-1)
-                    plt.show()
-
+                    # graph the csv file selected
+                    if settings["oneCSV"] == True:
+                        filelocation, capture, error = loaded[0]
+                        if error is not None:
+                            window["statusText"].update(readErrors.get(error, "File not found or input file/folder not selected."))
+                            window["fileInput"].update("")
+                            continue
+                        try:
+                            graph = graphCapture(capture, oneCSVCounter, settings)
+                        except ValueError as spectrumError:
+                            if not settings["spectrum"]:
+                                raise
+                            window["statusText"].update(f"{os.path.basename(filelocation)} has no spectrum - {spectrumError}")
+                            continue
+                        if settings["follow"] and isinstance(graph, Graph):   #a spectrum is of the file as it was loaded
+                            graph.follow(filelocation, settings["forOsci"])
+                        if settings["measure"] and isinstance(graph, Graph):
+                            graph.showMeasurements()
+                        graphs = [graph]
+                        oneCSVCounter +=1
+                        status = ""
                     
+                    else:
+                        status = f"{len(errors)} of {len(loaded)} files could not be read: {', '.join(errors)}" if errors else ""
+                        window["statusText"].update(status)
+                        n = 2 if settings["2csv"] else 3 if settings["3csv"] else 4
+                        mode = "same" if settings["sameplotMultiplot"] else "separate" if settings["diffplotMultiplot"] else "subplot"
+                        try:
+                            graphs = plot(captures, mode, n, settings["decimate"], measure=settings["measure"], spectrum=settings["spectrum"], grid=settings["commonGrid"])
+                        except ValueError as spectrumError:
+                            if not settings["spectrum"]:
+                                raise
+                            window["statusText"].update(" - ".join(filter(None, [status, f"No spectrum - {spectrumError}"])))
+                            continue
                     
-        # error handling for type and file not found errors
-        except FileNotFoundError:
-            window["statusText"].update("File not found or input file/folder not selected.")
-            window["fileInput"].update("")
-            
-        except TypeError:
-            window["statusText"].update("Syntax error - further support coming")
-            window["fileInput"].update("")
-            
-        except IndexError:
-            filelocations = []
-            filenames = []
-            window["filename"].update("")
-            window["statusText"].update("Minimim number of files not added or Index Error")
-            window["fileInput"].update("")
+                    removed = sum(capture.removedRows for capture in captures)
+                    if removed:     #blank or partial rows left out of the graphs
+                        status = " - ".join(filter(None, [status, f"{removed:,} incomplete row{'s' if removed != 1 else ''} removed"]))
+                        window["statusText"].update(status)
+                    
+                    measured = stillOpen(measured) + [graph for graph in graphs if isinstance(graph, (Graph, OverlayGraph)) and graph.table is not None]
+                    window["exportBrowse"].update(visible=bool(measured))
+                    
+                    timings = currentRecorder()
+                    if timings.enabled and captures:    #with --profile the figures are drawn here so the status can show the drawing time too
+                        with span("draw"):
+                            for figure in {graph.fig for graph in graphs}:
+                                figure.canvas.draw()
+                        window["statusText"].update(" - ".join(filter(None, [status, timings.summary(jobStart)])))
+                        window.refresh()    #plt.show blocks the window's event loop
+                    
+                    if captures:
+                        plt.show()
+                    
+
+            # error handling for type and file not found errors
+            except pd.errors.EmptyDataError:
+                window["statusText"].update("Empty file")
+                
+            except ValueError:
+                window["statusText"].update("Non-numeric data - check the units checkbox")
+                
+            except FileNotFoundError:
+                window["statusText"].update("File not found or input file/folder not selected.")
+                window["fileInput"].update("")
+                
+            except TypeError:
+                window["statusText"].update("Syntax error - further support coming")
+                window["fileInput"].update("")
         
-    if event in ("oneCSV", "multiCSV", "dirGraph", "subplotMultiplot", "sameplotMultiplot", "diffplotMultiplot"):
-        if values["multiCSV"] == True or values["dirGraph"] == True:
-            window["multiCSVtext"].update(visible=True)
-            window["addfile"].update(visible=True)
-            window["sameplotMultiplot"].update(visible=True)
-            window["subplotMultiplot"].update(visible=True)
-            window["diffplotMultiplot"].update(visible=True)
-            
-            if event == "subplotMultiplot":
-                window["csvnumbertext"].update(visible=True)
-                window["2csv"].update(visible=True)
-                window["3csv"].update(visible=True)
-                window["4csv"].update(visible=True)
+        if event == "progress":
+            done, total, size, rows, elapsed = values["progress"]
+            window["statusText"].update(f"{done} of {total} files read, {size / 2**20:.1f} MB, {rows / max(elapsed, 1e-9):,.0f} rows/s")
+        
+        if event == "cancel":
+            cancel.set()
+            window["statusText"].update("Cancelling - files already being read are finished first")
             
-            if event == "sameplotMultiplot":
+        if event in ("oneCSV", "multiCSV", "dirGraph", "subplotMultiplot", "sameplotMultiplot", "diffplotMultiplot", "browseMultiplot"):
+            if values["multiCSV"] == True or values["dirGraph"] == True:
+                window["follow"].update(False, visible=False)   #only a single CSV can be followed
+                window["multiCSVtext"].update(visible=True)
+                window["workerstext"].update(visible=True)
+                window["workers"].update(visible=True)
+                window["addfile"].update(visible=True)
+                window["sameplotMultiplot"].update(visible=True)
+                window["subplotMultiplot"].update(visible=True)
+                window["diffplotMultiplot"].update(visible=True)
+                window["browseMultiplot"].update(visible=True)
+                window["commonGrid"].update(visible=True)
+                
+                if event == "subplotMultiplot":
+                    window["csvnumbertext"].update(visible=True)
+                    window["2csv"].update(visible=True)
+                    window["3csv"].update(visible=True)
+                    window["4csv"].update(visible=True)
+                
+                if event == "sameplotMultiplot":
+                    window["csvnumbertext"].update(visible=False)
+                    window["2csv"].update(visible=False)
+                    window["3csv"].update(visible=False)
+                    window["4csv"].update(visible=False)
+                
+                if event in ("diffplotMultiplot", "browseMultiplot"):
+                    window["csvnumbertext"].update(visible=False)
+                    window["2csv"].update(visible=False)
+                    window["3csv"].update(visible=False)
+                    window["4csv"].update(visible=False)
+                    
+                
+            if values["multiCSV"] == False and values["dirGraph"] == False:
+                window["follow"].update(visible=True)
+                window["multiCSVtext"].update(visible=False)
+                window["workerstext"].update(visible=False)
+                window["workers"].update(visible=False)
                 window["csvnumbertext"].update(visible=False)
                 window["2csv"].update(visible=False)
                 window["3csv"].update(visible=False)
                 window["4csv"].update(visible=False)
-            
-            if event == "diffplotMultiplot":
-                window["csvnumbertext"].update(visible=False)
                 window["2csv"].update(visible=False)
-                window["3csv"].update(visible=False)
-                window["4csv"].update(visible=False)
+                window["addfile"].update(visible=False)
+                window["sameplotMultiplot"].update(visible=False)
+                window["subplotMultiplot"].update(visible=False)
+                window["diffplotMultiplot"].update(visible=False)
+                window["browseMultiplot"].update(visible=False)
+                window["commonGrid"].update(visible=False)
+                
+            if values["dirGraph"] == True:
+                window["folderBrowse"].update(visible=True)
+            else:
+                window["folderBrowse"].update(visible=False)
+
                 
+        if event == "addfile":
+            filelocations.append(values["fileBrowse"])
+            window["statusText"].update("File Added")
+            window["fileInput"].update("")
+            filenames = [filelocation.split("/")[-1] for filelocation in  filelocations]
+            window["filename"].update(f"{filenames}")
+            print(filelocations)
+            
+        if event == "clear":
+            filelocations = []
+            filenames = []
+            window["filename"].update("")
+            window["statusText"].update("Cleared")
+            window["fileInput"].update("")
+        
+        if event == "exportMeasurements" and values["exportMeasurements"]:
+            measured = stillOpen(measured)
+            if measured:
+                pd.concat([graph.table.measurements() for graph in measured]).to_csv(values["exportMeasurements"])
+                window["statusText"].update(f"Measurements of {len(measured)} graphs exported")
+            else:
+                window["statusText"].update("No graphs with measurements are open")
+            window["exportMeasurements"].update("")
+        
+        if event == "Clear cache::clearcache":  #right click menu of the Clear button
+            window["statusText"].update(f"Cache cleared ({cache.hits} hits, {cache.misses} misses this session)")
+            cache.clear()
             
-        if values["multiCSV"] == False and values["dirGraph"] == False:
-            window["multiCSVtext"].update(visible=False)
-            window["csvnumbertext"].update(visible=False)
-            window["2csv"].update(visible=False)
-            window["3csv"].update(visible=False)
-            window["4csv"].update(visible=False)
-            window["2csv"].update(visible=False)
-            window["addfile"].update(visible=False)
-            window["sameplotMultiplot"].update(visible=False)
-            window["subplotMultiplot"].update(visible=False)
-            window["diffplotMultiplot"].update(visible=False)
             
-        if values["dirGraph"] == True:
-            window["folderBrowse"].update(visible=True)
-        else:
-            window["folderBrowse"].update(visible=False)
+        # if the GUI window is closed, break the code
+        if event == sg.WIN_CLOSED:
+            break
 
-            
-    if event == "addfile":
-        filelocations.append(values["fileBrowse"])
-        window["statusText"].update("File Added")
-        window["fileInput"].update("")
-        filenames = [filelocation.split("/")[-1] for filelocation in  filelocations]
-        window["filename"].update(f"{filenames}")
-        print(filelocations)
-        
-    if event == "clear":
-        filelocations = []
-        filenames = []
-        window["filename"].update("")
-        window["statusText"].update("Cleared")
-        window["fileInput"].update("")
-        
-        
-    # if the GUI window is closed, break the code
-    if event == sg.WIN_CLOSED:
-        break
\ No newline at end of file
+def renderFigure(filelocations, path, hasUnits, decimate, loadMode="memory"):
+    """Reads CSVs and saves them as one figure - a Graph for a single CSV or a SubplotGraph for several.
+    Used by render, either directly or in a worker process.
+
+    Args:
+        filelocations (list): file paths of the CSVs in the figure
+        path (str): file path of the image
+        hasUnits (bool): whether the 2nd row of the CSVs contains units
+        decimate (bool): whether large traces are drawn as a min/max envelope
+        loadMode (str, optional): "memory", "memmap", "stream" or "compact", see load_capture
+
+    Returns:
+        list: (file path, error) for every CSV that could not be read. The figure is not saved if any failed.
+    """
+    plt.switch_backend("Agg")
+    loaded = loadCSVs(filelocations, hasUnits, loadMode=loadMode)
+    errors = [(filelocation, error) for filelocation, capture, error in loaded if error is not None]
+    if errors:
+        return errors
+    
+    captures = [capture for filelocation, capture, error in loaded]
+    graph, = plot(captures, "subplot", len(captures), decimate)     #a Graph for a single CSV
+    with span("save"):
+        graph.fig.savefig(path)
+    plt.close(graph.fig)    #free the figure before the next one so memory stays flat
+    return []
+
+
+def render(folder, mode, n, out, hasUnits=True, fileFormat="png", decimate=True, workers=1, loadMode="memory"):
+    """Renders every CSV in a folder to image files without the GUI, using the same graph layouts as the GUI.
+    Figures are saved and closed one at a time so memory stays flat over large folders.
+
+    Args:
+        folder (str): folder containing the CSVs
+        mode (str): "same" (one graph of every CSV), "separate" (one graph per CSV) or "subplot" (n CSVs per figure)
+        n (int): number of plots in each subplot figure (min=2, max=4)
+        out (str): folder the images are saved to
+        hasUnits (bool, optional): whether the 2nd row of the CSVs contains units
+        fileFormat (str, optional): image format, "png" or "svg"
+        decimate (bool, optional): whether large traces are drawn as a min/max envelope
+        workers (int, optional): number of worker processes the figures are spread across
+        loadMode (str, optional): "memory", "memmap", "stream" or "compact", see load_capture
+
+    Returns:
+        tuple: file paths of the saved images and (file path, error) for every CSV that could not be read
+    """
+    plt.switch_backend("Agg")
+    os.makedirs(out, exist_ok=True)
+    filelocations = [os.path.join(folder, file) for file in sorted(os.listdir(folder)) if file.endswith(".csv")]
+    
+    if mode == "same":  #a single figure, so only the reading is spread across workers
+        loaded = loadCSVs(filelocations, hasUnits, workers, loadMode)
+        errors = [(filelocation, error) for filelocation, capture, error in loaded if error is not None]
+        graphs = plot([capture for filelocation, capture, error in loaded if capture is not None], "same", decimate=decimate)
+        if not graphs:
+            return [], errors
+        path = os.path.join(out, f"{os.path.basename(os.path.normpath(folder))}.{fileFormat}")
+        with span("save"):
+            graphs[-1].fig.savefig(path)
+        plt.close(graphs[-1].fig)
+        return [path], errors
+    
+    # one job per figure: a single CSV in separate mode, n CSVs in subplot mode
+    size = n if mode == "subplot" else 1
+    sublists = [filelocations[i:i + size] for i in range(0, len(filelocations), size)]
+    paths = [os.path.join(out, "_".join(os.path.splitext(os.path.basename(i))[0] for i in sublist) + f".{fileFormat}") for sublist in sublists]
+    jobs = (sublists, paths, repeat(hasUnits), repeat(decimate), repeat(loadMode))
+    
+    if workers > 1 and len(sublists) > 1:
+        timings = currentRecorder()
+        job = partial(recorded, renderFigure) if timings.enabled else renderFigure    #the timings of a worker are sent back with its result
+        with ProcessPoolExecutor(min(workers, len(sublists))) as executor:
+            results = list(executor.map(job, *jobs, chunksize=4))
+        if timings.enabled:
+            for errors, spans in results:
+                timings.extend(spans)
+            results = [errors for errors, spans in results]
+    else:
+        results = list(map(renderFigure, *jobs))
+    
+    saved = [path for path, errors in zip(paths, results) if not errors]
+    return saved, [error for errors in results for error in errors]
+
+
+def main(argv=None):
+    """Opens the GUI, or renders a folder of CSVs without it when called as:
+    python -m csv_grapher render <dir> --mode same|separate|subplot --n 2..4 --out <dir>
+    Either can be given --profile [file] to time the stages of every job, see timing.profiling
+
+    Args:
+        argv (list, optional): command line arguments. Defaults to sys.argv[1:].
+    """
+    freeze_support()    #lets worker processes start from the PyInstaller executable
+    argv = sys.argv[1:] if argv is None else argv
+    
+    options = argparse.ArgumentParser(add_help=False)   #options of both the GUI and render
+    options.add_argument("--profile", nargs="?", const="csv_grapher_trace.json", metavar="FILE",
+                         help="time every stage (read, parse, plot, draw...) and save the timings to FILE when done: a trace if it ends in .json (default csv_grapher_trace.json), otherwise a cProfile report")
+    if argv[:1] != ["render"]:
+        args, _ = options.parse_known_args(argv)
+        with profiling(args.profile):
+            runGUI()
+        return
+    
+    parser = argparse.ArgumentParser(prog="python -m csv_grapher render", description="Renders every CSV in a folder to images without opening the GUI", parents=[options])
+    parser.add_argument("folder", help="folder containing the CSVs")
+    parser.add_argument("--mode", choices=("same", "separate", "subplot"), default="separate")
+    parser.add_argument("--n", type=int, choices=(2, 3, 4), default=2, help="number of plots per figure in subplot mode")
+    parser.add_argument("--out", default=".", help="folder the images are saved to")
+    parser.add_argument("--format", choices=("png", "svg"), default="png")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (default: 1)")
+    parser.add_argument("--no-units", action="store_true", help="the 2nd row of the CSVs contains data instead of units")
+    parser.add_argument("--no-decimate", action="store_true", help="plot every point of large traces")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the parsed CSV cache")
+    parser.add_argument("--load", choices=("memory", "memmap", "stream", "compact"), default="memory",
+                        help="memmap: convert CSVs to raw column files in the cache and memory-map them. stream: read CSVs a chunk at a time and plot their min/max envelope (for captures larger than memory). compact: float32 y values and evenly spaced x values stored as a start and step (half the memory)")
+    args = parser.parse_args(argv[1:])
+    
+    if args.no_cache:
+        os.environ["CSV_GRAPHER_NO_CACHE"] = "1"    #also seen by the worker processes
+        cache.enabled = False
+    
+    with profiling(args.profile) as timings:
+        saved, errors = render(args.folder, args.mode, args.n, args.out, not args.no_units, args.format, not args.no_decimate, args.workers, args.load)
+    if timings is not None:
+        print(timings.summary(), file=sys.stderr)
+    for path in saved:
+        print(path)
+    for filelocation, error in errors:
+        print(f"{filelocation}: {error}", file=sys.stderr)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
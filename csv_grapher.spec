@@ -6,11 +6,16 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # pandas and matplotlib are imported through lazy_import.lazyModule, which PyInstaller cannot see
+    hiddenimports=['pandas', 'matplotlib.pyplot', 'matplotlib.backends.backend_tkagg', 'matplotlib.backends.backend_agg', 'matplotlib.backends.backend_svg'],
     hookspath=[],
-    hooksconfig={},
+    # only the Tk backend (PySimpleGUI's toolkit) and the image backends are used
+    hooksconfig={'matplotlib': {'backends': ['TkAgg', 'Agg', 'SVG']}},
     runtime_hooks=[],
-    excludes=[],
+    # other GUI toolkits, notebooks and test suites that the libraries can use but this program never does
+    excludes=['PyQt5', 'PyQt6', 'PySide2', 'PySide6', 'wx', 'gi', 'IPython', 'ipykernel', 'jupyter_client', 'notebook',
+              'matplotlib.tests', 'numpy.tests', 'pandas.tests', 'pytest', 'test', 'tkinter.test', 'scipy', 'sqlalchemy',
+              'openpyxl', 'xlsxwriter', 'lxml', 'bs4', 'html5lib', 'tables', 'jinja2', 'sphinx', 'docutils'],
     noarchive=False,
 )
 pyz = PYZ(a.pure)
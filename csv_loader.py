@@ -0,0 +1,272 @@
+"""Reading of oscilloscope and regular CSV files into typed pandas dataframes.
+Kept apart from csv_grapher.py so it can be used without the GUI.
+Every reader ends with the same cleaning stage, cleanRows, so blank and partial rows never reach the graphs.
+"""
+
+import importlib.util
+import io
+
+import numpy as np
+
+from lazy_import import lazyModule
+from timing import readSpan, span
+
+pd = lazyModule("pandas")   #imported on first use, see lazy_import
+
+# pyarrow parses in parallel and is much faster on large captures, the C engine is the fallback
+ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+numberPattern = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"   #a decimal number as scopes write them, e.g. +37.015077E-03
+
+
+def readHeader(file, hasUnits):
+    """Reads the field row and, for oscilloscope files, the units row from an open binary stream.
+    The stream is left positioned at the first data row.
+
+    Args:
+        file: CSV file opened in binary mode
+        hasUnits (bool): whether the 2nd row contains units instead of data
+
+    Returns:
+        tuple: list of fields and list of units (empty if hasUnits is False)
+    """
+    fields = [i.strip() for i in file.readline().decode().split(",")]
+    if not fields[0]:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    units = [i.strip() for i in file.readline().decode().split(",")] if hasUnits else []
+    return fields, units
+
+
+def columnTypes(columns, dtype):
+    """numpy type of every loaded column: dtype for the y columns, but always float64 for the x column
+    as float32 cannot tell apart the times of a long capture (about 7 significant digits)
+
+    Args:
+        columns (list): names of the loaded columns, the x column first
+        dtype: numpy float type of the y columns
+
+    Returns:
+        dict: type by column name
+    """
+    return dict(zip(columns, [np.float64] + [dtype] * (len(columns) - 1)))
+
+
+def emptyRows(columns, dtype):
+    """Dataframe of typed columns without any rows, for a CSV with nothing but its header"""
+    data = pd.DataFrame({i: np.empty(0, dtype=columnType) for i, columnType in columnTypes(columns, dtype).items()})
+    data.attrs["removedRows"] = 0
+    return data
+
+
+def loadCSV(filename, hasUnits, yColumns=None, dtype=np.float64, engine=ENGINE):
+    """Reads a CSV file in a single pass. The header (and units row) is parsed from the same
+    buffered stream that is handed to pandas, so the file is only read once.
+    A file with text where a number should be is read again a block at a time, see readCSVChunks and parseDamaged.
+
+    Args:
+        filename (str): file path of CSV to be read
+        hasUnits (bool): whether the 2nd row contains units instead of data
+        yColumns (list, optional): y fields to load. Defaults to every y field in the file.
+        dtype (optional): numpy float type of the loaded y columns (np.float32 or np.float64), see columnTypes
+        engine (str, optional): pandas parser engine ("pyarrow" or "c")
+
+    Returns:
+        tuple: list of fields, list of units and a dataframe holding the x column and the selected y columns,
+            without the incomplete rows (their number is in data.attrs["removedRows"], see cleanRows)
+    """
+    with open(filename, "rb") as opened, readSpan(opened) as file:     #times the parsing, and the reads it waits for as a stage of their own
+        fields, units = readHeader(file, hasUnits)
+        columns = [fields[0]] + [i for i in fields[1:] if yColumns is None or i in yColumns]
+
+        if not file.peek(1):    #header only, nothing left for the parser
+            data = emptyRows(columns, dtype)
+        else:
+            try:
+                data = parseRows(file, fields, columns, dtype, engine)
+            except ValueError:  #text where a number should be, or a row cut short
+                data = None
+    
+    if data is None:    #read again a block at a time, so only the damaged blocks are parsed as text
+        with span("parse"):
+            chunks = [chunk for _, _, chunk in readCSVChunks(filename, hasUnits, yColumns=yColumns, dtype=dtype, engine=engine)]
+            data = pd.concat(chunks, ignore_index=True)
+        data.attrs["removedRows"] = sum(chunk.attrs["removedRows"] for chunk in chunks)
+        return fields, units, data
+    return fields, units, cleanRows(data)
+
+
+def parseRows(source, fields, columns, dtype, engine=ENGINE):
+    """Parses data rows straight into typed columns, the fast path for files that are not damaged
+
+    Args:
+        source: binary stream positioned at the first data row
+        fields (list): names of every column in the file
+        columns (list): names of the columns to be kept
+        dtype: numpy float type of the loaded y columns
+        engine (str, optional): pandas parser engine ("pyarrow" or "c")
+
+    Raises:
+        ValueError: if a field holds text that is not a number, or (pyarrow only) a row has the wrong number of fields
+
+    Returns:
+        pandas dataframe of the selected columns. Missing values are NaN.
+    """
+    if engine == "pyarrow":
+        return readArrow(source, fields, columns, dtype)
+    return pd.read_csv(source,
+                       header=None,
+                       names=fields,
+                       usecols=columns,
+                       dtype=columnTypes(columns, dtype),
+                       engine=engine)
+
+
+def parseDamaged(source, fields, columns, dtype):
+    """Parses data rows that parseRows cannot: every field is read as text and converted a whole column at a time,
+    with text that is not a number (a line cut short inside a number, a message from the scope) becoming NaN,
+    so the columns are float and never object. Missing fields are NaN and extra fields are ignored, so a row
+    cut short keeps the channels it has, whether or not pyarrow is installed.
+
+    Args:
+        source: binary stream positioned at the first data row
+        fields (list): names of every column in the file
+        columns (list): names of the columns to be kept
+        dtype: numpy float type of the loaded y columns
+
+    Returns:
+        pandas dataframe of the selected columns
+    """
+    types = columnTypes(columns, dtype)
+    if ENGINE != "pyarrow":
+        start = source.tell()
+        try:
+            text = pd.read_csv(source, header=None, names=fields, usecols=columns, dtype=str, engine="c")
+        except pd.errors.ParserError:   #no row has every field, so the C parser cannot pick the columns out
+            source.seek(start)
+            text = pd.read_csv(source, header=None, names=fields, dtype=str, engine="c")
+        data = pd.DataFrame({i: pd.to_numeric(text[i], errors="coerce").to_numpy(dtype=types[i], na_value=np.nan) for i in columns})
+        data.attrs["removedRows"] = 0
+        return data
+    
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pacsv
+
+    # every line is read as a single text field and split here, as pyarrow can only skip a row with the wrong number of fields.
+    # Padding every line with a comma per field gives short rows their missing fields, and extra fields are never picked.
+    lines = pacsv.read_csv(source,
+                           read_options=pacsv.ReadOptions(column_names=["line"]),
+                           parse_options=pacsv.ParseOptions(delimiter="\x1f", quote_char=False),
+                           convert_options=pacsv.ConvertOptions(column_types={"line": pa.string()}))["line"]
+    split = pc.split_pattern(pc.binary_join_element_wise(lines, "," * (len(fields) - 1), ""), ",")
+    data = {}
+    for i in columns:
+        text = pc.utf8_trim_whitespace(pc.list_element(split, fields.index(i)))
+        numbers = pc.if_else(pc.match_substring_regex(text, numberPattern), text, pa.scalar(None, pa.string()))
+        data[i] = pc.cast(numbers, pa.from_numpy_dtype(np.dtype(types[i]))).to_numpy(zero_copy_only=False)     #nulls become NaN
+    data = pd.DataFrame(data, copy=False)
+    data.attrs["removedRows"] = 0
+    return data
+
+
+def cleanRows(data):
+    """Cleaning stage of every reader, one vectorized pass over the columns: drops the incomplete rows, those without an x value
+    or without any y value, e.g. the rows scopes export with an empty y value or the last line of an interrupted capture.
+    Rows missing only some of their y values are kept, with NaN for the missing ones, which the graphs leave as gaps.
+
+    Args:
+        data (pd.DataFrame): parsed rows, the x column first. data.attrs["removedRows"] (rows the parser skipped) is added to.
+
+    Returns:
+        pd.DataFrame: the complete rows, with the number of rows removed in data.attrs["removedRows"]
+    """
+    incomplete = np.isnan(data[data.columns[0]].to_numpy())
+    if len(data.columns) > 1:
+        missing = np.ones(len(data), dtype=bool)
+        for column in data.columns[1:]:
+            missing &= np.isnan(data[column].to_numpy())
+        incomplete |= missing
+    removed = int(np.count_nonzero(incomplete))
+    if removed:
+        data = data[~incomplete].reset_index(drop=True)
+    data.attrs["removedRows"] = data.attrs.get("removedRows", 0) + removed
+    return data
+
+
+def parseBlock(block, fields, columns, dtype, engine="c"):
+    """Parses and cleans a block of complete lines, falling back to parseDamaged if the block is damaged
+
+    Args:
+        block (bytes): data rows
+        fields (list): names of every column in the file
+        columns (list): names of the columns to be kept
+        dtype: numpy float type of the loaded y columns
+        engine (str, optional): pandas parser engine of the fast path ("pyarrow" or "c")
+
+    Returns:
+        pandas dataframe of the complete rows, see cleanRows
+    """
+    try:
+        data = parseRows(io.BytesIO(block), fields, columns, dtype, engine)
+    except ValueError:
+        data = parseDamaged(io.BytesIO(block), fields, columns, dtype)
+    return cleanRows(data)
+
+
+def readArrow(file, fields, columns, dtype):
+    """Parses the data rows of an open stream with pyarrow's multithreaded CSV reader.
+    pyarrow is called directly since pandas' pyarrow engine mislabels columns when usecols and names are combined.
+
+    Args:
+        file: CSV file opened in binary mode, positioned at the first data row
+        fields (list): names of every column in the file
+        columns (list): names of the columns to be kept
+        dtype: numpy float type of the loaded y columns
+
+    Returns:
+        pandas dataframe of the selected columns
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    table = pacsv.read_csv(file,
+                           read_options=pacsv.ReadOptions(column_names=fields),
+                           convert_options=pacsv.ConvertOptions(include_columns=columns,
+                                                                column_types={i: pa.from_numpy_dtype(np.dtype(columnType)) for i, columnType in columnTypes(columns, dtype).items()}))
+    return table.to_pandas()
+
+
+def readCSVChunks(filename, hasUnits, chunkRows=1_000_000, yColumns=None, dtype=np.float64, engine="c"):
+    """Reads a CSV a chunk of rows at a time so memory use is bounded by the chunk size instead of the file size.
+    Every chunk is a block of whole lines parsed on its own, so a damaged block does not stop the rest from being read fast.
+
+    Args:
+        filename (str): file path of CSV to be read
+        hasUnits (bool): whether the 2nd row contains units instead of data
+        chunkRows (int, optional): approximate number of rows in each chunk, from the length of the first lines
+        yColumns (list, optional): y fields to load. Defaults to every y field in the file.
+        dtype (optional): numpy float type of the loaded y columns, see columnTypes
+        engine (str, optional): pandas parser engine of the blocks ("pyarrow" or "c")
+
+    Yields:
+        tuple: list of fields, list of units and a dataframe of the complete rows of the next chunk, see parseBlock.
+            The index of a chunk carries on from the previous one.
+    """
+    with open(filename, "rb") as file:
+        fields, units = readHeader(file, hasUnits)
+        columns = [fields[0]] + [i for i in fields[1:] if yColumns is None or i in yColumns]
+        sample = file.peek(1)
+        blockBytes = max(chunkRows * len(sample) // max(sample.count(b"\n"), 1), 1)
+        rows = 0
+        chunks = 0
+        while block := file.read(blockBytes):
+            block += file.readline()    #up to the end of the line the block stopped in
+            if not block.isspace():     #blank lines are not rows
+                chunk = parseBlock(block, fields, columns, dtype, engine)
+                del block   #not kept alive while the caller works on the chunk
+                chunk.index = pd.RangeIndex(rows, rows + len(chunk))
+                rows += len(chunk)
+                chunks += 1
+                yield fields, units, chunk
+        
+        if not chunks:  #header only, a single empty chunk so the fields and units still reach the caller
+            yield fields, units, emptyRows(columns, dtype)
@@ -0,0 +1,132 @@
+"""Streaming reader for CSV files larger than memory.
+The file is read a chunk of rows at a time and only aggregates are kept: the min/max envelope of every y field
+(the same buckets downsample.minMaxIndices would use on the whole file) and running statistics.
+Memory use is bounded by the chunk size and the number of buckets, not by the size of the file.
+"""
+
+import numpy as np
+
+from csv_loader import readCSVChunks
+from downsample import bucketExtremes
+from lazy_import import lazyModule
+
+pd = lazyModule("pandas")   #imported on first use, see lazy_import
+
+
+def countRows(filename, hasUnits, blockSize=2**24):
+    """Counts the data rows of a CSV by counting line breaks, without parsing it
+
+    Args:
+        filename (str): file path of CSV
+        hasUnits (bool): whether the 2nd row contains units instead of data
+        blockSize (int, optional): bytes read at a time
+
+    Returns:
+        int: number of data rows
+    """
+    lines = 0
+    last = b"\n"
+    with open(filename, "rb") as file:
+        while block := file.read(blockSize):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":   #the last line has no line break
+        lines += 1
+    return max(lines - (2 if hasUnits else 1), 0)
+
+
+class RunningStats:
+    def __init__(self):
+        """Running min, max, mean and RMS of a column, updated one chunk at a time. NaNs are ignored."""
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+    
+    def update(self, values):
+        values = values[~np.isnan(values)].astype(np.float64, copy=False)
+        if len(values):
+            self.count += len(values)
+            self.total += values.sum()
+            self.squares += np.dot(values, values)
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+    
+    def result(self):
+        """Returns: dict of count, min, max, mean and rms (NaN when there were no values)"""
+        if not self.count:
+            return {"count": 0, "min": np.nan, "max": np.nan, "mean": np.nan, "rms": np.nan}
+        return {"count": self.count, "min": float(self.min), "max": float(self.max),
+                "mean": float(self.total / self.count), "rms": float(np.sqrt(self.squares / self.count))}
+
+
+def streamCSV(filename, hasUnits, buckets=4000, chunkRows=1_000_000, dtype=np.float64):
+    """Reads a CSV a chunk at a time into a reduced series that can be plotted instead of the full table
+
+    Args:
+        filename (str): file path of CSV to be read
+        hasUnits (bool): whether the 2nd row contains units instead of data
+        buckets (int, optional): number of min/max buckets of the envelope
+        chunkRows (int, optional): rows read at a time, which bounds the memory used
+        dtype (optional): numpy float type the columns are parsed as
+
+    Returns:
+        tuple: list of fields, list of units, a dataframe of the rows holding the min or max of a bucket of any y field
+            (plus the first and last rows), and a dict of running statistics (count, min, max, mean, rms) for every y field.
+            The incomplete rows removed from the whole file are counted in data.attrs["removedRows"], see csv_loader.cleanRows
+    """
+    n = countRows(filename, hasUnits)
+    size = -(-n // buckets) if n > 2 * buckets else None    #same buckets as downsample.minMaxIndices on the whole file
+    kept = []   #rows of the envelope found so far, indexed by their row number in the file
+    stats = None
+    remainder = None    #rows at the end of a chunk that do not fill a whole bucket yet
+    removed = 0
+    last = None     #last chunk with any rows
+    
+    for fields, units, chunk in readCSVChunks(filename, hasUnits, chunkRows, dtype=dtype):
+        removed += chunk.attrs["removedRows"]
+        if stats is None:
+            yFields = list(chunk.columns[1:])
+            stats = {yField: RunningStats() for yField in yFields}
+        if last is None:
+            kept.append(chunk.iloc[:1])     #the first row, or the columns of a file without complete rows
+        if not len(chunk):
+            continue
+        last = chunk
+        for yField in yFields:
+            stats[yField].update(chunk[yField].to_numpy())
+        
+        if size is None:    #small enough to keep whole
+            kept.append(chunk)
+            continue
+        rows = chunk if remainder is None else pd.concat([remainder, chunk])
+        full = len(rows) // size * size
+        if full:
+            kept.append(envelopeRows(rows.iloc[:full], yFields, size))
+        remainder = rows.iloc[full:]
+    
+    if remainder is not None and len(remainder):    #the last, shorter bucket
+        kept.append(envelopeRows(remainder, yFields, size))
+    if last is not None:
+        kept.append(last.iloc[-1:])
+    
+    data = pd.concat(kept)
+    data = data[~data.index.duplicated()].sort_index().reset_index(drop=True)
+    data.attrs["removedRows"] = removed
+    return fields, units, data, {yField: stats[yField].result() for yField in yFields}
+
+
+def envelopeRows(rows, yFields, size):
+    """Rows holding the min or max of a bucket of any y field
+
+    Args:
+        rows (pd.DataFrame): whole buckets of rows, except at the end of the file
+        yFields (list): y fields of the envelope
+        size (int): number of rows in a bucket
+
+    Returns:
+        pd.DataFrame: the rows of the envelope, in file order
+    """
+    indices = [bucketExtremes(rows[yField].to_numpy(), size) for yField in yFields]
+    return rows.iloc[np.unique(np.concatenate(indices))]
@@ -0,0 +1,183 @@
+"""Min/max decimation of large traces so that plots stay interactive.
+Each line only receives about 2 points per pixel of axes width (the minimum and maximum
+of every pixel-wide bucket), which keeps peaks and glitches visible. The full resolution
+arrays are kept so the visible window can be recomputed when the user zooms or pans.
+"""
+
+import mmap
+
+import numpy as np
+
+from uniform_axis import UniformAxis, asArray
+
+chunkSize = 2**22    #samples processed at a time, bounds temporary arrays and the resident pages of memory-mapped data
+
+
+def minMaxIndices(y, buckets):
+    """Finds the indices of the minimum and maximum of every bucket of y
+
+    Args:
+        y (np.ndarray): y values of the trace
+        buckets (int): number of buckets (usually the axes width in pixels)
+
+    Returns:
+        np.ndarray: sorted, unique indices into y. Always contains the first and last sample.
+    """
+    n = len(y)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    
+    size = -(-n // buckets)     #ceiling division so there are at most `buckets` buckets
+    step = max(chunkSize // size, 1) * size     #whole buckets per chunk
+    indices = [np.array([0, n - 1])]
+    for start in range(0, n, step):
+        chunk = y[start:start + step]
+        indices.append(bucketExtremes(chunk, size) + start)
+        releasePages(chunk)
+    return np.unique(np.concatenate(indices))
+
+
+def bucketExtremes(y, size):
+    """Indices of the minimum and maximum of every bucket of `size` samples. The last bucket may be shorter."""
+    # NaNs would otherwise win every argmin/argmax and hide the real extremes of their bucket
+    nans = np.isnan(y)
+    if nans.any():
+        low = np.where(nans, np.inf, y)
+        high = np.where(nans, -np.inf, y)
+    else:
+        low = high = y
+    
+    full = len(y) // size   #number of complete buckets, the rest is a shorter tail bucket
+    offsets = np.arange(full) * size
+    indices = [low[:full * size].reshape(full, size).argmin(axis=1) + offsets,
+               high[:full * size].reshape(full, size).argmax(axis=1) + offsets]
+    if full * size < len(y):
+        indices.append([low[full * size:].argmin() + full * size, high[full * size:].argmax() + full * size])
+    return np.concatenate(indices)
+
+
+def isSorted(x):
+    """Checks that x is in ascending order, a chunk at a time"""
+    if isinstance(x, UniformAxis):
+        return True     #its step is always positive
+    for start in range(0, len(x), chunkSize):
+        chunk = x[start:start + chunkSize + 1]  #overlaps the next chunk by one sample
+        if not np.all(chunk[1:] >= chunk[:-1]):
+            return False
+        releasePages(chunk)
+    return True
+
+
+def releasePages(array):
+    """Drops the resident pages of a view into a memory-mapped file once it has been scanned. They are read back
+    from disk if needed again, so scanning a capture larger than memory does not grow the memory of the process.
+    Does nothing for arrays that are not memory-mapped or where the OS has no madvise.
+
+    Args:
+        array (np.ndarray): contiguous view that may be backed by a memory-mapped file
+    """
+    mapped = array
+    while mapped is not None and not isinstance(mapped, mmap.mmap):  #the mmap is at the end of the chain of views
+        mapped = getattr(mapped, "_mmap", None) or getattr(mapped, "base", None)
+    if mapped is None or not hasattr(mapped, "madvise") or not array.flags.c_contiguous:
+        return
+    
+    start = array.ctypes.data - np.frombuffer(mapped, dtype=np.uint8).ctypes.data
+    first = start - start % mmap.PAGESIZE   #madvise needs a page aligned start
+    mapped.madvise(mmap.MADV_DONTNEED, first, min(start + array.nbytes, len(mapped)) - first)
+
+
+def decimate(x, y, buckets, xlim=None):
+    """Reduces a trace to the min/max envelope of the part that is visible
+
+    Args:
+        x (np.ndarray): x values of the trace, sorted in ascending order (or a UniformAxis)
+        y (np.ndarray): y values of the trace
+        buckets (int): number of buckets (usually the axes width in pixels)
+        xlim (tuple, optional): visible x range. Defaults to the whole trace.
+
+    Returns:
+        tuple: decimated x and y arrays
+    """
+    start, stop = 0, len(x)
+    if xlim is not None:
+        # one extra sample on each side so the line runs to the edge of the axes
+        start = max(np.searchsorted(x, min(xlim), side="left") - 1, 0)
+        stop = min(np.searchsorted(x, max(xlim), side="right") + 1, len(x))
+    indices = minMaxIndices(y[start:stop], buckets) + start
+    return gather(x, indices, start, stop), gather(y, indices, start, stop)
+
+
+def gather(array, indices, start, stop):
+    """array[indices] for sorted indices between start and stop, taken a chunk at a time.
+    Gathering faults in the pages around every sample of a memory-mapped array, so they are released as it goes.
+    """
+    if isinstance(array, UniformAxis):
+        return array[indices]   #only the gathered values are generated
+    gathered = np.empty(len(indices), dtype=array.dtype)
+    for low in range(start, stop, chunkSize):
+        first, last = np.searchsorted(indices, [low, low + chunkSize])
+        gathered[first:last] = array[indices[first:last]]
+        releasePages(array[low:low + chunkSize])
+    return gathered
+
+
+class DecimatedLine:
+    def __init__(self, ax, x, y, line=None, **kwargs):
+        """Plots a decimated copy of a trace and keeps the full resolution data to recompute it from
+
+        Args:
+            ax (Axes): axes to plot on
+            x (array-like): full resolution x values
+            y (array-like): full resolution y values
+            line (Line2D, optional): already plotted line to decimate instead of plotting a new one
+            **kwargs: passed on to ax.plot
+        """
+        self.x = asArray(x)
+        self.y = np.asarray(y)
+        self.isSorted = isSorted(self.x)   #the visible window can only be searched on sorted x
+        if line is None:
+            self.line, = ax.plot(*decimate(self.x, self.y, pixelWidth(ax)), **kwargs)
+        else:
+            self.line = line
+            self.refresh()
+    
+    def setData(self, x, y, ordered):
+        """Replaces the full resolution data, e.g. when rows are appended to a followed file, and recomputes the decimated data
+
+        Args:
+            x (np.ndarray): full resolution x values
+            y (np.ndarray): full resolution y values
+            ordered (bool): whether x is in ascending order, known by the caller so it is not rescanned
+        """
+        self.x, self.y, self.isSorted = x, y, ordered
+        self.refresh()
+    
+    def refresh(self):
+        """Recomputes the decimated data for the current x limits and width of the axes"""
+        ax = self.line.axes
+        xlim = ax.get_xlim() if self.isSorted and not ax.get_autoscalex_on() else None
+        self.line.set_data(*decimate(self.x, self.y, pixelWidth(ax), xlim))
+
+
+def pixelWidth(ax):
+    """Width of an axes in display pixels, used as the number of decimation buckets"""
+    return max(int(ax.bbox.width), 1)
+
+
+def connectDecimation(ax, decimatedLines):
+    """Recomputes the decimated lines of an axes whenever it is zoomed, panned or resized
+
+    Args:
+        ax (Axes): axes holding the lines
+        decimatedLines (list): DecimatedLine instances drawn on the axes
+
+    Returns:
+        int: id of the canvas resize connection, for mpl_disconnect. The zoom connection goes away with the axes.
+    """
+    def refreshAll(_):
+        for decimatedLine in decimatedLines:
+            decimatedLine.refresh()
+    
+    ax.callbacks.connect("xlim_changed", refreshAll)
+    return ax.figure.canvas.mpl_connect("resize_event", refreshAll)
@@ -0,0 +1,83 @@
+"""Lazy imports of the heavy libraries (pandas, matplotlib), so the GUI window opens without waiting for them.
+    pd = lazyModule("pandas")
+puts a placeholder module in sys.modules that imports pandas the first time one of its attributes is used,
+e.g. pd.read_csv, and every later `import pandas` gets the same module. The GUI imports them with warmup
+on a background thread while the window is open, so they are usually ready by the time OK is pressed.
+Lazy modules are safe to use from several threads: the first use imports the module under a lock, and other
+threads wait for the import to finish instead of seeing a half imported module.
+"""
+
+import importlib.util
+import sys
+import threading
+import types
+
+importLock = threading.RLock()  #held while a lazy module is imported, reentrant as importing one can use another
+importing = set()   #ids of the lazy modules being imported by the thread holding importLock
+
+
+class LazyModule(types.ModuleType):
+    def __getattribute__(self, name):
+        """Imports the module the first time one of its attributes is used, then returns the attribute.
+        importlib.util.LazyLoader is not used as it is not thread-safe before Python 3.12.
+        """
+        with importLock:
+            if type(self) is LazyModule and id(self) not in importing:     #not imported by another thread while this one waited
+                importing.add(id(self))
+                try:
+                    types.ModuleType.__getattribute__(self, "__spec__").loader.exec_module(self)
+                    self.__class__ = types.ModuleType   #later uses are plain attribute lookups
+                finally:
+                    importing.discard(id(self))
+        return types.ModuleType.__getattribute__(self, name)    #the module's own code reads its attributes while it is imported
+
+
+def findSpec(name, path):
+    """Module spec from the import system's finders, the same ones `import` uses (including PyInstaller's)"""
+    for finder in sys.meta_path:
+        spec = finder.find_spec(name, path) if hasattr(finder, "find_spec") else None
+        if spec is not None:
+            return spec
+    raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+
+def lazyModule(name):
+    """Returns a module that is only imported when one of its attributes is first used.
+    The parent packages of a submodule are lazy as well. A module that is already imported is returned as it is.
+
+    Args:
+        name (str): full name of the module, e.g. "matplotlib.pyplot"
+
+    Raises:
+        ModuleNotFoundError: if the module is not installed (checked straight away, the module is not run)
+
+    Returns:
+        module
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    parentName, _, childName = name.rpartition(".")
+    parent = lazyModule(parentName) if parentName else None
+    # object.__getattribute__ reads the parent without importing it, as any attribute of a lazy module would
+    spec = findSpec(name, object.__getattribute__(parent, "__spec__").submodule_search_locations if parent else None)
+    module = importlib.util.module_from_spec(spec)
+    module.__class__ = LazyModule   #after module_from_spec, which reads the module's attributes
+    sys.modules[name] = module
+    if parent is not None:
+        object.__getattribute__(parent, "__dict__")[childName] = module     #like import does, kept once the parent is imported
+    return module
+
+
+def warmup(*modules):
+    """Imports lazy modules on a background thread so they are ready by the time they are used.
+    Using one of them while it is still being imported waits for the import to finish.
+
+    Args:
+        modules: modules returned by lazyModule
+
+    Returns:
+        threading.Thread: the thread importing the modules
+    """
+    thread = threading.Thread(target=lambda: [getattr(module, "__name__") for module in modules], name="warmup", daemon=True)
+    thread.start()
+    return thread
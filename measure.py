@@ -0,0 +1,383 @@
+"""Oscilloscope style measurements of traces: min, max, Vpp, mean, RMS, frequency, period, rise and fall time and duty cycle.
+Every measurement is a handful of vectorized passes over the samples, so the visible part of a capture can be
+measured again each time the graph is zoomed or panned.
+
+Edges are found with hysteresis between the 10% and 90% levels of the trace, taken between its base and top like a scope
+does (the most common values near its minimum and maximum), so noise on a flat part of the trace is not counted as an edge. Rise and fall times are the mean time between the
+10% and 90% crossings of every edge, each level taken as crossed halfway between its first and last crossing on the edge
+so noise does not shorten them (see edgeTime), and the frequency, period and duty cycle come from the 50% crossings.
+"""
+
+import numpy as np
+
+from downsample import isSorted
+from lazy_import import lazyModule
+from uniform_axis import asArray
+
+pd = lazyModule("pandas")   #imported on first use, see lazy_import
+
+measurementNames = ["min", "max", "vpp", "mean", "rms", "frequency", "period", "rise", "fall", "duty"]
+lowLevel, highLevel = 0.1, 0.9  #fractions of the peak to peak range edges are measured between
+chunkSize = 2**16   #samples scanned at a time, small enough to stay in the CPU cache while every pass is made over them
+
+
+def measureTrace(x, y, xlim=None):
+    """Measures a trace
+
+    Args:
+        x (np.ndarray): x values of the trace, in ascending order (or a UniformAxis)
+        y (np.ndarray): y values of the trace
+        xlim (tuple, optional): x range to measure. Defaults to the whole trace.
+
+    Returns:
+        dict: value of every measurement in measurementNames. The timing measurements are NaN when the trace
+            does not have enough edges, and every measurement is NaN when there are no samples.
+    """
+    x, y = asArray(x), np.asarray(y)
+    start, stop = 0, len(x)
+    if xlim is not None:
+        start, stop = np.searchsorted(x, min(xlim), side="left"), np.searchsorted(x, max(xlim), side="right")
+    x, y = x[start:stop], y[start:stop]     #only the measured part of a UniformAxis is generated
+    
+    result = dict.fromkeys(measurementNames, np.nan)
+    if not len(y):
+        return result
+    low, high, total, squares = sampleStats(y)
+    if np.isnan(low):   #only pay for a copy when there are NaNs
+        finite = ~np.isnan(y)
+        x, y = x[finite], y[finite]
+        if not len(y):
+            return result
+        low, high, total, squares = sampleStats(y)
+    
+    result.update({"min": float(low), "max": float(high), "vpp": float(high - low),
+                   "mean": total / len(y), "rms": float(np.sqrt(squares / len(y)))})
+    if high > low:
+        result.update(edgeTimes(x, y, low, high))
+    return result
+
+
+def sampleStats(y):
+    """Minimum, maximum, sum and sum of squares of y, a chunk at a time so every sample is only read from memory once
+
+    Returns:
+        tuple: the minimum and maximum (NaN if y contains NaNs), sum and sum of squares
+    """
+    lows, highs, total, squares = [], [], 0.0, 0.0
+    for start in range(0, len(y), chunkSize):
+        chunk = y[start:start + chunkSize].astype(np.float64, copy=False)   #sums of float32 samples lose precision
+        lows.append(chunk.min())
+        highs.append(chunk.max())
+        total += chunk.sum()
+        squares += np.dot(chunk, chunk)
+    return np.min(lows), np.max(highs), float(total), float(squares)
+
+
+def edgeTimes(x, y, low, high):
+    """Frequency, period, rise and fall time and duty cycle of a trace from its edges
+
+    Args:
+        x (np.ndarray): x values of the trace, in ascending order
+        y (np.ndarray): y values of the trace, without NaNs
+        low (float): minimum of y
+        high (float): maximum of y
+
+    Returns:
+        dict: the timing measurements that could be made
+    """
+    base, top = stateLevels(y, low, high)
+    levels = base + (top - base) * np.array([lowLevel, 0.5, highLevel])
+    
+    # runs of samples at or below the 10% level, at or above the 90% level and below the 50% level
+    (belowStarts, belowEnds), (aboveStarts, aboveEnds), (downward, upward) = levelRuns(
+        y, [(np.less_equal, levels[0]), (np.greater_equal, levels[2]), (np.less, levels[1])])
+    
+    # an edge is a run above whose previous run was below (rising), or the other way around (falling)
+    rising = edges(aboveStarts, belowEnds, aboveEnds)
+    falling = edges(belowStarts, aboveEnds, belowEnds)
+    
+    #the 50% level is crossed downward just before a run below it starts, and upward just after one ends
+    downward, upward = downward[downward > 0] - 1, upward[upward < len(y) - 1]  #samples followed by a crossing
+    
+    result = {}
+    if rising.size:
+        result["rise"] = edgeTime(x, y, rising, belowEnds, aboveStarts, downward, levels[0], levels[2])
+    if falling.size:
+        result["fall"] = edgeTime(x, y, falling, aboveEnds, belowStarts, upward, levels[2], levels[0])
+    
+    # the first crossing of the 50% level after the edge leaves the 10% (or 90%) level
+    risingTimes = crossing(x, y, upward[np.searchsorted(upward, rising[0])], levels[1])
+    fallingTimes = crossing(x, y, downward[np.searchsorted(downward, falling[0])], levels[1])
+    times = risingTimes if len(risingTimes) >= len(fallingTimes) else fallingTimes
+    if len(times) < 2:
+        return result
+    
+    period = (times[-1] - times[0]) / (len(times) - 1)
+    result.update({"frequency": float(1 / period), "period": float(period)})
+    if len(risingTimes) >= 2 and len(fallingTimes):
+        # high time of every period, from a rising crossing to the falling crossing after it
+        periods = np.diff(risingTimes)
+        nextFalling = fallingTimes[np.minimum(np.searchsorted(fallingTimes, risingTimes[:-1]), len(fallingTimes) - 1)]
+        highTime = nextFalling - risingTimes[:-1]
+        complete = (highTime > 0) & (highTime < periods)    #the falling crossing is inside the period
+        if complete.any():
+            result["duty"] = float(highTime[complete].sum() / periods[complete].sum())
+    return result
+
+
+def edgeTime(x, y, edges, startEnds, endStarts, bounds, startLevel, endLevel):
+    """Mean time the edges take from one level to the other. Noise can make an edge cross a level several times, and
+    taking the crossings nearest each other (the last one leaving the starting level, the first one reaching the ending
+    level) makes every edge look shorter than it is. Each level is taken as crossed halfway between its first and last
+    crossing in the direction of the edge. Crossings are counted up to an eighth of the edge's length away from it (about
+    as far as its base and top), and no further than halfway to the neighbouring edges, so noise on the flat parts of the
+    trace and the neighbouring edges are left out.
+
+    Args:
+        x (np.ndarray): x values of the trace, in ascending order
+        y (np.ndarray): y values of the trace, without NaNs
+        edges (np.ndarray): 2 x edges array from edges
+        startEnds (np.ndarray): last sample of every run at the level the edges start from
+        endStarts (np.ndarray): first sample of every run at the level the edges end at
+        bounds (np.ndarray): samples followed by a crossing of the 50% level in the other direction, i.e. the other edges
+        startLevel (float): level the edges start from
+        endLevel (float): level the edges end at
+
+    Returns:
+        float: mean time of the edges
+    """
+    first, last = edges
+    bounds = np.concatenate(([-1], bounds, [len(y)]))
+    length = (last - first) // 8
+    before = np.maximum(first - length, (bounds[np.searchsorted(bounds, first) - 1] + first) // 2)
+    after = np.minimum(last + length, (bounds[np.searchsorted(bounds, last)] + last) // 2)
+    earliest = startEnds[np.searchsorted(startEnds, before)]
+    latest = endStarts[np.searchsorted(endStarts, after, side="right") - 1]
+    start = (crossing(x, y, earliest, startLevel) + crossing(x, y, first, startLevel)) / 2
+    end = (crossing(x, y, last - 1, endLevel) + crossing(x, y, latest - 1, endLevel)) / 2
+    return float(np.mean(end - start))
+
+
+def stateLevels(y, low, high, bins=64, samples=2**16):
+    """Base and top of a trace: the most common value of the lowest and highest quarter of its range, estimated from an
+    evenly spaced sample. A quarter with no clear most common value (e.g. a triangle or sawtooth wave) uses the minimum
+    or maximum instead, as does one whose most common value is its outermost bin (e.g. a sine wave or a clean square wave).
+
+    Args:
+        y (np.ndarray): y values of the trace, without NaNs
+        low (float): minimum of y
+        high (float): maximum of y
+        bins (int, optional): number of histogram bins between low and high
+        samples (int, optional): most samples the histogram is made from
+
+    Returns:
+        tuple: base and top
+    """
+    sample = y[::max(len(y) // samples, 1)]
+    counts, bounds = np.histogram(sample, bins, (low, high))
+    centers = (bounds[:-1] + bounds[1:]) / 2
+    flat = 2 * len(sample) / bins   #twice the count of a bin of an evenly spread trace
+    base, top = counts[:bins // 4].argmax(), bins - bins // 4 + counts[bins - bins // 4:].argmax()
+    return (centers[base] if counts[base] > flat and base > 0 else low), (centers[top] if counts[top] > flat and top < bins - 1 else high)
+
+
+def levelRuns(y, tests):
+    """Finds the runs of samples that pass each of several tests against a level. y is scanned a chunk at a time,
+    every test being made on a chunk before moving to the next, and chunks overlap by one sample so that runs
+    crossing a chunk boundary are found.
+
+    Args:
+        y (np.ndarray): y values of the trace
+        tests (list): (comparison ufunc, level) of every test, e.g. (np.less_equal, 0.1)
+
+    Returns:
+        list: first and last sample of every run of each test. Runs cut off by either end of y are included.
+    """
+    changes = [[np.empty(0, dtype=np.intp)] for _ in tests]   #samples after which the result of a test changes
+    rises = [[np.empty(0, dtype=bool)] for _ in tests]  #whether each change starts a run, the others end one
+    for start in range(0, len(y) - 1, chunkSize):
+        chunk = y[start:start + chunkSize + 1]
+        for i, (test, level) in enumerate(tests):
+            mask = test(chunk, level)
+            change = np.flatnonzero(mask[:-1] != mask[1:])
+            changes[i].append(change + start)
+            rises[i].append(mask[change + 1])
+    
+    result = []
+    for (test, level), change, rise in zip(tests, changes, rises):
+        change, rise = np.concatenate(change), np.concatenate(rise)
+        starts, ends = change[rise] + 1, change[~rise]
+        if test(y[0], level):
+            starts = np.insert(starts, 0, 0)
+        if test(y[-1], level):
+            ends = np.append(ends, len(y) - 1)
+        result.append((starts, ends))
+    return result
+
+
+def edges(starts, previousEnds, sameEnds):
+    """Finds the runs that start an edge: runs whose previous run was at the other level
+
+    Args:
+        starts (np.ndarray): first sample of every run at the level the edge ends at
+        previousEnds (np.ndarray): last sample of every run at the level the edge starts from
+        sameEnds (np.ndarray): last sample of every run at the level the edge ends at
+
+    Returns:
+        np.ndarray: 2 x edges array of the last sample at the starting level and the first sample at the ending level
+    """
+    before = np.searchsorted(previousEnds, starts) - 1  #last run at the starting level before each run, -1 if none
+    same = np.searchsorted(sameEnds, starts) - 1    #last run at the ending level before each run, -1 if none
+    previous = np.append(previousEnds, -1)[before]
+    valid = (before >= 0) & (previous > np.append(sameEnds, -1)[same])   #the other level was left more recently
+    return np.array([previous[valid], starts[valid]], dtype=np.intp).reshape(2, -1)
+
+
+def crossing(x, y, i, level):
+    """Linearly interpolated x where y crosses level between samples i and i + 1"""
+    x0, y0 = x[i].astype(np.float64), y[i].astype(np.float64)
+    return x0 + (level - y0) * (x[i + 1] - x0) / (y[i + 1] - y0)
+
+
+def measure_capture(capture, xlim=None):
+    """Measures every y field of a capture
+
+    Args:
+        capture (Capture): capture to measure
+        xlim (tuple, optional): x range to measure. Defaults to the whole capture.
+
+    Returns:
+        pd.DataFrame: measurements (columns, see measurementNames) of every y field (rows)
+    """
+    x = capture.x
+    order = None
+    if not isSorted(x):
+        order = np.argsort(x, kind="stable")
+        x = x[order]
+    rows = {}
+    for yField in capture.yFields:
+        y = capture.columns[yField]
+        stats = capture.stats.get(yField) if capture.stats else None
+        rows[yField] = withStats(measureTrace(x, y if order is None else y[order], xlim), stats, xlim)
+    return pd.DataFrame.from_dict(rows, orient="index", columns=measurementNames)
+
+
+def withStats(measurements, stats, xlim):
+    """Replaces the min, max, mean and RMS measured from the envelope of a streamed capture with the ones
+    computed from every row while it was streamed. Only possible for the whole capture.
+
+    Args:
+        measurements (dict): result of measureTrace
+        stats (dict): statistics of the y field in Capture.stats, None for captures that were not streamed
+        xlim (tuple): x range that was measured, None for the whole capture
+
+    Returns:
+        dict: the measurements
+    """
+    if stats is not None and xlim is None:
+        measurements.update({key: stats[key] for key in ("min", "max", "mean", "rms")})
+        measurements["vpp"] = measurements["max"] - measurements["min"]
+    return measurements
+
+
+def measurementLabels(xUnit, yUnit):
+    """Row labels of a measurement table, with the units of the trace
+
+    Args:
+        xUnit (str): unit of the x values, empty if unknown
+        yUnit (str): unit of the y values, empty if unknown
+
+    Returns:
+        list: label of every measurement in measurementNames
+    """
+    units = {"frequency": frequencyUnit(xUnit), "period": xUnit, "rise": xUnit, "fall": xUnit, "duty": "%"}
+    names = {"vpp": "Pk-Pk", "rms": "RMS", "rise": "Rise time", "fall": "Fall time", "duty": "Duty cycle"}
+    labels = []
+    for name in measurementNames:
+        unit = units.get(name, yUnit)
+        labels.append(f"{names.get(name, name.capitalize())}" + (f" ({unit})" if unit else ""))
+    return labels
+
+
+def frequencyUnit(xUnit):
+    """Unit of frequencies of a trace whose x values are in xUnit, e.g. Hz for seconds. Empty if xUnit is."""
+    return "Hz" if xUnit.lower() in ("s", "sec", "second", "seconds") else f"1/{xUnit}" if xUnit else ""
+
+
+class MeasurementTable:
+    def __init__(self, ax, traces, xUnit="", yUnit="", width=0.3):
+        """Table of the measurements of the visible part of traces, drawn next to an axes and updated when it is zoomed or panned
+
+        Args:
+            ax (Axes): axes the traces are plotted on
+            traces (list): (capture title, y field, SampleIndex, stats) of every trace. The sorted full resolution samples
+                of the SampleIndex are measured, so a followed trace is measured up to its newest row. stats is the entry
+                of the y field in Capture.stats for streamed captures, otherwise None.
+            xUnit (str, optional): unit of the x values
+            yUnit (str, optional): unit of the y values of every trace
+            width (float, optional): width of the table as a fraction of the figure
+        """
+        self.ax = ax
+        self.traces = traces
+        self.units = (xUnit, yUnit)
+        self.fig = ax.figure
+        self.fig.subplots_adjust(right=0.97 - width)
+        self.tableAx = self.fig.add_axes([1 - width, 0.11, width - 0.02, 0.77])
+        self.tableAx.set_axis_off()
+        self.fig.sca(ax)    #click annotations are added to the current axes, which add_axes changed
+        self.table = None
+        self.timer = self.fig.canvas.new_timer(interval=200)     #measures once zooming or panning pauses
+        self.timer.single_shot = True
+        self.timer.add_callback(self.refresh)
+        self.connection = ax.callbacks.connect("xlim_changed", lambda ax: self.timer.start())
+        self.refresh(draw=False)
+    
+    def measurements(self):
+        """Measures the visible part of every trace
+
+        Returns:
+            pd.DataFrame: measurements (columns, see measurementNames) of every trace (rows, indexed by capture and y field)
+        """
+        xlim = None if self.ax.get_autoscalex_on() else self.ax.get_xlim()
+        rows = [withStats(measureTrace(index.x, index.y, xlim), stats, xlim) for title, yField, index, stats in self.traces]
+        labels = pd.MultiIndex.from_tuples([(title, yField) for title, yField, index, stats in self.traces], names=["capture", "trace"])
+        return pd.DataFrame(rows, index=labels, columns=measurementNames)
+    
+    def refresh(self, draw=True):
+        """Measures the traces again and redraws the table"""
+        from matplotlib.table import Table
+
+        data = self.measurements()
+        titles = {title for title, yField, index, stats in self.traces}
+        columns = [yField if len(titles) == 1 else f"{title}: {yField}" for title, yField in data.index]
+        if self.table is not None:
+            self.table.remove()
+        
+        # a column of measurement names and one column per trace, scaled to fit the top of the table axes
+        self.table = Table(self.tableAx, bbox=(0, 0.45, 1, 0.55))
+        widths = [0.4] + [0.6 / len(columns)] * len(columns)
+        self.table.add_cell(0, 0, widths[0], 1).visible_edges = "open"
+        for column, label in enumerate(columns, 1):
+            self.table.add_cell(0, column, widths[column], 1, text=label, loc="center")
+        for row, (name, label) in enumerate(zip(measurementNames, measurementLabels(*self.units)), 1):
+            self.table.add_cell(row, 0, widths[0], 1, text=label, loc="left")
+            for column, value in enumerate(data[name], 1):
+                self.table.add_cell(row, column, widths[column], 1, text=formatMeasurement(name, value), loc="right")
+        self.table.auto_set_font_size(False)
+        self.table.set_fontsize(8)
+        self.tableAx.add_table(self.table)
+        if draw:
+            self.fig.canvas.draw_idle()
+    
+    def disconnect(self):
+        self.timer.stop()
+        self.ax.callbacks.disconnect(self.connection)
+
+
+def formatMeasurement(name, value):
+    """Text of a measurement in the table"""
+    if np.isnan(value):
+        return "-"
+    if name == "duty":
+        return f"{100 * value:.1f}"
+    return f"{value:.4g}"
@@ -0,0 +1,270 @@
+"""Fast hit-testing for the hover and click annotations.
+Instead of asking every Line2D whether it contains the mouse (which scans all of its vertices),
+each line keeps its samples sorted by x and finds the samples near the cursor with a binary search.
+Hover annotations are redrawn by blitting only the annotation artists over a saved background.
+"""
+
+import time
+
+import numpy as np
+
+from downsample import bucketExtremes, isSorted, minMaxIndices
+from uniform_axis import asArray
+
+hoverRadius = 5     #distance in pixels from a line within which the mouse counts as being on it
+lookupSamples = 512     #most samples lookup tests, the minimum and maximum of buckets of samples are tested beyond that
+directSamples = 2**13   #most samples near the mouse bucketed on every lookup, beyond that the buckets of the whole trace are used
+lookupBucket = 8    #ratio between the bucket sizes of the whole trace, see SampleIndex.candidates
+
+
+class SampleIndex:
+    def __init__(self, line, x, y):
+        """Sorted-x index of the full resolution samples of a line, built once when the graph is created
+
+        Args:
+            line (Line2D): the plotted line (may hold decimated data)
+            x (array-like): full resolution x values
+            y (array-like): full resolution y values
+        """
+        self.line = line
+        self.setData(x, y)
+    
+    def setData(self, x, y, ordered=None):
+        """Replaces the samples, e.g. when rows are appended to a followed file
+
+        Args:
+            x (array-like): full resolution x values
+            y (array-like): full resolution y values
+            ordered (bool, optional): whether x is in ascending order. Checked when not given.
+        """
+        self.x = asArray(x)   #a UniformAxis is searched arithmetically
+        self.y = np.asarray(y)
+        if not (isSorted(self.x) if ordered is None else ordered):   #only pay for a sorted copy when the data is not already in order
+            order = np.argsort(self.x, kind="stable")
+            self.x = self.x[order]
+            self.y = self.y[order]
+        self.levels = {}    #indices of the minimum and maximum of every bucket of the whole trace by bucket size, see candidates
+    
+    def candidates(self, start, stop):
+        """Samples between start and stop that lookup tests: every one of them if there are few, otherwise the minimum
+        and maximum of every bucket, as a decimated line draws them, with buckets big enough to keep at most lookupSamples.
+        The buckets of up to directSamples samples are found on each lookup. Those of more are taken with a binary search
+        from the buckets of the whole trace, made once for each bucket size, so a lookup never scans more than
+        directSamples samples however large the trace.
+
+        Args:
+            start (int): first sample
+            stop (int): sample after the last one
+
+        Returns:
+            np.ndarray: sorted indices of the samples
+        """
+        if stop - start <= lookupSamples:
+            return np.arange(start, stop)
+        if stop - start <= directSamples:
+            inside = np.sort(bucketExtremes(self.y[start:stop], -(-2 * (stop - start) // lookupSamples))) + start
+            return np.concatenate(([start], inside, [stop - 1]))
+        size = lookupBucket ** int(np.ceil(np.log(2 * (stop - start) / lookupSamples) / np.log(lookupBucket)))
+        if size not in self.levels:
+            self.levels[size] = minMaxIndices(self.y, -(-len(self.y) // size))
+        extremes = self.levels[size]
+        inside = extremes[np.searchsorted(extremes, start):np.searchsorted(extremes, stop)]
+        return np.concatenate(([start], inside, [stop - 1]))    #the end samples, for the segments running out of the range
+    
+    def lookup(self, event, radius=hoverRadius):
+        """Finds the sample nearest to the mouse if the mouse is within radius pixels of the line
+
+        Args:
+            event: mouse event inside the axes of the line
+            radius (float, optional): tolerance in pixels
+
+        Returns:
+            tuple: x and y of the nearest sample, or None if the mouse is not on the line
+        """
+        n = len(self.x)
+        if n == 0 or event.xdata is None:
+            return None
+        
+        ax = self.line.axes
+        # the square within radius pixels of the mouse, in the coordinates of the line's axes (the event is in those of the top axes)
+        (left, bottom), (right, top) = ax.transData.inverted().transform([(event.x - radius, event.y - radius), (event.x + radius, event.y + radius)])
+        start = max(int(np.searchsorted(self.x, min(left, right))) - 1, 0)  #and one sample beyond, for the segments running out of it
+        stop = min(int(np.searchsorted(self.x, max(left, right), side="right")) + 1, n)
+        indices = self.candidates(start, stop)
+        y = self.y[indices]
+        if y.min() > max(bottom, top) or y.max() < min(bottom, top):    #the line passes above or below the square
+            return None
+        points = ax.transData.transform(np.column_stack((self.x[indices], y)))
+        mouse = np.array([event.x, event.y])
+        
+        # distance to the nearest point of every segment between the samples, as they are drawn. NaNs are gaps in the line.
+        a, b = points[:-1], points[1:]
+        direction = b - a
+        length = np.einsum("ij,ij->i", direction, direction)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.clip(np.einsum("ij,ij->i", mouse - a, direction) / length, 0, 1)
+        t[length == 0] = 0
+        distances = np.hypot(*(a + t[:, None] * direction - mouse).T) if len(points) > 1 else np.hypot(*(points - mouse).T)
+        distances = distances[np.isfinite(distances)]
+        if not distances.size or distances.min() > radius:
+            return None
+        
+        nearest = indices[np.nanargmin(np.hypot(*(points - mouse).T))]
+        return self.x[nearest], self.y[nearest]
+
+
+class AnnotationBlitter:
+    def __init__(self, fig, annots, interval=1/60):
+        """Redraws hover annotations by blitting them over a saved copy of the canvas instead of redrawing the whole figure
+
+        Args:
+            fig (Figure): figure holding the annotations
+            annots (list): hover annotations of the figure
+            interval (float, optional): minimum time in seconds between two redraws
+        """
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.annots = annots
+        self.artists = []   #other animated artists drawn under the annotations, such as followed lines
+        self.interval = interval
+        self.background = None
+        self.lastBlit = 0
+        self.trailing = None    #single-shot timer redrawing the last state once the interval is over, see update
+        self.trailingBbox = None    #part of the canvas the trailing redraw updates
+        self.canBlit = getattr(self.canvas, "supports_blit", False)
+        self.connection = None  #draw_event connection id
+        
+        if self.canBlit:
+            for annot in annots:
+                annot.set_animated(True)    #left out of normal draws so that the saved background is clean
+            self.connection = self.canvas.mpl_connect("draw_event", self.onDraw)
+    
+    def onDraw(self, event):
+        """Saves the freshly drawn canvas as the background and puts the visible annotations back on top"""
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.drawArtists()
+    
+    def disconnect(self):
+        """Stops saving backgrounds, for when the figure is cleared and reused"""
+        if self.connection is not None:
+            self.canvas.mpl_disconnect(self.connection)
+            self.connection = None
+        if self.trailing is not None:
+            self.trailing.stop()
+            self.trailing = None
+    
+    def addArtists(self, artists):
+        """Leaves more artists out of normal draws and blits them with the annotations, for artists that change often.
+        The caller redraws the canvas afterwards so the saved background no longer contains them.
+
+        Args:
+            artists (list): artists to animate, drawn in order under the annotations
+        """
+        if self.canBlit:
+            for artist in artists:
+                artist.set_animated(True)
+            self.artists.extend(artists)
+    
+    def drawArtists(self):
+        for artist in self.artists + self.annots:
+            if artist.get_visible():
+                self.fig.draw_artist(artist)
+    
+    def update(self, bbox=None, force=False):
+        """Shows the current state of the annotations, at most once per interval. A change that comes less than an interval
+        after the last redraw is shown once the interval is over, so the last state (e.g. an annotation hidden as the mouse
+        leaves its line) is never left undrawn.
+
+        Args:
+            bbox (Bbox, optional): part of the canvas that changed. Defaults to the whole figure.
+            force (bool, optional): redraw even if the last redraw was less than an interval ago
+        """
+        now = time.perf_counter()
+        if now - self.lastBlit < self.interval and not force:
+            self.schedule(bbox, self.interval - (now - self.lastBlit))
+            return
+        self.lastBlit = now
+        if self.trailing is not None:   #this redraw shows the state the trailing one was waiting for
+            self.trailing.stop()
+            self.trailing = None
+        
+        if not self.canBlit or self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.drawArtists()
+        self.canvas.blit(self.fig.bbox if bbox is None else bbox)
+    
+    def schedule(self, bbox, delay):
+        """Starts the trailing redraw, or widens the one already waiting to the whole figure if it is for another part
+
+        Args:
+            bbox (Bbox): part of the canvas that changed, None for the whole figure
+            delay (float): seconds until the interval is over
+        """
+        if self.trailing is not None:
+            if bbox is not self.trailingBbox:
+                self.trailingBbox = None
+            return
+        self.trailingBbox = bbox
+        self.trailing = self.canvas.new_timer(interval=int(delay * 1000) + 1)
+        self.trailing.single_shot = True
+        self.trailing.add_callback(self.flush)
+        self.trailing.start()
+    
+    def flush(self):
+        """Trailing redraw, see update"""
+        self.trailing = None
+        self.update(self.trailingBbox, force=True)
+
+
+def hoverLines(event, indexes, annots, blitter, updateAnnot):
+    """Shows the annotation of every line under the mouse and hides the others
+
+    Args:
+        event: motion_notify_event
+        indexes (list): SampleIndex of every line
+        annots (list): hover annotation of every line, in the same order as indexes
+        blitter (AnnotationBlitter): redraws the annotations
+        updateAnnot (function): called with the annotation and the sample x and y when the mouse is on a line
+    """
+    changed = False
+    for index, annot in zip(indexes, annots):
+        sample = index.lookup(event) if onAxes(event, index.line.axes) else None
+        if sample is not None:
+            updateAnnot(annot, *sample)
+            annot.set_visible(True)
+            changed = True
+        elif annot.get_visible():
+            annot.set_visible(False)
+            changed = True
+    if changed:
+        blitter.update()
+
+
+def nearestSample(event, indexes):
+    """Finds the sample nearest to the mouse among the lines it is on, for graphs with too many overlapping lines
+    to annotate each of them (see hoverLines)
+
+    Args:
+        event: mouse event
+        indexes (list): SampleIndex of every line
+
+    Returns:
+        tuple: position of the line in indexes and x and y of its nearest sample, or None if the mouse is on no line
+    """
+    nearest, distance = None, np.inf
+    for position, index in enumerate(indexes):
+        sample = index.lookup(event) if onAxes(event, index.line.axes) else None
+        if sample is not None:
+            x, y = index.line.axes.transData.transform(sample)
+            if np.hypot(x - event.x, y - event.y) < distance:
+                nearest, distance = (position, *sample), np.hypot(x - event.x, y - event.y)
+    return nearest
+
+
+def onAxes(event, ax):
+    """Whether a mouse event is over an axes. Mouse events only name the top axes under the mouse (event.inaxes),
+    so the lines of twin axes underneath it are found by position.
+    """
+    return event.inaxes is ax or (event.inaxes is not None and ax.bbox.contains(event.x, event.y))
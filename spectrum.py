@@ -0,0 +1,89 @@
+"""Power spectral density of traces by Welch's method: the trace is cut into overlapping Hann windowed segments,
+the real-input FFT of every segment is taken and the squared magnitudes are averaged.
+Segments are transformed a batch at a time straight from the full resolution samples, which may be memory-mapped,
+so memory use is bounded by the batch size and not by the length of the capture.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from downsample import releasePages
+
+segmentLength = 2**14   #samples per FFT segment, the frequency resolution is the sample rate / segmentLength
+batchSamples = 2**22    #samples of segments transformed at a time, bounds the temporary arrays
+
+
+def sampleRate(x):
+    """Sample rate of a trace from its x values, assuming the samples are evenly spaced
+
+    Args:
+        x (np.ndarray): x values of the trace
+
+    Raises:
+        ValueError: if the x values do not increase from the first sample to the last
+
+    Returns:
+        float: samples per unit of x, e.g. Hz when x is in seconds
+    """
+    if len(x) < 2 or not x[-1] > x[0]:
+        raise ValueError("the x values must increase to infer a sample rate")
+    return (len(x) - 1) / float(x[-1] - x[0])
+
+
+def welch(y, rate, length=segmentLength, overlap=0.5):
+    """One-sided power spectral density of a trace by Welch's method. Every segment has its mean removed,
+    and NaNs (e.g. blank cells) are replaced by that mean.
+
+    Args:
+        y (np.ndarray): evenly spaced samples of the trace
+        rate (float): sample rate, see sampleRate
+        length (int, optional): samples per segment. A trace shorter than this is one segment.
+        overlap (float, optional): fraction of a segment shared with the next one
+
+    Returns:
+        tuple: frequencies and the power spectral density at each (unit of y squared per unit of frequency)
+    """
+    length = min(length, len(y))
+    step = max(int(length * (1 - overlap)), 1)
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(length) / length)).astype(np.result_type(y.dtype, np.float32))  #periodic Hann
+    starts = range(0, len(y) - length + 1, step)
+    perBatch = max(batchSamples // length, 1)
+    
+    total = np.zeros(length // 2 + 1)
+    for first in range(0, len(starts), perBatch):
+        batch = starts[first:first + perBatch]
+        chunk = y[batch[0]:batch[-1] + length]
+        segments = sliding_window_view(chunk, length)[::step]
+        if np.isnan(chunk).any():
+            segments = np.nan_to_num(segments - np.nanmean(segments, axis=1, keepdims=True))
+        else:
+            segments = segments - segments.mean(axis=1, keepdims=True)
+        spectra = np.fft.rfft(segments * window, axis=1)
+        total += (spectra.real**2 + spectra.imag**2).sum(axis=0)
+        releasePages(chunk)
+    
+    psd = total / (len(starts) * rate * np.dot(window, window))
+    psd[1:length - length // 2] *= 2   #one-sided: the power of the negative frequencies, except DC and Nyquist
+    return np.fft.rfftfreq(length, 1 / rate), psd
+
+
+def capture_spectrum(capture, y_field, segment_length=segmentLength):
+    """Power spectral density of a y field of a capture, computed once and kept with the capture
+
+    Args:
+        capture (Capture): capture holding the trace, loaded in memory or memory-mapped
+        y_field (str): y field to transform
+        segment_length (int, optional): samples per FFT segment, see welch
+
+    Raises:
+        ValueError: if the capture was streamed (only its envelope is kept), or its x values do not increase
+
+    Returns:
+        tuple: frequencies and power spectral density, see welch
+    """
+    if capture.stats is not None:
+        raise ValueError("a streamed capture only keeps its envelope, load it in memory or memory-mapped for a spectrum")
+    key = (y_field, segment_length)
+    if key not in capture.spectra:
+        capture.spectra[key] = welch(capture.columns[y_field], sampleRate(capture.x), segment_length)
+    return capture.spectra[key]
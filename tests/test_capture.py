@@ -0,0 +1,106 @@
+"""Tests of capture: load_capture gives the same Capture in every load mode, from any thread, and across processes."""
+
+import os
+import pickle
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import capture
+from capture import Capture, load_capture
+from csv_cache import CSVCache
+
+modes = ["memory", "memmap", "stream", "compact"]
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    """A cache of its own for every test, so nothing is read from or left in the user's cache"""
+    cache = CSVCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(capture, "cache", cache)
+    return cache
+
+
+@pytest.fixture
+def captureFiles(tmp_path):
+    """Captures of different lengths, with a damaged row"""
+    paths = []
+    for i in range(6):
+        x = np.arange(500 + 100 * i) * 1e-6
+        lines = [f"{t:+.5E},{np.sin(t * 1e4 + i):+.11E},{np.cos(t * 3e4):+.11E}" for t in x]
+        lines[i] = "Trigger re-armed"
+        path = tmp_path / f"capture{i}.csv"
+        path.write_text("Time,CH1,CH2\ns,V,mA\n" + "\n".join(lines) + "\n")
+        paths.append(str(path))
+    return paths
+
+
+def same(a, b):
+    """Whether two captures hold the same fields, units, title and values"""
+    return (a.fields == b.fields and a.units == b.units and a.title == b.title and a.stats == b.stats
+            and a.removedRows == b.removedRows
+            and all(np.array_equal(a.columns[i], b.columns[i], equal_nan=True) for i in a.fields))
+
+
+@pytest.mark.parametrize("mode", modes)
+def test_load_capture(captureFiles, mode):
+    loaded = load_capture(captureFiles[1], True, mode)
+    assert (loaded.title, loaded.xField, loaded.yFields, loaded.yUnits) == ("capture1", "Time", ["CH1", "CH2"], ["V", "mA"])
+    assert loaded.removedRows == 1 and loaded.filename == captureFiles[1]
+    if mode == "stream":
+        assert loaded.stats["CH1"]["count"] == 599 and len(loaded) <= 599
+    else:
+        assert loaded.stats is None and len(loaded) == 599
+        np.testing.assert_allclose(loaded.columns["CH2"], np.cos(np.asarray(loaded.x) * 3e4), atol=1e-7)
+
+
+def test_text_only_file_is_refused(tmp_path):
+    path = tmp_path / "text.csv"
+    path.write_text("a,b\nV,V\nx,y\n")
+    with pytest.raises(ValueError):
+        load_capture(str(path), False)
+
+
+@pytest.mark.parametrize("mode", ["memory", "memmap", "stream"])
+def test_concurrent_loads_match_serial_loads(cache, captureFiles, mode):
+    cache.enabled = False   #the serial reference is read from the CSV files themselves
+    expected = [load_capture(path, True, mode) for path in captureFiles]
+    cache.clear()
+    cache.enabled = True
+    jobs = captureFiles * 4     #every file loaded by several threads at once, with a cold and then a warm cache
+    for state in ("cold", "warm"):
+        with ThreadPoolExecutor(8) as executor:
+            captures = list(executor.map(lambda path: load_capture(path, True, mode), jobs))
+        assert all(same(loaded, expected[i % len(captureFiles)]) for i, loaded in enumerate(captures)), state
+    if mode != "stream":    #streamed captures never use the cache
+        assert cache.hits + cache.misses == 2 * len(jobs) + (len(captureFiles) if mode == "memmap" else 0)
+
+
+def test_first_use_from_several_threads(tmp_path, captureFiles):
+    """pandas is imported on first use (see lazy_import), here from several threads at the same time"""
+    script = ("import pickle, sys\n"
+              "from concurrent.futures import ThreadPoolExecutor\n"
+              "from capture import load_capture\n"
+              "with ThreadPoolExecutor(8) as executor:\n"
+              "    captures = list(executor.map(lambda path: load_capture(path, True), sys.argv[1:]))\n"
+              "sys.stdout.buffer.write(pickle.dumps(captures))\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, CSV_GRAPHER_CACHE=str(tmp_path / "first_use"), PYTHONPATH=root)
+    result = subprocess.run([sys.executable, "-c", script] + captureFiles, capture_output=True, check=True, env=env)
+    for path, loaded in zip(captureFiles, pickle.loads(result.stdout)):
+        assert same(loaded, load_capture(path, True))
+
+
+@pytest.mark.parametrize("mode", modes)
+def test_pickle_round_trip(captureFiles, mode):
+    """Captures are sent back from worker processes"""
+    loaded = load_capture(captureFiles[2], True, mode)
+    assert same(pickle.loads(pickle.dumps(loaded)), loaded)
+
+
+def test_capture_without_units():
+    loaded = Capture("title", ["x", "y"], [], {"x": np.arange(3.0), "y": np.ones(3)}, hasUnits=False)
+    assert loaded.yUnits == [] and len(loaded) == 3 and loaded.stats is None and loaded.removedRows == 0
@@ -0,0 +1,99 @@
+"""Tests of csv_cache: cached captures read back the same as the CSV, and are read again once the file changes."""
+
+import mmap
+import os
+
+import numpy as np
+import pytest
+
+from csv_cache import CSVCache
+from csv_loader import loadCSV
+
+capture = ("Time,CH1,CH2\n"
+           "s,V,V\n"
+           "0.0,1.5,-1\n"
+           "0.1,,\n"   #incomplete: removed
+           "0.2,2.5,-2\n"
+           "0.3,3.5,-3\n")
+
+
+@pytest.fixture
+def captureFile(tmp_path):
+    path = tmp_path / "capture.csv"
+    path.write_text(capture)
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CSVCache(str(tmp_path / "cache"))
+
+
+def isMapped(array):
+    """Whether array is a view of a memory-mapped file"""
+    while array is not None and not isinstance(array, mmap.mmap):
+        array = getattr(array, "base", None)
+    return array is not None
+
+
+def assertSameLoad(loaded, expected):
+    fields, units, data = loaded
+    assert (fields, units) == expected[:2]
+    np.testing.assert_array_equal(data.to_numpy(), expected[2].to_numpy())
+    assert list(data.dtypes) == list(expected[2].dtypes)
+    assert data.attrs["removedRows"] == expected[2].attrs["removedRows"] == 1
+
+
+@pytest.mark.parametrize("memoryMap", [False, True])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_round_trip(cache, captureFile, memoryMap, dtype):
+    expected = loadCSV(captureFile, True, dtype=dtype)
+    assertSameLoad(cache.load(captureFile, True, "capture", dtype, memoryMap), expected)
+    assert (cache.hits, cache.misses) == (0, 1)
+    reopened = cache.load(captureFile, True, "capture", dtype, memoryMap)
+    assertSameLoad(reopened, expected)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert isMapped(reopened[2]["CH1"].to_numpy()) == memoryMap
+
+
+def test_edited_file_is_read_again(cache, captureFile):
+    cache.load(captureFile, True, "capture")
+    with open(captureFile, "a") as file:
+        file.write("0.4,4.5,-4\n")
+    stat = os.stat(captureFile)
+    os.utime(captureFile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))   #a later edit, even on coarse clocks
+    fields, units, data = cache.load(captureFile, True, "capture")
+    assert (cache.hits, cache.misses) == (0, 2)
+    np.testing.assert_array_equal(data["CH1"], [1.5, 2.5, 3.5, 4.5])
+
+
+def test_entries_are_keyed_by_how_the_file_is_read(cache, captureFile):
+    cache.load(captureFile, True, "capture")
+    cache.load(captureFile, True, "capture", np.float32)
+    fields, units, data = cache.load(captureFile, False, "capture")
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert units == [] and data.attrs["removedRows"] == 2    #the units row is read as a row of text
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, captureFile):
+    cache = CSVCache(str(tmp_path / "cache"), maxBytes=0)
+    cache.load(captureFile, True, "capture")
+    cache.load(captureFile, True, "capture", np.float32)
+    entries = cache.entries()
+    assert len(entries) == 1    #only the entry just stored is kept
+    assert cache.load(captureFile, True, "capture", np.float32) is not None and cache.hits == 1
+
+
+def test_disabled_cache_stores_nothing(tmp_path, captureFile):
+    cache = CSVCache(str(tmp_path / "cache"), enabled=False)
+    assertSameLoad(cache.load(captureFile, True, "capture"), loadCSV(captureFile, True))
+    assert cache.entries() == [] and cache.misses == 0
+
+
+def test_damaged_entry_is_read_again(cache, captureFile):
+    cache.load(captureFile, True, "capture")
+    (lastUsed, size, entry), = cache.entries()
+    with open(os.path.join(entry, "meta.json"), "w") as file:
+        file.write("{")
+    assertSameLoad(cache.load(captureFile, True, "capture"), loadCSV(captureFile, True))
+    assert (cache.hits, cache.misses) == (0, 2)
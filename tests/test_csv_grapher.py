@@ -0,0 +1,88 @@
+"""Tests of the graphs of csv_grapher: every unit gets a y axis fitted to its traces, which a followed CSV widens."""
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+import capture
+from capture import Capture
+from csv_cache import CSVCache
+from csv_grapher import Graph
+
+
+@pytest.fixture(autouse=True)
+def closeFigures():
+    yield
+    plt.close("all")
+
+
+def powerCapture(points):
+    x = np.arange(points) * 1e-7
+    rng = np.random.default_rng(0)
+    voltage = 230 * np.sin(2 * np.pi * 50 * x) + rng.normal(0, 1, points)
+    current = 2 * np.sin(2 * np.pi * 50 * x + 0.3) + rng.normal(0, 0.01, points)
+    voltage[points // 3] = np.nan
+    columns = {"x-axis": x, "1": voltage, "2": current, "3": voltage * current, "4": 5 + 0.01 * voltage}
+    return Capture("power", list(columns), ["second", "Volt", "Ampere", "Watt", "Volt"], columns)
+
+
+@pytest.mark.parametrize("points, decimate", [(300_000, True), (300_000, False), (1000, True)])
+def test_unit_axes_hold_their_traces(points, decimate):
+    power = powerCapture(points)
+    graph = Graph(1, power, [power.title], decimate=decimate)
+    assert [(unit, fields) for ax, unit, fields in graph.axes] == [("Volt", ["1", "4"]), ("Ampere", ["2"]), ("Watt", ["3"])]
+    assert bool(graph.decimatedLines) == (decimate and points > 200_000)
+    graph.fig.canvas.draw()
+    for ax, unit, fields in graph.axes:
+        low, high = ax.get_ylim()
+        traceLow = min(np.nanmin(power.columns[yField]) for yField in fields)
+        traceHigh = max(np.nanmax(power.columns[yField]) for yField in fields)
+        margin = ax.margins()[1] * (traceHigh - traceLow)
+        assert (low, high) == pytest.approx((traceLow - margin, traceHigh + margin)), unit
+        assert not ax.get_autoscaley_on()
+
+
+def test_flat_trace_is_left_to_matplotlib():
+    flat = Capture("flat", ["x", "y"], ["s", "V"], {"x": np.arange(10.0), "y": np.full(10, 3.0)})
+    graph = Graph(1, flat, [flat.title])
+    graph.fig.canvas.draw()
+    ax = graph.axes[0][0]
+    assert ax.get_autoscaley_on() and ax.get_ylim()[0] < 3 < ax.get_ylim()[1]
+
+
+def appendRows(path, rows):
+    with open(path, "a") as file:
+        file.write("".join(f"{x},{y}\n" for x, y in rows))
+
+
+@pytest.fixture
+def followedGraph(tmp_path, monkeypatch):
+    monkeypatch.setattr(capture, "cache", CSVCache(str(tmp_path / "cache"), enabled=False))
+    path = tmp_path / "followed.csv"
+    path.write_text("Time,CH1\ns,V\n" + "".join(f"{i},{np.sin(i / 5)}\n" for i in range(100)))
+    followed = capture.load_capture(str(path), True)
+    graph = Graph(1, followed, [followed.title])
+    graph.fig.canvas.draw()
+    graph.follow(str(path), True)
+    return str(path), graph
+
+
+def test_followed_rows_widen_fitted_limits(followedGraph):
+    path, graph = followedGraph
+    ax = graph.axes[0][0]
+    appendRows(path, [(100, 5.0), (101, -3.0)])
+    graph.followStep()
+    low, high = ax.get_ylim()
+    assert low < -3 and high > 5 and not ax.get_autoscaley_on()
+
+
+def test_zoomed_limits_are_left_alone(followedGraph):
+    path, graph = followedGraph
+    ax = graph.axes[0][0]
+    ax.set_ylim(-0.5, 0.5)     #as zooming with the toolbar does
+    ax.set_autoscaley_on(False)
+    appendRows(path, [(100, 5.0)])
+    graph.followStep()
+    assert ax.get_ylim() == (-0.5, 0.5)
@@ -0,0 +1,87 @@
+"""Tests of csv_loader: the cleaning stage of damaged scope exports gives the same rows with either parser,
+and in every load mode."""
+
+import numpy as np
+import pytest
+
+import capture
+import csv_loader
+from csv_cache import CSVCache
+
+damaged = ("x,a,b\n"
+           "1,2,3\n"
+           "2,,\n"     #no y value: removed
+           "Trigger re-armed\n"    #message from the scope: removed
+           "3,4,5\n"
+           "4,5,6,7\n"     #an extra field: ignored
+           "5,6\n"     #a channel missing: kept, NaN
+           "6,7,8\n"
+           "7,8")  #the last line of an interrupted capture: kept, NaN
+
+engines = ["c", pytest.param("pyarrow", marks=pytest.mark.skipif(csv_loader.ENGINE != "pyarrow", reason="pyarrow is not installed"))]
+
+
+@pytest.fixture
+def damagedFile(tmp_path):
+    path = tmp_path / "damaged.csv"
+    path.write_text(damaged)
+    return str(path)
+
+
+def load(monkeypatch, filename, engine, **kwargs):
+    """loadCSV with every parse made by one engine, including the damaged path"""
+    monkeypatch.setattr(csv_loader, "ENGINE", engine)
+    return csv_loader.loadCSV(filename, False, engine=engine, **kwargs)
+
+
+@pytest.mark.parametrize("engine", engines)
+def test_damaged_rows(monkeypatch, damagedFile, engine):
+    fields, units, data = load(monkeypatch, damagedFile, engine)
+    expected = [[1, 2, 3], [3, 4, 5], [4, 5, 6], [5, 6, np.nan], [6, 7, 8], [7, 8, np.nan]]
+    assert fields == ["x", "a", "b"] and units == []
+    np.testing.assert_array_equal(data.to_numpy(), np.array(expected, dtype=float))
+    assert data.attrs["removedRows"] == 2
+    assert all(dtype.kind == "f" for dtype in data.dtypes)
+
+
+@pytest.mark.parametrize("engine", engines)
+def test_damaged_rows_selected_columns(monkeypatch, damagedFile, engine):
+    fields, units, data = load(monkeypatch, damagedFile, engine, yColumns=["b"], dtype=np.float32)
+    np.testing.assert_array_equal(data.to_numpy(), [[1, 3], [3, 5], [4, 6], [6, 8]])
+    assert data.attrs["removedRows"] == 4     #rows without b are incomplete once it is the only y column
+    assert [dtype.name for dtype in data.dtypes] == ["float64", "float32"]
+
+
+@pytest.fixture
+def damagedCapture(tmp_path):
+    """A scope capture with a units row and 200 data rows, damaged the ways described below"""
+    lines = [f"{i * 1e-6:+.5E},{np.sin(i / 10):+.11E},{np.cos(i / 10):+.11E}" for i in range(200)]
+    lines[0] = lines[0].split(",")[0] + ",,"    #an empty y value on the first data row, as in test.csv: removed
+    lines[50] = "Trigger re-armed\n" + lines[50]   #a message line: removed
+    x, one, two = lines[120].split(",")
+    lines[120] = f"{x},,{two}"  #one empty channel: kept, NaN in that channel
+    path = tmp_path / "damaged.csv"
+    path.write_text("x-axis,1,2\nsecond,Volt,Volt\n" + "\n".join(lines) + "\n+1.2345")    #the x value of the last line is cut short: removed
+    return str(path)
+
+
+@pytest.mark.parametrize("mode", ["memory", "compact", "memmap", "stream"])
+def test_damaged_capture_every_load_mode(tmp_path, monkeypatch, damagedCapture, mode):
+    monkeypatch.setattr(capture, "cache", CSVCache(str(tmp_path / "cache")))
+    loaded = capture.load_capture(damagedCapture, True, mode)
+    assert loaded.removedRows == 3
+    assert all(np.asarray(column).dtype.kind == "f" for column in loaded.columns.values())
+    if mode == "stream":    #only the envelope is kept, the statistics count every value
+        assert (loaded.stats["1"]["count"], loaded.stats["2"]["count"]) == (198, 199)
+    else:
+        assert len(loaded) == 199
+        assert np.count_nonzero(np.isnan(loaded.columns["1"])) == 1 and not np.isnan(loaded.columns["2"]).any()
+        np.testing.assert_allclose(loaded.columns["2"], np.cos(np.arange(1, 200) / 10), atol=1e-7)
+
+
+@pytest.mark.parametrize("chunkRows", [7, 64, 1000])
+def test_damaged_capture_in_chunks(damagedCapture, chunkRows):
+    fields, units, data = csv_loader.loadCSV(damagedCapture, True)
+    chunks = [chunk for _, _, chunk in csv_loader.readCSVChunks(damagedCapture, True, chunkRows)]
+    np.testing.assert_array_equal(np.concatenate([chunk.to_numpy() for chunk in chunks]), data.to_numpy())
+    assert sum(chunk.attrs["removedRows"] for chunk in chunks) == data.attrs["removedRows"] == 3
@@ -0,0 +1,64 @@
+"""Tests of csv_stream: the streamed envelope and statistics match the ones computed on the whole table."""
+
+import numpy as np
+import pytest
+
+from csv_loader import loadCSV
+from csv_stream import countRows, streamCSV
+from downsample import minMaxIndices
+
+
+@pytest.fixture
+def captureFile(tmp_path):
+    """Two noisy channels with glitches, and a sample the scope could not measure"""
+    rng = np.random.default_rng(0)
+    x = np.arange(2003) * 1e-6
+    y = np.column_stack([np.sin(x * 2e4), np.cos(x * 3e4)]) + rng.normal(0, 0.05, (len(x), 2))
+    y[rng.integers(0, len(x), 10), rng.integers(0, 2, 10)] += 4
+    lines = [f"{t:+.5E},{a:+.11E},{b:+.11E}" for t, a, b in zip(x, *y.T)]     #the number format of test2.csv
+    lines[700] = lines[700].rsplit(",", 1)[0] + ",overload"     #a gap in the 2nd channel
+    path = tmp_path / "capture.csv"
+    path.write_text("Time,CH1,CH2\ns,V,V\n" + "\n".join(lines) + "\n")
+    return str(path)
+
+
+# chunk sizes that do and do not line up with the buckets, and a bucket count that keeps the file whole
+@pytest.mark.parametrize("buckets, chunkRows", [(100, 137), (100, 20), (100, 10_000), (7, 500), (5000, 300)])
+def test_envelope_matches_whole_table(captureFile, buckets, chunkRows):
+    fields, units, data = loadCSV(captureFile, True)
+    indices = np.unique(np.concatenate([minMaxIndices(data[i].to_numpy(), buckets) for i in data.columns[1:]]))
+    expected = data.iloc[indices].reset_index(drop=True)
+    streamedFields, streamedUnits, streamed, stats = streamCSV(captureFile, True, buckets, chunkRows)
+    assert (streamedFields, streamedUnits) == (fields, units)
+    assert streamed.columns.tolist() == expected.columns.tolist()
+    np.testing.assert_array_equal(streamed.to_numpy(), expected.to_numpy())
+
+
+@pytest.mark.parametrize("chunkRows", [137, 10_000])
+def test_stats_match_numpy(captureFile, chunkRows):
+    fields, units, data = loadCSV(captureFile, True)
+    stats = streamCSV(captureFile, True, 100, chunkRows)[3]
+    assert list(stats) == ["CH1", "CH2"]
+    for yField, values in stats.items():
+        y = data[yField].dropna().to_numpy()
+        assert values["count"] == len(y)
+        assert values["min"] == y.min() and values["max"] == y.max()
+        assert values["mean"] == pytest.approx(y.mean(), rel=1e-12)
+        assert values["rms"] == pytest.approx(np.sqrt(np.mean(y ** 2)), rel=1e-12)
+    assert stats["CH2"]["count"] == stats["CH1"]["count"] - 1
+
+
+def test_removed_rows_are_counted(tmp_path):
+    path = tmp_path / "damaged.csv"
+    path.write_text("Time,CH1\ns,V\n0,1\n1,\nTrigger re-armed\n2,3\n3,-4")
+    fields, units, data, stats = streamCSV(str(path), True, chunkRows=2)
+    np.testing.assert_array_equal(data.to_numpy(), [[0, 1], [2, 3], [3, -4]])
+    assert data.attrs["removedRows"] == 2
+    assert stats["CH1"] == {"count": 3, "min": -4.0, "max": 3.0, "mean": 0.0, "rms": pytest.approx(np.sqrt(26 / 3))}
+
+
+def test_count_rows(tmp_path):
+    path = tmp_path / "capture.csv"
+    path.write_bytes(b"Time,CH1\r\ns,V\r\n0,1\r\n1,2")     #no line break after the last row
+    assert countRows(str(path), True, blockSize=3) == 2
+    assert countRows(str(path), False) == 3
@@ -0,0 +1,71 @@
+"""Tests of downsample: the min/max envelope keeps every extreme of the trace it stands in for."""
+
+import numpy as np
+import pytest
+
+import downsample
+from downsample import decimate, minMaxIndices
+
+
+@pytest.fixture
+def glitchySine():
+    """Noisy sine wave with a few single sample glitches, the kind of thing decimation must not hide"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, 100_003)     #not a multiple of the bucket sizes, so there is a shorter last bucket
+    y = np.sin(2 * np.pi * 50 * x) + rng.normal(0, 0.05, len(x))
+    y[rng.integers(0, len(x), 20)] += rng.choice([-5, 5], 20)
+    return x, y
+
+
+def bucketMinMax(y, indices, size):
+    """Min and max of every bucket of y, and of the samples of each bucket that were kept"""
+    buckets = -(-len(y) // size)
+    keptMin = np.full(buckets, np.inf)
+    keptMax = np.full(buckets, -np.inf)
+    np.minimum.at(keptMin, indices // size, y[indices])
+    np.maximum.at(keptMax, indices // size, y[indices])
+    trueMin = np.array([y[i:i + size].min() for i in range(0, len(y), size)])
+    trueMax = np.array([y[i:i + size].max() for i in range(0, len(y), size)])
+    return keptMin, keptMax, trueMin, trueMax
+
+
+@pytest.mark.parametrize("buckets", [500, 930, 1920])
+def test_envelope_keeps_extremes(glitchySine, buckets):
+    x, y = glitchySine
+    indices = minMaxIndices(y, buckets)
+    keptMin, keptMax, trueMin, trueMax = bucketMinMax(y, indices, -(-len(y) // buckets))
+    np.testing.assert_array_equal(keptMin, trueMin)
+    np.testing.assert_array_equal(keptMax, trueMax)
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert len(indices) <= 2 * buckets + 2
+
+
+def test_envelope_across_chunks(monkeypatch, glitchySine):
+    x, y = glitchySine
+    whole = minMaxIndices(y, 700)
+    monkeypatch.setattr(downsample, "chunkSize", 1000)     #many chunks, each a whole number of buckets
+    np.testing.assert_array_equal(minMaxIndices(y, 700), whole)
+
+
+def test_nan_does_not_hide_extremes():
+    y = np.zeros(1000)
+    y[10] = np.nan
+    y[20] = 3
+    y[30] = -2
+    indices = minMaxIndices(y, 10)
+    assert {20, 30} <= set(indices)
+
+
+def test_short_trace_is_kept_whole():
+    y = np.arange(10.0)
+    np.testing.assert_array_equal(minMaxIndices(y, 5), np.arange(10))
+
+
+def test_decimate_visible_window(glitchySine):
+    x, y = glitchySine
+    decimatedX, decimatedY = decimate(x, y, 100, xlim=(0.25, 0.5))
+    assert decimatedX[0] < 0.25 and decimatedX[-1] > 0.5     #runs past both edges of the axes
+    visible = (x >= 0.25) & (x <= 0.5)
+    assert decimatedY.max() == y[visible].max() and decimatedY.min() == y[visible].min()
+    np.testing.assert_array_equal(decimatedY, y[np.searchsorted(x, decimatedX)])
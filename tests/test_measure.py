@@ -0,0 +1,48 @@
+"""Tests of measure: measurements of synthetic waveforms whose true values are known."""
+
+import math
+
+import numpy as np
+import pytest
+
+from measure import measureTrace
+
+frequency = 1000.0
+rise = 20e-6    #edge of the square waves, so 10% to 90% takes 0.8 * rise
+x = np.arange(2_000_000) * 1e-7     #200 periods at 10 MS/s, enough for the noisy edges to average out
+
+
+def square(duty, noise=0.0):
+    """Square wave between -1 and 1 with straight edges and optional noise"""
+    period = 1 / frequency
+    y = np.interp((x * frequency) % 1 * period, [0, rise, duty * period, duty * period + rise, period], [-1, 1, 1, -1, -1])
+    return y + np.random.default_rng(0).normal(0, noise, len(x)) if noise else y
+
+
+sine = 2.5 * np.sin(2 * np.pi * frequency * x) + 0.5
+sineRise = (math.asin(0.8) - math.asin(-0.8)) / (2 * math.pi * frequency)   #10% to 90% of a sine
+
+cases = {
+    "sine": (sine, None, {"vpp": 5.0, "mean": 0.5, "rms": math.sqrt(0.5**2 + 2.5**2 / 2), "frequency": frequency,
+                          "period": 1 / frequency, "rise": sineRise, "fall": sineRise, "duty": 0.5}, 1e-3),
+    "square, 30% duty": (square(0.3), None, {"vpp": 2.0, "frequency": frequency, "rise": 0.8 * rise, "fall": 0.8 * rise,
+                                             "duty": 0.3}, 1e-3),
+    "noisy square, 70% duty": (square(0.7, noise=0.05), None, {"mean": 0.4, "frequency": frequency, "duty": 0.7,
+                                                               "rise": 0.8 * rise, "fall": 0.8 * rise}, 1e-2),
+    "float32 square": (square(0.5).astype(np.float32), None, {"vpp": 2.0, "mean": 0.0, "rms": math.sqrt(1 - 2 * rise * frequency * 2 / 3),
+                                                              "frequency": frequency, "duty": 0.5}, 2e-3),
+    "sine with NaNs": (np.where(np.arange(len(x)) % 1000 == 7, np.nan, sine), None, {"vpp": 5.0, "mean": 0.5, "frequency": frequency}, 1e-3),
+    "zoomed sine": (sine, (0.0031, 0.0089), {"frequency": frequency, "vpp": 5.0}, 1e-3),
+    "flat": (np.full(len(x), 3.0), None, {"vpp": 0.0, "mean": 3.0, "rms": 3.0, "frequency": np.nan, "rise": np.nan}, 0),
+}
+
+
+@pytest.mark.parametrize("name", cases)
+def test_measurements(name):
+    y, xlim, expected, tolerance = cases[name]
+    result = measureTrace(x, y, xlim)
+    for key, value in expected.items():
+        if np.isnan(value):
+            assert np.isnan(result[key]), key
+        else:   #relative error, or absolute for values that should be 0
+            assert result[key] == pytest.approx(value, rel=tolerance, abs=tolerance if value == 0 else 0), key
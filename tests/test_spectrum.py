@@ -0,0 +1,50 @@
+"""Tests of spectrum: the Welch spectrum of a tone in white noise of known power."""
+
+import numpy as np
+import pytest
+
+import spectrum
+from capture import Capture
+from spectrum import capture_spectrum, sampleRate, welch
+from uniform_axis import UniformAxis
+
+rate = 1e6
+
+
+def tone(samples=2_000_000, frequency=12345.0, amplitude=2.0, noise=0.1):
+    x = np.arange(samples) / rate
+    return x, amplitude * np.sin(2 * np.pi * frequency * x) + np.random.default_rng(0).normal(0, noise, samples)
+
+
+def test_tone_in_noise():
+    x, y = tone()
+    frequencies, psd = welch(y, rate)
+    peak = psd.argmax()
+    assert abs(frequencies[peak] - 12345.0) <= frequencies[1]
+    assert psd[peak - 3:peak + 4].sum() * frequencies[1] == pytest.approx(2.0**2 / 2, rel=1e-2)     #the Hann window spreads the tone over a few bins
+    assert psd[(frequencies > 50e3) & (frequencies < 400e3)].mean() == pytest.approx(2 * 0.1**2 / rate, rel=5e-2)
+
+
+def test_batches_and_gaps(monkeypatch):
+    x, y = tone(200_000)
+    expected = welch(y, rate, 4096)[1]
+    monkeypatch.setattr(spectrum, "batchSamples", 10_000)  #several batches of segments
+    np.testing.assert_allclose(welch(y, rate, 4096)[1], expected, rtol=1e-9)
+    y[::1000] = np.nan     #blank cells become the mean of their segment instead of spreading NaN over the spectrum
+    assert np.isfinite(welch(y, rate, 4096)[1]).all()
+
+
+def test_capture_spectrum():
+    x, y = tone(100_000)
+    capture = Capture("tone", ["x", "y"], [], {"x": UniformAxis(0.0, 1 / rate, len(x)), "y": y})
+    frequencies, psd = capture_spectrum(capture, "y", 1024)
+    assert len(frequencies) == 513 and frequencies[-1] == pytest.approx(rate / 2)
+    assert capture_spectrum(capture, "y", 1024)[1] is psd  #computed once
+
+
+def test_no_spectrum_without_sample_rate():
+    with pytest.raises(ValueError):
+        sampleRate(np.array([1.0, 1.0, 1.0]))
+    capture = Capture("streamed", ["x", "y"], [], {"x": np.arange(3.0), "y": np.ones(3)}, stats={"y": {}})
+    with pytest.raises(ValueError):
+        capture_spectrum(capture, "y")
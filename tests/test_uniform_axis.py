@@ -0,0 +1,60 @@
+"""Tests of uniform_axis and the compact load mode: a UniformAxis behaves like the array of its values."""
+
+import numpy as np
+import pytest
+
+import capture
+import uniform_axis
+from csv_cache import CSVCache
+from measure import measureTrace
+from uniform_axis import UniformAxis, compactAxis
+
+axis = UniformAxis(-1e-6, 1e-9, 2001)
+values = -1e-6 + 1e-9 * np.arange(2001)
+
+
+@pytest.mark.parametrize("key", [0, 7, -1, slice(None), slice(10, 500, 3), slice(None, None, -1), np.array([3, -2, 0]),
+                                 values > 0])
+def test_indexing(key):
+    np.testing.assert_array_equal(axis[key], values[key])
+
+
+def test_index_out_of_bounds():
+    with pytest.raises(IndexError):
+        axis[2001]
+
+
+@pytest.mark.parametrize("side", ["left", "right"])
+def test_searchsorted(side):
+    v = np.concatenate([values[::37], values[::53] + 4e-10, [-1.0, 1.0]])
+    np.testing.assert_array_equal(np.searchsorted(axis, v, side), np.searchsorted(values, v, side))
+    assert np.searchsorted(axis, values[100], side) == np.searchsorted(values, values[100], side)
+
+
+def test_compact_axis(monkeypatch):
+    printed = np.round(values, 12)  #scopes print a few digits, so the values are only close to evenly spaced
+    assert isinstance(compactAxis(printed), UniformAxis) and np.allclose(np.asarray(compactAxis(printed)), printed, rtol=0, atol=1e-12)
+    monkeypatch.setattr(uniform_axis, "checkChunk", 100)
+    uneven = values.copy()
+    uneven[1500] += 5e-10
+    assert compactAxis(uneven) is uneven
+    withNaN = values.copy()
+    withNaN[3] = np.nan
+    assert compactAxis(withNaN) is withNaN
+    descending = values[::-1]
+    assert compactAxis(descending) is descending
+
+
+def test_compact_load_measures_the_same(tmp_path, monkeypatch):
+    monkeypatch.setattr(capture, "cache", CSVCache(str(tmp_path / "cache")))
+    x = np.arange(20_000) * 1e-7
+    path = tmp_path / "capture.csv"
+    path.write_text("Time,CH1\ns,V\n" + "\n".join(f"{t:+.5E},{np.sin(2 * np.pi * 1e4 * t) * 3.3:+.11E}" for t in x) + "\n")
+    memory = capture.load_capture(str(path), True, "memory")
+    compact = capture.load_capture(str(path), True, "compact")
+    assert isinstance(compact.x, UniformAxis) and compact.columns["CH1"].dtype == np.float32
+    xlim = (x[9000], x[11000])
+    expected = measureTrace(memory.x, memory.columns["CH1"], xlim)
+    measured = measureTrace(compact.x, compact.columns["CH1"], xlim)
+    for name in ("min", "max", "frequency", "rms"):    #float32 y values round to about 7 significant digits
+        assert measured[name] == pytest.approx(expected[name], rel=1e-5), name
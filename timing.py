@@ -0,0 +1,239 @@
+"""Timing spans around the stages of loading and plotting (read, parse, plot, draw, hover...).
+Code marks a stage with `with span("parse"):`. The spans go to the current recorder, which by default is a Recorder
+that does nothing, so the marks cost next to nothing unless timing is switched on with setRecorder or profiling
+(the --profile flag). A TimingRecorder keeps every span, sums them into a status line such as
+"read 1.2s / parse 3.4s / draw 0.8s" and writes them as a trace that chrome://tracing or Perfetto can open.
+"""
+
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+
+
+class Recorder:
+    """Recorder that records nothing, used while timing is off"""
+    enabled = False
+    
+    def span(self, name):
+        return contextlib.nullcontext()
+    
+    def add(self, name, seconds, start=None):
+        return {}
+    
+    def extend(self, spans):
+        pass
+    
+    def mark(self):
+        return 0
+    
+    def summary(self, since=0):
+        return ""
+
+
+class TimingRecorder(Recorder):
+    enabled = True
+    
+    def __init__(self):
+        """Keeps every span as a dict of its name, start, duration, self time (its duration less the spans inside it),
+        process and thread. Spans can be recorded from several threads at once.
+        """
+        self.spans = []
+        self.lock = threading.Lock()
+        self.local = threading.local()  #stack of the spans open on each thread, to find the parent of a new span
+    
+    @contextlib.contextmanager
+    def span(self, name):
+        """Times the block as a span of the given name. Yields the span so its self time can be adjusted."""
+        stack = self.local.__dict__.setdefault("stack", [])
+        record = {"name": name, "start": time.perf_counter(), "seconds": 0.0, "self": 0.0, "pid": os.getpid(), "tid": threading.get_ident()}
+        stack.append(record)
+        try:
+            yield record
+        finally:
+            stack.pop()
+            record["seconds"] = time.perf_counter() - record["start"]
+            record["self"] += record["seconds"]
+            if stack:
+                stack[-1]["self"] -= record["seconds"]  #the parent's self time leaves out this span
+            with self.lock:
+                self.spans.append(record)
+    
+    def add(self, name, seconds, start=None):
+        """Records a span that was timed elsewhere, e.g. the reads of a file handed to a parser
+
+        Returns:
+            dict: the span, which can still be adjusted
+        """
+        record = {"name": name, "start": time.perf_counter() - seconds if start is None else start, "seconds": seconds,
+                  "self": seconds, "pid": os.getpid(), "tid": threading.get_ident()}
+        with self.lock:
+            self.spans.append(record)
+        return record
+    
+    def extend(self, spans):
+        """Adds spans recorded in another process, see recorded"""
+        with self.lock:
+            self.spans.extend(spans)
+    
+    def mark(self):
+        """Position to sum the spans from, so a status line covers a single job"""
+        return len(self.spans)
+    
+    def totals(self, since=0):
+        """Self time of every stage since a mark, in the order the stages first ran
+
+        Returns:
+            dict: seconds by span name
+        """
+        totals = {}
+        for record in sorted(self.spans[since:], key=lambda record: record["start"]):
+            totals[record["name"]] = totals.get(record["name"], 0.0) + record["self"]
+        return totals
+    
+    def summary(self, since=0):
+        """Status line of the stages since a mark, e.g. "read 1.2s / parse 3.4s / draw 0.8s" """
+        return " / ".join(f"{name} {formatSeconds(seconds)}" for name, seconds in self.totals(since).items())
+    
+    def writeTrace(self, path):
+        """Writes the spans in the Trace Event format (JSON) that chrome://tracing and ui.perfetto.dev open"""
+        events = [{"name": record["name"], "ph": "X", "ts": record["start"] * 1e6, "dur": record["seconds"] * 1e6,
+                   "pid": record["pid"], "tid": record["tid"], "args": {"self_ms": record["self"] * 1e3}} for record in self.spans]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+class TimedReader:
+    def __init__(self, file):
+        """Wraps a binary file and adds up the time spent reading it, for parsers that read the file themselves
+
+        Args:
+            file: file opened in binary mode
+        """
+        self.file = file
+        self.seconds = 0.0
+    
+    def read(self, *args):
+        start = time.perf_counter()
+        try:
+            return self.file.read(*args)
+        finally:
+            self.seconds += time.perf_counter() - start
+    
+    def readinto(self, buffer):
+        start = time.perf_counter()
+        try:
+            return self.file.readinto(buffer)
+        finally:
+            self.seconds += time.perf_counter() - start
+    
+    def __iter__(self):
+        return iter(self.file)
+    
+    def __getattr__(self, name):    #everything else (peek, seek, closed...) is the file's own
+        return getattr(self.file, name)
+
+
+recorder = Recorder()   #current recorder, see setRecorder
+
+
+def setRecorder(new):
+    """Replaces the current recorder
+
+    Args:
+        new (Recorder): recorder the spans go to from now on, Recorder() to switch timing off
+
+    Returns:
+        Recorder: the previous recorder
+    """
+    global recorder
+    previous, recorder = recorder, new
+    return previous
+
+
+def currentRecorder():
+    return recorder
+
+
+def span(name):
+    """Times a block as a stage of the given name, if timing is on:
+        with span("parse"):
+            ...
+    """
+    return recorder.span(name)
+
+
+def timed(name):
+    """Decorator that times every call of a function as a stage of the given name, if timing is on"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with recorder.span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def readSpan(file, name="parse"):
+    """Times a block that parses a file as a stage of the given name, with the time spent reading the file
+    recorded as its own "read" stage. Yields the file to hand to the parser, which is only wrapped while timing is on.
+    """
+    if not recorder.enabled:
+        yield file
+        return
+    reader = TimedReader(file)
+    reads = recorder.add("read", 0.0)   #added first so the reads are listed before the parsing
+    try:
+        with recorder.span(name) as record:
+            yield reader
+    finally:
+        reads["seconds"] = reads["self"] = reader.seconds
+        record["self"] -= reader.seconds    #the parser may read on threads of its own, so the reads are subtracted by hand
+
+
+def recorded(function, *args):
+    """Calls a function under a TimingRecorder of its own and returns its result with the spans it recorded.
+    Used for work sent to worker processes, whose spans would otherwise be lost: the caller adds them to its
+    recorder with extend.
+    """
+    previous = setRecorder(TimingRecorder())
+    try:
+        return function(*args), recorder.spans
+    finally:
+        setRecorder(previous)
+
+
+def formatSeconds(seconds):
+    return f"{seconds:.1f}s" if seconds >= 0.1 else f"{seconds * 1e3:.0f}ms"
+
+
+@contextlib.contextmanager
+def profiling(path):
+    """Records timing spans while the block runs and writes them to a file when it ends, even if it raises.
+    A .json path gets the spans as a trace (see TimingRecorder.writeTrace). Any other path gets a cProfile report
+    instead (open it with pstats or snakeviz), which only covers the calling thread. Does nothing if path is None.
+
+    Args:
+        path (str): file path of the trace or report, or None
+    """
+    if path is None:
+        yield None
+        return
+    timings = TimingRecorder()
+    previous = setRecorder(timings)
+    profiler = None if path.lower().endswith(".json") else cProfile.Profile()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield timings
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(path)
+        else:
+            timings.writeTrace(path)
+        setRecorder(previous)
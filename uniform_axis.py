@@ -0,0 +1,109 @@
+"""Evenly spaced x values (the time column of a scope capture) stored as their start and step instead of an array.
+A UniformAxis behaves like a read-only 1-D float64 array for what the graphs need: len, indexing and slicing generate only
+the values asked for, so the visible part of a zoomed graph is generated when it is drawn, and np.searchsorted is worked out
+arithmetically instead of by a binary search. Anything else (np.asarray, np.interp...) gets the whole array generated.
+"""
+
+import operator
+
+import numpy as np
+
+uniformTolerance = 0.01     #largest difference from an evenly spaced axis, as a fraction of the step, still counted as uniform (scopes print a few digits)
+checkChunk = 2**22  #samples checked at a time, bounds the temporary arrays of the uniformity check
+
+
+class UniformAxis:
+    __slots__ = ("start", "step", "length")
+    dtype = np.dtype(np.float64)
+    ndim = 1
+    
+    def __init__(self, start, step, length):
+        """x values start, start + step, ... start + (length - 1) * step
+
+        Args:
+            start (float): first value
+            step (float): difference between two values, greater than 0
+            length (int): number of values
+        """
+        self.start = float(start)
+        self.step = float(step)
+        self.length = int(length)
+    
+    @property
+    def shape(self):
+        return (self.length,)
+    
+    @property
+    def nbytes(self):
+        return 0    #nothing is stored per value
+    
+    def __len__(self):
+        return self.length
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.start + self.step * np.arange(*key.indices(self.length), dtype=np.float64)
+        if np.ndim(key) == 0:
+            i = operator.index(key)
+            if not -self.length <= i < self.length:
+                raise IndexError(f"index {i} is out of bounds for a uniform axis of length {self.length}")
+            return np.float64(self.start + self.step * (i % self.length))
+        indices = np.asarray(key)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        return self.start + self.step * np.where(indices < 0, indices + self.length, indices)
+    
+    def __array__(self, dtype=None, copy=None):
+        values = self[:]
+        return values if dtype is None else values.astype(dtype, copy=False)
+    
+    def searchsorted(self, v, side="left", sorter=None):
+        """Positions v would be inserted at to keep the axis sorted, the same as np.searchsorted (which calls this)"""
+        values = np.asarray(v, dtype=np.float64)
+        i = np.clip(np.ceil((values - self.start) / self.step), 0, self.length).astype(np.intp)
+        # the division can be off by one either way through rounding, compared against the generated values to be exact
+        before = self[np.maximum(i - 1, 0)]
+        at = self[np.minimum(i, self.length - 1)]
+        if side == "left":
+            i = np.where((i > 0) & (before >= values), i - 1, np.where((i < self.length) & (at < values), i + 1, i))
+        else:
+            i = np.where((i < self.length) & (at <= values), i + 1, np.where((i > 0) & (before > values), i - 1, i))
+        return i if np.ndim(v) else int(i)
+    
+    def __repr__(self):
+        return f"UniformAxis(start={self.start!r}, step={self.step!r}, length={self.length})"
+
+
+def uniformSpacing(x, tolerance=uniformTolerance):
+    """Checks whether x values are evenly spaced, a chunk at a time
+
+    Args:
+        x (np.ndarray): x values
+        tolerance (float, optional): largest difference from the evenly spaced values, as a fraction of the step
+
+    Returns:
+        tuple: start and step of the values, or None if they are not evenly spaced in ascending order
+    """
+    n = len(x)
+    if n < 2:
+        return None
+    start, step = float(x[0]), (float(x[-1]) - float(x[0])) / (n - 1)
+    if not (np.isfinite(step) and step > 0):
+        return None
+    for low in range(0, n, checkChunk):
+        chunk = x[low:low + checkChunk]
+        expected = start + step * np.arange(low, low + len(chunk), dtype=np.float64)
+        if not np.all(np.abs(chunk - expected) <= tolerance * step):    #NaNs fail too
+            return None
+    return start, step
+
+
+def compactAxis(x):
+    """x values as a UniformAxis if they are evenly spaced, otherwise x as it is"""
+    spacing = uniformSpacing(x)
+    return x if spacing is None else UniformAxis(*spacing, len(x))
+
+
+def asArray(x):
+    """np.asarray that keeps a UniformAxis as it is"""
+    return x if isinstance(x, UniformAxis) else np.asarray(x)